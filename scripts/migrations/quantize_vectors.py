@@ -0,0 +1,66 @@
+"""
+Migración y benchmark del almacenamiento vectorial cuantizado.
+
+Uso:
+    python scripts/migrations/quantize_vectors.py --mode int8
+    python scripts/migrations/quantize_vectors.py --mode bit --benchmark --k 10
+
+La migración crea la tabla `memory_embeddings_<mode>` y copia los vectores
+existentes; después se activa con VECTOR_QUANTIZATION=<mode>. El benchmark
+compara tamaño, latencia p50/p95 y recall@k contra el layout float32.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from src.core.config import settings
+from src.memory.sqlite_store import SQLiteStore
+from src.memory.vector_quantization import (
+    QUANTIZATION_MODES,
+    backfill_quantized,
+    benchmark,
+    ensure_quantized_table,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("migration")
+
+
+async def main(args: argparse.Namespace) -> None:
+    store = SQLiteStore(args.db)
+    try:
+        db = await store.get_db()
+        await ensure_quantized_table(db, args.mode)
+        await db.commit()
+        copied = await backfill_quantized(store, args.mode)
+        logger.info("Migration complete: %d vectors quantized (%s)", copied, args.mode)
+
+        if args.benchmark:
+            report = await benchmark(
+                store,
+                args.mode,
+                k=args.k,
+                queries=args.queries,
+                overfetch=args.overfetch,
+                namespace=args.namespace,
+            )
+            print(json.dumps(report, indent=2))
+    finally:
+        await store.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mode", choices=QUANTIZATION_MODES, required=True)
+    parser.add_argument("--db", default=settings.SQLITE_DB_PATH)
+    parser.add_argument("--benchmark", action="store_true")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--overfetch", type=int, default=4)
+    parser.add_argument("--namespace", default=None)
+    asyncio.run(main(parser.parse_args()))
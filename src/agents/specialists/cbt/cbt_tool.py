@@ -1,3 +1,4 @@
+import functools
 import json
 import logging
 from typing import Any, cast
@@ -7,18 +8,24 @@ from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 from pydantic import BaseModel, Field
 
-from src.agents.utils.knowledge_formatter import format_knowledge_for_prompt
-from src.core.dependencies import get_vector_memory_manager
+from src.agents.utils.context_fanout import (
+    ContextSource,
+    gather_context,
+    history_summary,
+)
+from src.core.config import settings
 from src.core.engine import create_observable_config, llm_core
 from src.core.message_utils import (
     dict_to_langchain_messages,
 )
 from src.core.profile_manager import user_profile_manager
-from src.memory.knowledge_base import knowledge_base_manager
-from src.memory.long_term_memory import long_term_memory
+from src.core.profile_seeder import get_default_profile
+from src.core.turn_context import turn_context_for
 
 logger = logging.getLogger(__name__)
 
+_NO_RAG_CONTEXT = "No hay contexto documental disponible."
+
 
 class TherapeuticPlan(BaseModel):
     insight: str = Field(description="Análisis del usuario, identificando distorsiones")
@@ -31,12 +38,8 @@ class TherapeuticPlan(BaseModel):
 async def _get_cbt_rag_context(chat_id: str, user_message: str) -> str:
     """Recupera contexto TCC relevante usando Smart RAG."""
     try:
-        manager = get_vector_memory_manager()
-        global_results = await manager.retrieve_context(
-            user_id="system", query=user_message, limit=3, namespace="global"
-        )
-        user_results = await manager.retrieve_context(
-            user_id=chat_id, query=user_message, limit=2, namespace="user"
+        global_results, user_results = await turn_context_for(chat_id).retrieve(
+            user_message, [("global", "system", 3), ("user", chat_id, 2)]
         )
 
         all_results = global_results + user_results
@@ -47,19 +50,28 @@ async def _get_cbt_rag_context(chat_id: str, user_message: str) -> str:
                 source = r.get("metadata", {}).get("filename", "Memoria de Usuario")
                 formatted_results.append(f"- [Fuente: {source}] {r['content']}")
             return "\n\n".join(formatted_results)
-        return "No hay contexto documental disponible."
+        return _NO_RAG_CONTEXT
     except Exception as e:
         logger.warning(f"Error en RAG TCC: {e}")
-        return "No hay contexto documental disponible."
-
-
-async def _get_cbt_memories(chat_id: str) -> tuple[str, str]:
-    """Recupera resumen de memoria y hechos para CBT."""
-    memory_data = await long_term_memory.get_summary(chat_id)
-    history_summary = memory_data.summary
-    knowledge_data = await knowledge_base_manager.load_knowledge(chat_id)
-    structured_knowledge = format_knowledge_for_prompt(knowledge_data)
-    return history_summary, structured_knowledge
+        return _NO_RAG_CONTEXT
+
+
+async def _gather_cbt_context(chat_id: str, user_message: str) -> dict[str, Any]:
+    """Perfil, RAG y resumen, consultados en paralelo con plazo."""
+    ctx = turn_context_for(chat_id)
+    return await gather_context(
+        "cbt",
+        [
+            ContextSource("profile", ctx.profile, get_default_profile),
+            ContextSource(
+                "rag",
+                functools.partial(_get_cbt_rag_context, chat_id, user_message),
+                lambda: _NO_RAG_CONTEXT,
+                timeout=settings.CONTEXT_RAG_TIMEOUT_SECONDS,
+            ),
+            ContextSource("summary", functools.partial(history_summary, ctx), str),
+        ],
+    )
 
 
 @tool
@@ -80,9 +92,8 @@ async def cbt_therapeutic_guidance_tool(
     routing_metadata = routing_metadata or {}
     session_context = session_context or {}
 
-    profile = await user_profile_manager.load_profile(chat_id)
-    knowledge_context = await _get_cbt_rag_context(chat_id, user_message)
-    history_summary, structured_knowledge = await _get_cbt_memories(chat_id)
+    context = await _gather_cbt_context(chat_id, user_message)
+    profile = context["profile"]
 
     adaptation = user_profile_manager.get_personality_adaptation(profile)
     history_limit = adaptation.get("history_limit", 20)
@@ -93,8 +104,8 @@ async def cbt_therapeutic_guidance_tool(
             "system",
             "Eres el Estratega Psicológico de AEGEN. No hablas con el usuario.\n"
             "Tu trabajo es analizar la conversación y crear un plan para MAGI.\n\n"
-            f"Memoria: {history_summary}\n\n"
-            f"Teoría (RAG): {knowledge_context}\n\n"
+            f"Memoria: {context['summary']}\n\n"
+            f"Teoría (RAG): {context['rag']}\n\n"
             "INSTRUCCIÓN DE PLANIFICACIÓN:\n"
             "1. Identifica el bloqueo del usuario.\n"
             "2. Diseña una instrucción de acción para que MAGI se la diga al usuario.\n"
@@ -11,6 +11,7 @@ from src.agents.utils.state_utils import (
 from src.core.interfaces.specialist import SpecialistInterface
 from src.core.registry import specialist_registry
 from src.core.schemas import GraphStateV2
+from src.core.turn_context import turn_scope
 
 logger = logging.getLogger(__name__)
 
@@ -63,13 +64,14 @@ class CBTSpecialist(SpecialistInterface):
         routing_decision = state.get("payload", {}).get("routing_decision", {})
         session_ctx = state.get("payload", {}).get("session_context", {})
 
-        plan_json = await self.tool.ainvoke({
-            "user_message": user_content,
-            "chat_id": chat_id,
-            "conversation_history": raw_history,
-            "routing_metadata": routing_decision,
-            "session_context": session_ctx,
-        })
+        with turn_scope(state.get("turn_context")):
+            plan_json = await self.tool.ainvoke({
+                "user_message": user_content,
+                "chat_id": chat_id,
+                "conversation_history": raw_history,
+                "routing_metadata": routing_decision,
+                "session_context": session_ctx,
+            })
 
         # 3. Actualizar Estado para chaining hacia chat_specialist
         state["payload"]["cbt_plan_json"] = plan_json
@@ -1,3 +1,4 @@
+import functools
 import json
 import logging
 from pathlib import Path
@@ -7,16 +8,21 @@ from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 
-from src.agents.utils.knowledge_formatter import format_knowledge_for_prompt
-from src.core.dependencies import get_vector_memory_manager
+from src.agents.utils.context_fanout import (
+    ContextSource,
+    gather_context,
+    history_summary,
+    structured_knowledge,
+)
+from src.core.config import settings
 from src.core.engine import create_observable_config, llm_chat
 from src.core.message_utils import (
     dict_to_langchain_messages,
     extract_recent_user_messages,
 )
 from src.core.profile_manager import user_profile_manager
-from src.memory.knowledge_base import knowledge_base_manager
-from src.memory.long_term_memory import long_term_memory
+from src.core.profile_seeder import get_default_profile
+from src.core.turn_context import turn_context_for
 from src.personality.prompt_builder import system_prompt_builder
 
 from .multimodal import process_image_input
@@ -27,13 +33,10 @@ logger = logging.getLogger(__name__)
 async def _get_chat_rag_context(chat_id: str, user_message: str) -> str:
     """Recupera contexto relevante usando Smart RAG (Global + Usuario)."""
     try:
-        manager = get_vector_memory_manager()
-        # Buscar en conocimiento global y del usuario
-        global_results = await manager.retrieve_context(
-            user_id="system", query=user_message, limit=2, namespace="global"
-        )
-        user_results = await manager.retrieve_context(
-            user_id=chat_id, query=user_message, limit=2, namespace="user"
+        # Global y usuario con un solo embedding; reutiliza los resultados si
+        # otro especialista ya consultó el mismo mensaje en este turno
+        global_results, user_results = await turn_context_for(chat_id).retrieve(
+            user_message, [("global", "system", 2), ("user", chat_id, 2)]
         )
 
         all_results = global_results + user_results
@@ -67,14 +70,27 @@ async def _get_chat_rag_context(chat_id: str, user_message: str) -> str:
         return ""
 
 
-async def _get_chat_memories(chat_id: str) -> tuple[str, str]:
-    """Recupera resumen de memoria y conocimiento estructurado."""
-    memory_data = await long_term_memory.get_summary(chat_id)
-    history_summary = memory_data.summary
-
-    knowledge_data = await knowledge_base_manager.load_knowledge(chat_id)
-    structured_knowledge = format_knowledge_for_prompt(knowledge_data)
-    return history_summary, structured_knowledge
+async def _gather_chat_context(chat_id: str, user_message: str) -> dict[str, Any]:
+    """Perfil, RAG, memoria e hitos, consultados en paralelo con plazo."""
+    ctx = turn_context_for(chat_id)
+    return await gather_context(
+        "chat",
+        [
+            ContextSource("profile", ctx.profile, get_default_profile),
+            ContextSource(
+                "rag",
+                functools.partial(_get_chat_rag_context, chat_id, user_message),
+                str,
+                timeout=settings.CONTEXT_RAG_TIMEOUT_SECONDS,
+            ),
+            ContextSource("summary", functools.partial(history_summary, ctx), str),
+            ContextSource(
+                "knowledge", functools.partial(structured_knowledge, ctx), str
+            ),
+            # Los consume el prompt builder
+            ContextSource("milestones", functools.partial(ctx.milestones, 3), list),
+        ],
+    )
 
 
 @tool
@@ -98,9 +114,8 @@ async def conversational_chat_tool(
     session_context = session_context or {}
 
     # 1. Cargar perfil y Contexto (RAG + Memoria)
-    profile = await user_profile_manager.load_profile(chat_id)
-    knowledge_context = await _get_chat_rag_context(chat_id, user_message)
-    history_summary, structured_knowledge = await _get_chat_memories(chat_id)
+    context = await _gather_chat_context(chat_id, user_message)
+    profile = context["profile"]
 
     # 2. Configurar Persona y Prompts
     adaptation = user_profile_manager.get_personality_adaptation(profile)
@@ -115,9 +130,10 @@ async def conversational_chat_tool(
         profile=profile,
         skill_name="chat",
         runtime_context={
-            "history_summary": history_summary,
-            "knowledge_context": knowledge_context,
-            "structured_knowledge": structured_knowledge,
+            "history_summary": context["summary"],
+            "knowledge_context": context["rag"],
+            "structured_knowledge": context["knowledge"],
+            "milestones": context["milestones"],
             "is_proactive": is_proactive,
             "pending_intents": pending_intents,
         },
@@ -15,6 +15,7 @@ from src.agents.utils.state_utils import extract_user_content_from_state
 from src.core.interfaces.specialist import SpecialistInterface
 from src.core.registry import specialist_registry
 from src.core.schemas import GraphStateV2
+from src.core.turn_context import turn_scope
 
 logger = logging.getLogger(__name__)
 
@@ -34,15 +35,16 @@ async def _chat_node(state: GraphStateV2) -> Any:
     session_ctx = payload.get("session_context", {})
     cbt_plan_json = payload.get("cbt_plan_json")
 
-    response_text = await conversational_chat_tool.ainvoke({
-        "user_message": user_content,
-        "chat_id": chat_id,
-        "conversation_history": raw_history,
-        "image_path": image_path,
-        "routing_metadata": routing_decision,
-        "session_context": session_ctx,
-        "cbt_plan_json": cbt_plan_json,
-    })
+    with turn_scope(state.get("turn_context")):
+        response_text = await conversational_chat_tool.ainvoke({
+            "user_message": user_content,
+            "chat_id": chat_id,
+            "conversation_history": raw_history,
+            "image_path": image_path,
+            "routing_metadata": routing_decision,
+            "session_context": session_ctx,
+            "cbt_plan_json": cbt_plan_json,
+        })
 
     # Actualizar historial de sesión
     updated_history = list(raw_history)
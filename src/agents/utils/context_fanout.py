@@ -0,0 +1,86 @@
+"""
+Ensamblado concurrente del contexto de un especialista.
+
+Cada fuente (perfil, RAG, resumen, bóveda, hitos) se consulta a la vez y con
+su propio plazo. Una fuente que vence el plazo o falla aporta su valor de
+respaldo en lugar de bloquear la respuesta. La latencia de cada fuente se
+registra en `context_source_duration_seconds`; la más lenta es el camino
+crítico del turno.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from src.agents.utils.knowledge_formatter import format_knowledge_for_prompt
+from src.core.config import settings
+from src.core.observability.prometheus_metrics import context_source_duration_seconds
+from src.core.turn_context import TurnContext
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ContextSource:
+    name: str
+    load: Callable[[], Awaitable[Any]]
+    # Valor cuando la fuente vence el plazo o falla
+    fallback: Callable[[], Any]
+    timeout: float | None = None
+
+
+async def _fetch(specialist: str, source: ContextSource) -> tuple[Any, float]:
+    timeout = source.timeout or settings.CONTEXT_SOURCE_TIMEOUT_SECONDS
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        value = await asyncio.wait_for(source.load(), timeout)
+    except TimeoutError:
+        outcome = "timeout"
+        logger.warning(
+            "[%s] Context source %s timed out after %.2fs",
+            specialist,
+            source.name,
+            timeout,
+        )
+        value = source.fallback()
+    except Exception as e:
+        outcome = "error"
+        logger.warning("[%s] Context source %s failed: %s", specialist, source.name, e)
+        value = source.fallback()
+    elapsed = time.perf_counter() - start
+    context_source_duration_seconds.labels(specialist, source.name, outcome).observe(
+        elapsed
+    )
+    return value, elapsed
+
+
+async def gather_context(
+    specialist: str, sources: list[ContextSource]
+) -> dict[str, Any]:
+    """Consulta las fuentes en paralelo; retorna sus valores por nombre."""
+    results = await asyncio.gather(*(_fetch(specialist, s) for s in sources))
+    timings = {
+        s.name: elapsed for s, (_, elapsed) in zip(sources, results, strict=True)
+    }
+    if timings:
+        slowest = max(timings, key=timings.__getitem__)
+        logger.debug(
+            "[%s] Context assembled in %.3fs (critical path: %s) %s",
+            specialist,
+            timings[slowest],
+            slowest,
+            {name: round(t, 3) for name, t in timings.items()},
+        )
+    return {s.name: value for s, (value, _) in zip(sources, results, strict=True)}
+
+
+async def history_summary(ctx: TurnContext) -> str:
+    return str((await ctx.summary()).summary or "")
+
+
+async def structured_knowledge(ctx: TurnContext) -> str:
+    return format_knowledge_for_prompt(await ctx.knowledge())
@@ -7,8 +7,21 @@ import logging
 
 from fastapi import APIRouter, Query
 
-from src.core.schemas.api import KnowledgeDocumentStatus, KnowledgeStatusResponse
+from src.core.dependencies import get_vector_memory_manager
+from src.core.schemas.api import (
+    AnnRecallReport,
+    AnnRecallResponse,
+    CompactionReport,
+    CompactionStatusResponse,
+    DatabaseStats,
+    KnowledgeDocumentStatus,
+    KnowledgeStatusResponse,
+    SQLiteStatementStats,
+    SQLiteStatsResponse,
+)
+from src.memory.compaction import memory_compactor
 from src.memory.knowledge_auditor import knowledge_auditor
+from src.memory.query_stats import query_stats
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -70,3 +83,62 @@ async def get_knowledge_status(
         last_sync=stats["last_sync"],
         documents=documents,
     )
+
+
+@router.get(
+    "/ann",
+    response_model=AnnRecallResponse,
+    tags=["Diagnostics"],
+    summary="Recall medido de los índices ANN frente a la búsqueda exacta",
+)
+async def get_ann_recall(
+    k: int = Query(default=10, ge=1, le=100),
+    samples: int = Query(default=50, ge=1, le=500),
+) -> AnnRecallResponse:
+    """
+    Mide recall@k y latencia media de cada backend IVF configurado
+    (ANN_IVF_NAMESPACES) usando vectores almacenados como consultas.
+    """
+    manager = get_vector_memory_manager()
+    reports = [
+        AnnRecallReport(**await backend.measure_recall(k=k, samples=samples))
+        for backend in manager.hybrid_search.ann_backends.values()
+    ]
+    return AnnRecallResponse(backends=reports)
+
+
+@router.get(
+    "/compaction",
+    response_model=CompactionStatusResponse,
+    tags=["Diagnostics"],
+    summary="Estadísticas de la base y de la última compactación",
+)
+async def get_compaction_status() -> CompactionStatusResponse:
+    """
+    Filas activas/inactivas, vectores, entradas FTS, tamaño y fragmentación
+    actuales, junto con el informe antes/después de la última compactación.
+    """
+    last = memory_compactor.last_report
+    return CompactionStatusResponse(
+        current=DatabaseStats(**await memory_compactor.stats()),
+        last_run=CompactionReport(**last) if last else None,
+    )
+
+
+@router.get(
+    "/sqlite",
+    response_model=SQLiteStatsResponse,
+    tags=["Diagnostics"],
+    summary="Sentencias SQLite con mayor tiempo acumulado",
+)
+async def get_sqlite_stats(
+    limit: int = Query(default=20, ge=1, le=200),
+) -> SQLiteStatsResponse:
+    """
+    Sentencias normalizadas ordenadas por tiempo total desde el arranque,
+    con llamadas, media, máximo y ejecuciones por encima del umbral lento.
+    """
+    return SQLiteStatsResponse(
+        slow_query_ms=query_stats.slow_ms,
+        statements=[SQLiteStatementStats(**s) for s in query_stats.top(limit)],
+    )
@@ -92,7 +92,8 @@ async def _handle_efimero(chat_id: str) -> str:
     current = ms.get("ephemeral_mode", False)
     ms["ephemeral_mode"] = not current
     profile["memory_settings"] = ms
-    await user_profile_manager.save_profile(chat_id, profile)
+    # Otras réplicas deben ver el cambio de modo efímero ya
+    await user_profile_manager.save_profile(chat_id, profile, immediate=True)
 
     if not current:
         return (
@@ -33,9 +33,8 @@ async def check_vector_db() -> ServiceStatus:
     """Verifica la conectividad real de la base de datos de vectores (SQLite)."""
     try:
         store = get_sqlite_store()
-        db = await store.get_db()
         # Una consulta simple para verificar la conexión
-        async with db.execute("SELECT 1") as cursor:
+        async with store.reader() as db, db.execute("SELECT 1") as cursor:
             await cursor.fetchone()
         return ServiceStatus.OK
     except Exception as e:
@@ -9,6 +9,7 @@ from src.core.messaging.outbox import outbox_manager
 from src.core.profile_manager import user_profile_manager
 from src.core.schemas import GraphStateV2
 from src.core.session_manager import session_manager
+from src.core.turn_context import TurnContext, turn_scope
 from src.memory.long_term_memory import long_term_memory
 from src.tools import telegram_interface
 
@@ -82,6 +83,7 @@ async def _run_orchestration(
     payload: dict[str, Any],
     conversation_history: list[Any],
     task_id: str,
+    turn_context: TurnContext,
 ) -> dict[str, Any]:
     initial_state = GraphStateV2(
         event=event,
@@ -89,6 +91,7 @@ async def _run_orchestration(
         error_message=None,
         conversation_history=conversation_history,
         session_id=str(event.chat_id),
+        turn_context=turn_context,
     )
 
     try:
@@ -144,16 +147,27 @@ async def process_event_task(event: schemas.CanonicalEventV1) -> None:
     chat_id = str(event.chat_id)
     logger.info(f"[TaskID: {task_id}] Iniciando orquestación para chat {chat_id}.")
 
-    await _update_user_context(event)
-    payload, history = await _load_session_context(chat_id)
+    # Perfil, bóveda, resumen, hitos y RAG: una carga por turno para todos
+    # los nodos y herramientas
+    turn_context = TurnContext(chat_id)
+    try:
+        with turn_scope(turn_context):
+            await _update_user_context(event)
+            payload, history = await _load_session_context(chat_id)
 
-    final_state = await _run_orchestration(event, payload, history, task_id)
+            final_state = await _run_orchestration(
+                event, payload, history, task_id, turn_context
+            )
 
-    message = await _send_response(chat_id, final_state, task_id)
+            message = await _send_response(chat_id, final_state, task_id)
 
-    await session_manager.save_session(chat_id, final_state)
+            await session_manager.save_session(chat_id, final_state)
 
-    user_text = event.content if isinstance(event.content, str) else "[No-Text]"
-    await _buffer_memory(chat_id, user_text, message)
+            user_text = event.content if isinstance(event.content, str) else "[No-Text]"
+            await _buffer_memory(chat_id, user_text, message)
+    finally:
+        # Escritura diferida: los guardados del perfil en el turno, una sola
+        # vez y también si el turno falla a medias
+        await user_profile_manager.flush(chat_id)
 
     logger.info(f"[TaskID: {task_id}] Orquestación finalizada.")
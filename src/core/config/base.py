@@ -62,6 +62,79 @@ class BaseAppSettings(BaseSettings):
     SQLITE_SCHEMA_PATH: str = "src/memory/schema.sql"
     SQLITE_BACKUP_DIR: str = "storage/backups"
 
+    # Pool de conexiones SQLite (1 escritor + N lectores en modo WAL)
+    SQLITE_READ_POOL_SIZE: int = 4  # 0 = todas las lecturas usan el escritor
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 268_435_456  # 256 MiB
+    SQLITE_CACHE_SIZE: int = -16_000  # Negativo = KiB (~16 MB por conexión)
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    # Group commit: escrituras que llegan dentro de la ventana comparten COMMIT
+    SQLITE_GROUP_COMMIT_WINDOW_MS: float = 2.0
+    SQLITE_GROUP_COMMIT_MAX_BATCH: int = 128
+    # Tiempo por sentencia (histograma Prometheus) y log de consultas lentas
+    SQLITE_QUERY_STATS_ENABLED: bool = True
+    SQLITE_SLOW_QUERY_MS: float = 250.0
+
+    # Dimensión Matryoshka de memory_embeddings (text-embedding-004: <= 768).
+    # Al cambiarla, el arranque rellena un staging y conmuta la tabla.
+    EMBEDDING_DIMENSION: int = 768
+
+    # Caché de embeddings (L1 LRU en proceso + L2 tabla embedding_cache)
+    EMBEDDING_CACHE_L1_SIZE: int = 2048
+    EMBEDDING_CACHE_MAX_ROWS: int = 50_000
+
+    # Índice NumPy exacto para el namespace global (SQLite sigue siendo la verdad)
+    GLOBAL_VECTOR_INDEX_ENABLED: bool = True
+    GLOBAL_VECTOR_INDEX_MMAP_PATH: str | None = None  # ej. "storage/global_index"
+
+    # Backend ANN IVF por namespace (persistido en <dir de la DB>/ann/)
+    ANN_IVF_NAMESPACES: list[str] = []  # ej. ["user"]
+    ANN_IVF_NLIST: int = 0  # 0 = ~sqrt(N) listas
+    ANN_IVF_NPROBE: int = 8
+    ANN_IVF_PQ_M: int = 0  # Subespacios PQ (divisor de la dimensión); 0 = sin PQ
+    ANN_IVF_RETRAIN_RATIO: float = 0.5  # Reentrenar al crecer un 50%
+    ANN_IVF_SYNC_SECONDS: int = 300
+
+    # Vectores cuantizados para la primera etapa KNN: "none" | "int8" | "bit"
+    # (rerank exacto contra float32). Migración: scripts/migrations/quantize_vectors.py
+    VECTOR_QUANTIZATION: str = "none"
+    VECTOR_QUANTIZATION_OVERFETCH: int = 4
+
+    # Vigilancia de storage/knowledge: eventos inotify (watchfiles) con
+    # agrupación; el polling periódico queda como respaldo automático
+    KNOWLEDGE_WATCH_EVENTS: bool = True
+    KNOWLEDGE_WATCH_DEBOUNCE_MS: int = 1500
+    KNOWLEDGE_POLL_SECONDS: int = 30
+
+    # Extracción de documentos en procesos (PDF por páginas, XLSX por hojas)
+    DOCUMENT_EXTRACTION_WORKERS: int = 0  # 0 = núcleos disponibles
+    DOCUMENT_EXTRACTION_TIMEOUT_SECONDS: int = 120  # Por documento
+    DOCUMENT_EXTRACTION_MEMORY_MB: int = 1024  # RLIMIT_AS por worker; 0 = sin límite
+
+    # Compactación de memorias inactivas: borrado físico, FTS optimize e
+    # incremental_vacuum acotado (páginas liberadas y segundos por ejecución)
+    COMPACTION_ENABLED: bool = True
+    COMPACTION_INTERVAL_HOURS: float = 24
+    COMPACTION_BATCH_SIZE: int = 500
+    COMPACTION_VACUUM_MAX_MB: int = 256
+    COMPACTION_VACUUM_SECONDS: float = 5.0
+
+    # Perfil acotado: ventanas del historial dentro del documento (lo que sale
+    # de ellas se archiva en profile_history) y tamaño máximo del JSON
+    PROFILE_TIMELINE_WINDOW: int = 20
+    PROFILE_PREFERENCES_WINDOW: int = 30
+    PROFILE_MAX_BYTES: int = 16_384
+    # Caché L1 de perfiles validados (invalidación entre réplicas por Redis
+    # pub/sub) y escritura diferida: fin de turno o cada N segundos
+    PROFILE_L1_SIZE: int = 1024
+    PROFILE_FLUSH_INTERVAL_SECONDS: float = 5.0
+
+    # Ensamblado de contexto de los especialistas: las fuentes se consultan en
+    # paralelo y una lenta o caída aporta su valor vacío al vencer el plazo
+    CONTEXT_SOURCE_TIMEOUT_SECONDS: float = 1.5
+    CONTEXT_RAG_TIMEOUT_SECONDS: float = 3.0  # Embedding de la consulta + búsqueda
+
     # Cloud Backup (GCS)
     GCS_BACKUP_BUCKET: str | None = None
     GCS_CREDENTIALS_JSON: SecretStr | None = None
@@ -88,6 +88,10 @@ async def shutdown_global_resources() -> None:
         await redis_connection.close()
         logger.info("Redis connection closed.")
 
+    from src.tools.document_extraction import shutdown_document_extractor
+
+    shutdown_document_extractor()
+
 
 # --- Inyección de Dependencias ---
 
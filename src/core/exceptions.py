@@ -64,4 +64,19 @@ class VectorDBError(AppBaseError):
         super().__init__(message, status_code=503, detail=message)
 
 
+class DocumentExtractionError(AppBaseError):
+    """Error al extraer texto de un documento (formato, tiempo o memoria)."""
+
+    def __init__(self, message: str = "Document extraction failed"):
+        super().__init__(message, status_code=422, detail=message)
+
+
+class TransientExtractionError(DocumentExtractionError):
+    """Fallo recuperable (tiempo, worker caído, memoria): se reintenta."""
+
+    def __init__(self, message: str = "Document extraction interrupted"):
+        super().__init__(message)
+        self.status_code = 503
+
+
 # Puedes añadir más excepciones específicas según necesites.
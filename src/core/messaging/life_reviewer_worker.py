@@ -34,15 +34,7 @@ class LifeReviewerWorker:
             try:
                 logger.info("Iniciando revisión de vida...")
                 store = get_sqlite_store()
-                db = await store.get_db()
-
-                sql = (
-                    "SELECT DISTINCT chat_id FROM user_milestones "
-                    "WHERE created_at >= datetime('now', '-30 days')"
-                )
-                async with db.execute(sql) as cursor:
-                    rows = await cursor.fetchall()
-                    chat_ids = [r["chat_id"] for r in rows]
+                chat_ids = await store.state_repo.get_recently_active_chat_ids()
 
                 for chat_id in chat_ids:
                     await life_reviewer.review_user_progress(chat_id)
@@ -42,3 +42,33 @@ llm_cost_total = Counter(
     "Estimated total cost in USD by provider and model",
     ["provider", "model"],
 )
+
+# Embedding cache (L1 en proceso / L2 SQLite)
+embedding_cache_requests_total = Counter(
+    "embedding_cache_requests_total",
+    "Embedding cache lookups by model and result (l1_hit, l2_hit, miss)",
+    ["model", "result"],
+)
+
+# Perfiles (L1 en proceso / L2 Redis / SQLite)
+profile_cache_requests_total = Counter(
+    "profile_cache_requests_total",
+    "Profile loads by result (l1_hit, l2_hit, store_hit, miss)",
+    ["result"],
+)
+
+# SQLite: duración por sentencia normalizada (src/memory/query_stats.py)
+sqlite_statement_duration_seconds = Histogram(
+    "sqlite_statement_duration_seconds",
+    "SQLite statement execution time by normalised statement",
+    ["statement"],
+    buckets=[0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0],
+)
+
+# Contexto de especialistas: latencia por fuente (src/agents/utils/context_fanout.py)
+context_source_duration_seconds = Histogram(
+    "context_source_duration_seconds",
+    "Specialist context fetch time by source and outcome (ok, timeout, error)",
+    ["specialist", "source", "outcome"],
+    buckets=[0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0],
+)
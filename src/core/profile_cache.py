@@ -0,0 +1,196 @@
+"""
+Caché L1 de perfiles validados.
+
+Cada entrada guarda el JSON de un perfil que ya pasó por
+`ensure_profile_complete` (o que se guardó desde uno), estampado con la
+versión de Redis (`profile:{chat_id}:version`) con la que se leyó o escribió.
+Un hit se sirve con `json.loads`, sin Redis ni Pydantic, y cada llamador
+recibe su propia copia.
+
+Los guardados marcan la entrada como sucia y acumulan el historial archivado;
+`UserProfileManager.flush` los escribe a Redis y SQLite. Tras cada escritura
+la versión se incrementa y se publica en `profile:invalidate`: las demás
+réplicas descartan su copia limpia si es más antigua.
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from redis import asyncio as aioredis
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "profile:invalidate"
+
+
+def version_key(chat_id: str) -> str:
+    return f"profile:{chat_id}:version"
+
+
+@dataclass
+class CachedProfile:
+    payload: str
+    version: int
+    dirty: bool = False
+    # Incrementa en cada guardado: un flush solo limpia lo que escribió
+    generation: int = 0
+    archived: dict[str, list[Any]] = field(default_factory=dict)
+
+
+@dataclass
+class PendingWrite:
+    """Instantánea de una entrada sucia para escribirla."""
+
+    payload: str
+    generation: int
+    archived: dict[str, list[Any]]
+
+
+class ProfileCache:
+    """LRU de perfiles validados con versión, escritura diferida e invalidación."""
+
+    def __init__(self, max_entries: int | None = None) -> None:
+        self.max_entries = max_entries or settings.PROFILE_L1_SIZE
+        self.replica_id = uuid.uuid4().hex
+        self._entries: OrderedDict[str, CachedProfile] = OrderedDict()
+        self._listener: asyncio.Task | None = None
+
+    def get(self, chat_id: str) -> dict[str, Any] | None:
+        entry = self._entries.get(chat_id)
+        if entry is None:
+            return None
+        self._entries.move_to_end(chat_id)
+        return json.loads(entry.payload)  # type: ignore[no-any-return]
+
+    def put(self, chat_id: str, profile: dict[str, Any], version: int) -> None:
+        """Cachea un perfil limpio (leído de Redis/SQLite o por defecto)."""
+        current = self._entries.get(chat_id)
+        if current is not None and current.dirty:
+            return
+        self._entries[chat_id] = CachedProfile(
+            json.dumps(profile, ensure_ascii=False), version
+        )
+        self._entries.move_to_end(chat_id)
+        self._evict()
+
+    def stage(
+        self, chat_id: str, profile: dict[str, Any], archived: dict[str, list[Any]]
+    ) -> None:
+        """Guarda un perfil modificado; queda sucio hasta el flush."""
+        entry = self._entries.get(chat_id)
+        payload = json.dumps(profile, ensure_ascii=False)
+        if entry is None:
+            entry = self._entries[chat_id] = CachedProfile(payload, 0)
+        entry.payload = payload
+        entry.dirty = True
+        entry.generation += 1
+        for kind, entries in archived.items():
+            if entries:
+                entry.archived.setdefault(kind, []).extend(entries)
+        self._entries.move_to_end(chat_id)
+        self._evict()
+
+    def dirty_ids(self) -> list[str]:
+        return [chat_id for chat_id, e in self._entries.items() if e.dirty]
+
+    def take(self, chat_id: str) -> PendingWrite | None:
+        """Instantánea de una entrada sucia; el historial pendiente sale de ella."""
+        entry = self._entries.get(chat_id)
+        if entry is None or not entry.dirty:
+            return None
+        archived, entry.archived = entry.archived, {}
+        return PendingWrite(entry.payload, entry.generation, archived)
+
+    def written(self, chat_id: str, pending: PendingWrite, version: int) -> None:
+        """Marca la escritura; si hubo guardados después, la entrada sigue sucia."""
+        entry = self._entries.get(chat_id)
+        if entry is None:
+            return
+        entry.version = max(entry.version, version)
+        if entry.generation == pending.generation:
+            entry.dirty = False
+
+    def restore(self, chat_id: str, pending: PendingWrite) -> None:
+        """Devuelve el historial de una escritura fallida para reintentarla."""
+        entry = self._entries.get(chat_id)
+        if entry is None:
+            return
+        for kind, entries in pending.archived.items():
+            entry.archived[kind] = entries + entry.archived.get(kind, [])
+
+    def invalidate(self, chat_id: str, version: int | None = None) -> bool:
+        """Descarta una copia limpia más antigua que `version` (o cualquiera)."""
+        entry = self._entries.get(chat_id)
+        if entry is None or entry.dirty:
+            return False
+        if version is not None and entry.version >= version:
+            return False
+        del self._entries[chat_id]
+        return True
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _evict(self) -> None:
+        # Las entradas sucias no se descartan: esperan a su flush
+        excess = len(self._entries) - self.max_entries
+        if excess <= 0:
+            return
+        for chat_id in [c for c, e in self._entries.items() if not e.dirty][:excess]:
+            del self._entries[chat_id]
+
+    # === Invalidación entre réplicas ===
+
+    async def publish(self, redis: aioredis.Redis, chat_id: str, version: int) -> None:
+        message = {"chat_id": chat_id, "version": version, "replica": self.replica_id}
+        await redis.publish(INVALIDATION_CHANNEL, json.dumps(message))
+
+    def handle_message(self, data: bytes | str) -> None:
+        try:
+            message = json.loads(data)
+        except (ValueError, TypeError):
+            logger.warning("Invalid profile invalidation message: %r", data)
+            return
+        if message.get("replica") == self.replica_id:
+            return
+        chat_id = str(message.get("chat_id"))
+        if self.invalidate(chat_id, int(message.get("version") or 0)):
+            logger.debug("Profile %s invalidated by another replica", chat_id)
+
+    def start_listener(self, redis: aioredis.Redis) -> None:
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen(redis))
+
+    async def stop_listener(self) -> None:
+        if self._listener is None:
+            return
+        self._listener.cancel()
+        await asyncio.gather(self._listener, return_exceptions=True)
+        self._listener = None
+
+    async def _listen(self, redis: aioredis.Redis) -> None:
+        while True:
+            try:
+                async with redis.pubsub() as pubsub:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    # Mensajes perdidos durante la desconexión: copias no fiables
+                    self._entries = OrderedDict(
+                        (c, e) for c, e in self._entries.items() if e.dirty
+                    )
+                    async for message in pubsub.listen():
+                        if message.get("type") == "message":
+                            self.handle_message(message["data"])
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(
+                    "Profile invalidation listener error: %s. Retrying in 5s...", e
+                )
+                await asyncio.sleep(5)
@@ -0,0 +1,82 @@
+import json
+import logging
+from typing import Any
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TIMELINE = "timeline"
+LEARNED_PREFERENCE = "learned_preference"
+HISTORY_KINDS = (TIMELINE, LEARNED_PREFERENCE)
+
+
+def _split(items: list[Any], window: int) -> tuple[list[Any], list[Any]]:
+    """(entradas que salen de la ventana, las `window` más recientes)."""
+    cut = max(len(items) - window, 0)
+    return items[:cut], items[cut:]
+
+
+def _trim(
+    profile: dict[str, Any], timeline_window: int, prefs_window: int
+) -> dict[str, list[Any]]:
+    archived: dict[str, list[Any]] = {}
+
+    overflow, profile[TIMELINE] = _split(profile.get(TIMELINE) or [], timeline_window)
+    archived[TIMELINE] = overflow
+    # path_traveled repite las entradas del timeline: se recorta sin archivar
+    evolution = profile.get("evolution") or {}
+    if evolution.get("path_traveled"):
+        _, evolution["path_traveled"] = _split(
+            evolution["path_traveled"], timeline_window
+        )
+
+    adaptation = profile.get("personality_adaptation") or {}
+    overflow, kept = _split(adaptation.get("learned_preferences") or [], prefs_window)
+    if "learned_preferences" in adaptation:
+        adaptation["learned_preferences"] = kept
+    archived[LEARNED_PREFERENCE] = overflow
+    return archived
+
+
+def bound_profile(
+    profile: dict[str, Any],
+    timeline_window: int | None = None,
+    prefs_window: int | None = None,
+    max_bytes: int | None = None,
+) -> dict[str, list[Any]]:
+    """
+    Acota el documento del perfil (in place): conserva las entradas más
+    recientes del timeline y de las preferencias aprendidas y, si el JSON
+    sigue superando `max_bytes`, reduce las ventanas a la mitad.
+
+    Retorna por tipo las entradas que salen del documento, para archivarlas.
+    """
+    timeline_window = (
+        settings.PROFILE_TIMELINE_WINDOW if timeline_window is None else timeline_window
+    )
+    prefs_window = (
+        settings.PROFILE_PREFERENCES_WINDOW if prefs_window is None else prefs_window
+    )
+    max_bytes = settings.PROFILE_MAX_BYTES if max_bytes is None else max_bytes
+
+    archived: dict[str, list[Any]] = {kind: [] for kind in HISTORY_KINDS}
+    while True:
+        # Cada pasada archiva entradas más recientes que la anterior
+        for kind, entries in _trim(profile, timeline_window, prefs_window).items():
+            archived[kind] += entries
+        if max_bytes <= 0:
+            break
+        size = len(json.dumps(profile, ensure_ascii=False).encode("utf-8"))
+        if size <= max_bytes:
+            break
+        if timeline_window == 0 and prefs_window == 0:
+            logger.warning(
+                "Profile is %d bytes (budget %d) with empty history windows",
+                size,
+                max_bytes,
+            )
+            break
+        timeline_window //= 2
+        prefs_window //= 2
+    return archived
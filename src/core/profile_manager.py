@@ -1,17 +1,23 @@
+import asyncio
 import json
 import logging
 from datetime import datetime
 from typing import Any
 
 from src.core import dependencies
+from src.core.config import settings
 from src.core.dependencies import get_sqlite_store
+from src.core.observability.prometheus_metrics import profile_cache_requests_total
+from src.core.profile_cache import ProfileCache, version_key
 from src.core.profile_context import get_personality_adaptation
 from src.core.profile_evolution import add_evolution_entry
+from src.core.profile_history import bound_profile
 from src.core.profile_localization import (
     update_localization_passive,
     update_location_from_user_input,
 )
 from src.core.profile_seeder import ensure_profile_complete, get_default_profile
+from src.core.turn_context import current_turn_context
 
 logger = logging.getLogger(__name__)
 
@@ -19,9 +25,16 @@ logger = logging.getLogger(__name__)
 class UserProfileManager:
     """
     Gestiona el perfil evolutivo y diskless del usuario.
+
+    Lecturas: L1 en proceso (ProfileCache) -> Redis -> SQLite. Escrituras
+    diferidas: `save_profile` actualiza L1 y `flush` escribe Redis y SQLite
+    una vez por turno, o el ciclo periódico para guardados fuera de turno.
     """
 
     def __init__(self) -> None:
+        self.cache = ProfileCache()
+        self._flush_lock = asyncio.Lock()
+        self._flusher: asyncio.Task | None = None
         logger.info("UserProfileManager initialized")
 
     def _redis_key(self, chat_id: str) -> str:
@@ -29,51 +42,158 @@ class UserProfileManager:
         return f"profile:{chat_id}"
 
     async def load_profile(self, chat_id: str) -> dict[str, Any]:
-        """Carga el perfil desde Redis o SQLite."""
-        if dependencies.redis_connection:
+        """Carga el perfil desde L1, Redis o SQLite."""
+        cached = self.cache.get(chat_id)
+        if cached is not None:
+            profile_cache_requests_total.labels("l1_hit").inc()
+            return cached
+
+        redis = dependencies.redis_connection
+        version = 0
+        if redis:
             key = self._redis_key(chat_id)
             try:
-                raw_data = await dependencies.redis_connection.get(key)
+                raw_data, raw_version = await redis.mget(key, version_key(chat_id))
+                version = int(raw_version or 0)
                 if raw_data:
                     if isinstance(raw_data, bytes):
                         raw_data = raw_data.decode("utf-8")
-                    return ensure_profile_complete(json.loads(raw_data))
+                    complete = ensure_profile_complete(json.loads(raw_data))
+                    self.cache.put(chat_id, complete, version)
+                    profile_cache_requests_total.labels("l2_hit").inc()
+                    return complete
             except Exception as e:
                 logger.error("Error Redis %s: %s", chat_id, e)
 
         try:
             store = get_sqlite_store()
             sqlite_profile = await store.load_profile(chat_id)
-            if sqlite_profile:
-                complete = ensure_profile_complete(sqlite_profile)
-                if dependencies.redis_connection:
-                    key = self._redis_key(chat_id)
-                    await dependencies.redis_connection.set(
-                        key, json.dumps(complete, ensure_ascii=False)
-                    )
-                return complete
         except Exception as e:
             logger.error("Error SQLite %s: %s", chat_id, e)
+            return get_default_profile()
 
-        return get_default_profile()
+        if not sqlite_profile:
+            # Usuario nuevo: el perfil por defecto también se cachea
+            profile_cache_requests_total.labels("miss").inc()
+            default = get_default_profile()
+            self.cache.put(chat_id, default, version)
+            return default
 
-    async def save_profile(self, chat_id: str, profile: dict[str, Any]) -> None:
-        """Guarda el perfil en Redis y SQLite."""
+        complete = ensure_profile_complete(sqlite_profile)
+        if redis:
+            try:
+                await redis.set(
+                    self._redis_key(chat_id), json.dumps(complete, ensure_ascii=False)
+                )
+            except Exception as e:
+                logger.error("Error Redis %s: %s", chat_id, e)
+        self.cache.put(chat_id, complete, version)
+        profile_cache_requests_total.labels("store_hit").inc()
+        return complete
+
+    async def save_profile(
+        self, chat_id: str, profile: dict[str, Any], immediate: bool = False
+    ) -> None:
+        """
+        Guarda el perfil en L1; Redis y SQLite se escriben en el siguiente
+        flush (o ya, con `immediate`). El documento se acota antes: el
+        historial que sale de las ventanas se archiva en `profile_history`.
+        """
         profile["metadata"]["last_updated"] = datetime.now().isoformat()
+        archived = bound_profile(profile)
+        self.cache.stage(chat_id, profile, archived)
+        ctx = current_turn_context()
+        if ctx is not None and ctx.chat_id == chat_id:
+            ctx.forget("profile")
+        if immediate:
+            await self.flush(chat_id)
+
+    async def flush(self, chat_id: str) -> bool:
+        """
+        Escribe el perfil pendiente de un chat en Redis y SQLite, incrementa
+        su versión y la publica. Retorna True si había algo que escribir.
+        """
+        async with self._flush_lock:
+            pending = self.cache.take(chat_id)
+            if pending is None:
+                return False
+
+            version = 0
+            redis_written = True
+            redis = dependencies.redis_connection
+            if redis:
+                try:
+                    async with redis.pipeline(transaction=True) as pipe:
+                        pipe.set(self._redis_key(chat_id), pending.payload)
+                        pipe.incr(version_key(chat_id))
+                        _, version = await pipe.execute()
+                    await self.cache.publish(redis, chat_id, version)
+                except Exception as e:
+                    logger.error("Error save Redis %s: %s", chat_id, e)
+                    redis_written = False
 
-        if dependencies.redis_connection:
-            key = self._redis_key(chat_id)
             try:
-                payload = json.dumps(profile, ensure_ascii=False)
-                await dependencies.redis_connection.set(key, payload)
+                store = get_sqlite_store()
+                await store.save_profile(
+                    chat_id, json.loads(pending.payload), pending.archived
+                )
             except Exception as e:
-                logger.error("Error save Redis %s: %s", chat_id, e)
+                # Sigue sucio: el próximo flush reintenta con su historial
+                logger.error("Error save SQLite %s: %s", chat_id, e)
+                self.cache.restore(chat_id, pending)
+                return True
+
+            if not redis_written:
+                # SQLite ya tiene el perfil (y su historial), pero Redis y las
+                # demás réplicas sirven el anterior: sigue sucio y el próximo
+                # flush reintenta la escritura, la versión y la publicación
+                return True
+            self.cache.written(chat_id, pending, version)
+            return True
+
+    async def flush_all(self) -> int:
+        """Escribe todos los perfiles pendientes; retorna cuántos."""
+        flushed = 0
+        for chat_id in self.cache.dirty_ids():
+            flushed += await self.flush(chat_id)
+        return flushed
 
+    async def load_history(
+        self, chat_id: str, kind: str, limit: int = 50, before_id: int | None = None
+    ) -> list[dict[str, Any]]:
+        """Historial archivado del perfil ('timeline' | 'learned_preference')."""
         try:
             store = get_sqlite_store()
-            await store.save_profile(chat_id, profile)
+            return await store.load_profile_history(chat_id, kind, limit, before_id)
         except Exception as e:
-            logger.error("Error save SQLite %s: %s", chat_id, e)
+            logger.error("Error history %s: %s", chat_id, e)
+            return []
+
+    # --- Ciclo de vida ---
+
+    async def start(self) -> None:
+        """Arranca el flush periódico y la invalidación por pub/sub."""
+        if dependencies.redis_connection:
+            self.cache.start_listener(dependencies.redis_connection)
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Detiene el ciclo y escribe lo pendiente."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        await self.cache.stop_listener()
+        await self.flush_all()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.PROFILE_FLUSH_INTERVAL_SECONDS)
+            try:
+                await self.flush_all()
+            except Exception as e:
+                logger.error("Profile flush loop error: %s", e)
 
     # --- Métodos de Delegación ---
 
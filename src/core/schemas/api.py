@@ -254,3 +254,77 @@ class KnowledgeStatusResponse(BaseModel):
     total_chunks: int
     last_sync: str | None = None
     documents: list[KnowledgeDocumentStatus]
+
+
+class AnnRecallReport(BaseModel):
+    """Recall y latencia de un backend ANN frente a la búsqueda exacta."""
+
+    namespace: str
+    size: int
+    nlist: int | None = None
+    nprobe: int | None = None
+    pq_m: int | None = None
+    k: int | None = None
+    samples: int | None = None
+    recall_at_k: float | None = None
+    exact_ms_avg: float | None = None
+    ann_ms_avg: float | None = None
+
+
+class AnnRecallResponse(BaseModel):
+    """Respuesta del endpoint de diagnóstico ANN."""
+
+    backends: list[AnnRecallReport]
+
+
+class DatabaseStats(BaseModel):
+    """Filas, tamaño y fragmentación de la base SQLite."""
+
+    memories: int
+    inactive_memories: int
+    vectors: int
+    fts_rows: int
+    page_size: int
+    page_count: int
+    freelist_count: int
+    db_bytes: int
+    free_bytes: int
+    fragmentation: float
+    auto_vacuum: str
+
+
+class CompactionReport(BaseModel):
+    """Resultado de una pasada de compactación."""
+
+    before: DatabaseStats
+    after: DatabaseStats
+    deleted_memories: int
+    deleted_orphans: int
+    vacuumed_pages: int
+    duration_ms: float
+    finished_at: str
+
+
+class CompactionStatusResponse(BaseModel):
+    """Respuesta del endpoint de diagnóstico de compactación."""
+
+    current: DatabaseStats
+    last_run: CompactionReport | None = None
+
+
+class SQLiteStatementStats(BaseModel):
+    """Tiempos acumulados de una sentencia SQL normalizada."""
+
+    statement: str
+    calls: int
+    total_ms: float
+    mean_ms: float
+    max_ms: float
+    slow_calls: int
+
+
+class SQLiteStatsResponse(BaseModel):
+    """Respuesta del endpoint de diagnóstico de sentencias SQLite."""
+
+    slow_query_ms: float
+    statements: list[SQLiteStatementStats]
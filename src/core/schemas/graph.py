@@ -1,8 +1,10 @@
-from typing import Any, Literal, TypedDict
+from typing import Any, Literal, NotRequired, TypedDict
 from uuid import UUID, uuid4
 
 from pydantic import BaseModel, Field
 
+from src.core.turn_context import TurnContext
+
 
 class CanonicalEventV1(BaseModel):
     """
@@ -49,6 +51,8 @@ class GraphStateV2(TypedDict):
     error_message: str | None
     session_id: str
     conversation_history: list[V2ChatMessage]
+    # Memoización por turno (perfil, bóveda, RAG...); ver src/core/turn_context.py
+    turn_context: NotRequired[TurnContext]
 
 
 class GenericMessageEvent(BaseModel):
@@ -0,0 +1,144 @@
+"""
+Contexto de un turno.
+
+`process_event_task` crea un TurnContext por mensaje y lo lleva en
+`GraphStateV2["turn_context"]`; los nodos lo activan con `turn_scope` y las
+herramientas, el prompt builder y el buffer de memoria lo obtienen con
+`turn_context_for`. Perfil, bóveda, resumen, hitos y resultados RAG se cargan
+como mucho una vez por turno aunque el grafo encadene especialistas.
+
+Los valores memoizados son de solo lectura. Guardar el perfil del chat
+descarta el memoizado (ver UserProfileManager.save_profile).
+"""
+
+import asyncio
+import functools
+import logging
+from collections.abc import Awaitable, Callable, Hashable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, TypeVar, cast
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# (namespace, user_id, límite), como en VectorMemoryManager.retrieve_context_multi
+Scope = tuple[str, str, int]
+
+
+class TurnContext:
+    """Memoización perezosa de los datos que consultan los nodos de un turno."""
+
+    def __init__(self, chat_id: str) -> None:
+        self.chat_id = chat_id
+        self._memo: dict[Hashable, asyncio.Future[Any]] = {}
+        # (consulta, namespace, user_id) -> (límite pedido, resultados)
+        self._retrievals: dict[tuple[str, str, str], tuple[int, list[Any]]] = {}
+        self._retrieval_lock = asyncio.Lock()
+
+    async def _once(self, key: Hashable, load: Callable[[], Awaitable[T]]) -> T:
+        """Una sola carga por clave; los llamadores concurrentes la comparten."""
+        future = self._memo.get(key)
+        if future is None:
+            future = self._memo[key] = asyncio.ensure_future(load())
+        try:
+            return cast(T, await asyncio.shield(future))
+        except Exception:
+            # Un fallo no se memoiza: el siguiente llamador reintenta
+            if self._memo.get(key) is future:
+                del self._memo[key]
+            raise
+
+    def forget(self, key: Hashable) -> None:
+        self._memo.pop(key, None)
+
+    async def profile(self) -> dict[str, Any]:
+        from src.core.profile_manager import user_profile_manager
+
+        return await self._once(
+            "profile",
+            functools.partial(user_profile_manager.load_profile, self.chat_id),
+        )
+
+    async def knowledge(self) -> dict[str, Any]:
+        from src.memory.knowledge_base import knowledge_base_manager
+
+        return await self._once(
+            "knowledge",
+            functools.partial(knowledge_base_manager.load_knowledge, self.chat_id),
+        )
+
+    async def summary(self) -> Any:
+        """MemorySummaryV1 de long_term_memory."""
+        from src.memory.long_term_memory import long_term_memory
+
+        return await self._once(
+            "summary", functools.partial(long_term_memory.get_summary, self.chat_id)
+        )
+
+    async def milestones(self, limit: int = 3) -> list[dict[str, Any]]:
+        from src.core.dependencies import get_sqlite_store
+
+        store = get_sqlite_store()
+        return await self._once(
+            ("milestones", limit),
+            functools.partial(
+                store.state_repo.get_recent_milestones, self.chat_id, limit=limit
+            ),
+        )
+
+    async def retrieve(self, query: str, scopes: list[Scope]) -> list[list[Any]]:
+        """
+        Resultados RAG por ámbito. Un ámbito ya consultado con la misma
+        consulta y un límite mayor o igual se sirve recortando; los demás se
+        piden juntos (un solo embedding de la consulta).
+        """
+        from src.core.dependencies import get_vector_memory_manager
+
+        async with self._retrieval_lock:
+            missing = [
+                scope
+                for scope in scopes
+                if self._retrievals.get((query, scope[0], scope[1]), (-1, []))[0]
+                < scope[2]
+            ]
+            if missing:
+                manager = get_vector_memory_manager()
+                fetched = await manager.retrieve_context_multi(query, missing)
+                for (namespace, user_id, limit), results in zip(
+                    missing, fetched, strict=True
+                ):
+                    self._retrievals[query, namespace, user_id] = (limit, results)
+            return [
+                list(self._retrievals[query, namespace, user_id][1][:limit])
+                for namespace, user_id, limit in scopes
+            ]
+
+
+_current: ContextVar[TurnContext | None] = ContextVar("turn_context", default=None)
+
+
+def current_turn_context() -> TurnContext | None:
+    return _current.get()
+
+
+def turn_context_for(chat_id: str) -> TurnContext:
+    """El contexto del turno activo, o uno propio (sin compartir) fuera de él."""
+    ctx = _current.get()
+    if ctx is not None and ctx.chat_id == chat_id:
+        return ctx
+    return TurnContext(chat_id)
+
+
+@contextmanager
+def turn_scope(ctx: TurnContext | None) -> Iterator[TurnContext | None]:
+    """Activa `ctx` para el código que corre dentro del bloque."""
+    if ctx is None:
+        yield None
+        return
+    token = _current.set(ctx)
+    try:
+        yield ctx
+    finally:
+        _current.reset(token)
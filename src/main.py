@@ -1,6 +1,7 @@
 import asyncio
+import contextlib
 import logging
-from collections.abc import AsyncGenerator, Callable
+from collections.abc import AsyncGenerator, Awaitable, Callable
 from contextlib import asynccontextmanager
 from typing import Any
 
@@ -22,12 +23,40 @@ from src.core.middleware import CorrelationIdMiddleware  # noqa: E402
 logger = logging.getLogger(settings.APP_NAME)
 
 
+async def _bootstrap_knowledge() -> None:
+    """Migraciones y carga del conocimiento global en segundo plano."""
+    from src.core.dependencies import get_sqlite_store, get_vector_memory_manager
+    from src.memory.global_knowledge_loader import global_knowledge_loader
+    from src.memory.vector_migration import migrate_legacy_vectors
+
+    async def _quantize() -> None:
+        # La migración de dimensión ya rellena y activa la cuantización
+        manager = get_vector_memory_manager()
+        if not await manager.migrate_embedding_dimension():
+            await manager.enable_quantization()
+
+    # Vectores legados primero: el índice global se carga al final.
+    # Cada paso es independiente: un fallo no omite los siguientes.
+    steps: list[tuple[str, Callable[[], Awaitable[Any]]]] = [
+        ("legacy vector migration", lambda: migrate_legacy_vectors(get_sqlite_store())),
+        ("embedding quantization", _quantize),
+        ("global knowledge bootstrap", global_knowledge_loader.check_and_bootstrap),
+        ("ANN backends", lambda: get_vector_memory_manager().start_ann_backends()),
+    ]
+    for name, step in steps:
+        try:
+            await step()
+        except Exception:
+            logger.exception("Knowledge bootstrap step failed: %s", name)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator:
     """Ciclo de vida asíncrono."""
     logger.info(">>> Arrancando lifespan...")
 
     from src.core.dependencies import (
+        get_vector_memory_manager,
         initialize_global_resources,
         prime_dependencies,
         shutdown_global_resources,
@@ -49,24 +78,36 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
 
         from src.memory.global_knowledge_loader import global_knowledge_loader
 
-        asyncio.create_task(global_knowledge_loader.check_and_bootstrap())
+        app.state.bootstrap_task = asyncio.create_task(_bootstrap_knowledge())
 
         from src.core.messaging.life_reviewer_worker import life_reviewer_worker
         from src.core.messaging.proactive_worker import proactive_worker
+        from src.core.profile_manager import user_profile_manager
+        from src.memory.compaction import memory_compactor
         from src.memory.knowledge_watcher import KnowledgeWatcher
 
         watcher = KnowledgeWatcher(global_knowledge_loader)
         await watcher.start()
 
+        await user_profile_manager.start()
         await proactive_worker.start()
         await life_reviewer_worker.start()
+        if settings.COMPACTION_ENABLED:
+            await memory_compactor.start()
 
         logger.info("Arranque completado.")
         yield
 
+        await memory_compactor.stop()
         await life_reviewer_worker.stop()
         await proactive_worker.stop()
+        await user_profile_manager.stop()
         await watcher.stop()
+        bootstrap = app.state.bootstrap_task
+        bootstrap.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await bootstrap
+        await get_vector_memory_manager().stop_ann_backends()
         await shutdown_global_resources()
 
     except Exception as e:
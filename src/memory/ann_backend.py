@@ -0,0 +1,240 @@
+# src/memory/ann_backend.py
+"""
+Backend ANN (IVF) enchufable en VectorSearch, uno por namespace.
+
+Construye un `IVFIndex` desde `memory_embeddings`, lo persiste junto a la DB
+(`<dir_db>/ann/<namespace>.ivf.npz`), añade vectores nuevos de forma
+incremental y reentrena cuando el corpus crece más allá de `retrain_ratio`.
+`measure_recall` compara contra la búsqueda exacta de sqlite-vec para elegir
+`nprobe`/PQ por namespace.
+"""
+
+import asyncio
+import contextlib
+import logging
+import struct
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from src.memory.ivf_index import IVFIndex
+from src.memory.sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+
+class IVFBackend:
+    """Mantiene un índice IVF sincronizado con SQLite para un namespace."""
+
+    def __init__(
+        self,
+        store: SQLiteStore,
+        namespace: str,
+        nlist: int = 0,
+        nprobe: int = 8,
+        pq_m: int = 0,
+        retrain_ratio: float = 0.5,
+        index_dir: str | None = None,
+    ) -> None:
+        self.store = store
+        self.namespace = namespace
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.pq_m = pq_m
+        self.retrain_ratio = retrain_ratio
+        base = Path(index_dir) if index_dir else Path(store.db_path).parent / "ann"
+        self.path = base / f"{namespace}.ivf.npz"
+        self.index: IVFIndex | None = None
+        self._last_id = 0
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.index is not None and self.index.is_trained
+
+    async def load_or_build(self) -> None:
+        """Carga el índice persistido y lo pone al día, o lo entrena desde cero."""
+        if self.path.exists():
+            try:
+                index = await asyncio.to_thread(IVFIndex.load, self.path)
+                self.index = index
+                self._last_id = int(index.ids.max()) if index.ids.size else 0
+                await self.sync()
+                return
+            except Exception as e:
+                logger.warning("IVF index %s unreadable, rebuilding: %s", self.path, e)
+        await self.build()
+
+    async def build(self) -> int:
+        """Entrena (o reentrena) sobre todos los vectores activos del namespace."""
+        async with self._lock:
+            ids, vectors, chats = await self._fetch_rows(0)
+            if not ids.size:
+                self.index = None
+                return 0
+            index = IVFIndex(nlist=self.nlist, pq_m=self.pq_m)
+            await asyncio.to_thread(index.train, ids, vectors, chats)
+            self.index = index
+            self._last_id = int(ids.max())
+            await asyncio.to_thread(index.save, self.path)
+            logger.info(
+                "IVF index trained for %s: %d vectors, %d lists",
+                self.namespace,
+                len(index),
+                index.centroids.shape[0],
+            )
+            return len(index)
+
+    async def sync(self) -> int:
+        """Añade vectores nuevos, quita los desactivados y reentrena si toca."""
+        if self.index is None:
+            return await self.build()
+        async with self._lock:
+            index = self.index
+            ids, vectors, chats = await self._fetch_rows(self._last_id)
+            if ids.size:
+                await asyncio.to_thread(index.add, ids, vectors, chats)
+                self._last_id = int(ids.max())
+            removed = index.remove(await self._inactive_ids())
+            grown = len(index) - index.trained_size
+            needs_retrain = grown > self.retrain_ratio * max(index.trained_size, 1)
+            if ids.size or removed:
+                await asyncio.to_thread(index.save, self.path)
+        if needs_retrain:
+            logger.info(
+                "IVF index for %s grew %d vectors; retraining", self.namespace, grown
+            )
+            await self.build()
+        return int(ids.size)
+
+    async def search(
+        self, query_embedding: list[float], limit: int, chat_id: str | None = None
+    ) -> list[tuple[int, float]]:
+        index = self.index
+        if index is None or not query_embedding:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        return await asyncio.to_thread(index.search, query, limit, self.nprobe, chat_id)
+
+    async def measure_recall(self, k: int = 10, samples: int = 50) -> dict[str, Any]:
+        """
+        recall@k del índice frente a la KNN exacta de sqlite-vec, usando
+        vectores almacenados como consultas. Incluye latencias medias.
+        """
+        index = self.index
+        if index is None or not len(index):
+            return {"namespace": self.namespace, "size": 0}
+
+        alive_ids = index.ids[index.alive]
+        rng = np.random.default_rng(0)
+        sample = rng.choice(alive_ids, min(samples, alive_ids.size), replace=False)
+        queries = await self._fetch_vectors([int(i) for i in sample])
+
+        hits, exact_ms, ann_ms = 0.0, 0.0, 0.0
+        for query in queries:
+            t0 = time.perf_counter()
+            exact = await self._exact_search(query, k)
+            t1 = time.perf_counter()
+            approx = await self.search(query, k)
+            t2 = time.perf_counter()
+            exact_ms += (t1 - t0) * 1000
+            ann_ms += (t2 - t1) * 1000
+            if exact:
+                truth = {mid for mid, _ in exact}
+                hits += len(truth & {mid for mid, _ in approx}) / len(truth)
+
+        n = max(len(queries), 1)
+        return {
+            "namespace": self.namespace,
+            "size": len(index),
+            "nlist": int(index.centroids.shape[0]),
+            "nprobe": self.nprobe,
+            "pq_m": self.pq_m,
+            "k": k,
+            "samples": len(queries),
+            "recall_at_k": round(hits / n, 4),
+            "exact_ms_avg": round(exact_ms / n, 2),
+            "ann_ms_avg": round(ann_ms / n, 2),
+        }
+
+    # === Mantenimiento periódico ===
+
+    async def start(self, interval_seconds: int = 300) -> None:
+        await self.load_or_build()
+        self._task = asyncio.create_task(self._loop(interval_seconds))
+        logger.info(
+            "IVF backend for %s started (sync: %ds)", self.namespace, interval_seconds
+        )
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _loop(self, interval_seconds: int) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.error("IVF sync failed for %s: %s", self.namespace, e)
+
+    # === Acceso a SQLite ===
+
+    async def _fetch_rows(
+        self, after_id: int
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        async with (
+            self.store.reader() as db,
+            db.execute(
+                "SELECT memory_id, chat_id, embedding FROM memory_embeddings "
+                "WHERE namespace = ? AND is_active = 1 AND memory_id > ?",
+                (self.namespace, after_id),
+            ) as cursor,
+        ):
+            rows = await cursor.fetchall()
+        if not rows:
+            return np.empty(0, np.int64), np.empty((0, 0), np.float32), np.empty(0, str)
+        ids = np.array([r[0] for r in rows], dtype=np.int64)
+        chats = np.array([r[1] or "" for r in rows], dtype=str)
+        vectors = np.vstack([np.frombuffer(r[2], dtype=np.float32) for r in rows])
+        return ids, vectors, chats
+
+    async def _fetch_vectors(self, ids: list[int]) -> list[list[float]]:
+        marks = ",".join(["?"] * len(ids))
+        sql = f"SELECT embedding FROM memory_embeddings WHERE memory_id IN ({marks})"  # noqa: S608
+        async with self.store.reader() as db, db.execute(sql, ids) as cursor:
+            return [
+                np.frombuffer(r[0], dtype=np.float32).tolist()
+                for r in await cursor.fetchall()
+            ]
+
+    async def _inactive_ids(self) -> list[int]:
+        async with (
+            self.store.reader() as db,
+            db.execute(
+                "SELECT id FROM memories WHERE namespace = ? AND is_active = 0 "
+                "AND id <= ?",
+                (self.namespace, self._last_id),
+            ) as cursor,
+        ):
+            return [int(r[0]) for r in await cursor.fetchall()]
+
+    async def _exact_search(
+        self, query: list[float], k: int
+    ) -> list[tuple[int, float]]:
+        blob = struct.pack(f"{len(query)}f", *query)
+        async with (
+            self.store.reader() as db,
+            db.execute(
+                "SELECT memory_id, distance FROM memory_embeddings "
+                "WHERE embedding MATCH ? AND k = ? AND namespace = ? AND is_active = 1",
+                (blob, k, self.namespace),
+            ) as cursor,
+        ):
+            return [(int(r[0]), float(r[1])) for r in await cursor.fetchall()]
@@ -41,9 +41,8 @@ class CloudBackupManager:
 
         try:
             # 1. Snapshot
-            db = await self.store.get_db()
-            # SQLite VACUUM INTO
-            await db.execute(f"VACUUM INTO '{snapshot_path}'")  # noqa: S608
+            # SQLite VACUUM INTO en conexión propia (no bloquea al escritor)
+            await self.store.snapshot(str(snapshot_path))
             logger.info("Snapshot created at %s", snapshot_path)
 
             # 2. Comprimir
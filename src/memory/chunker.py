@@ -4,9 +4,15 @@ Recursive text chunker for memory ingestion.
 
 Divide texto en fragmentos óptimos de 400 tokens con overlap de 80,
 utilizando divisiones naturales (párrafos → oraciones → palabras).
+
+El documento se tokeniza una sola vez: los cortes se eligen sobre offsets de
+tokens (prefiriendo el separador de mayor prioridad dentro de la ventana) y
+se traducen a offsets de caracteres exactos. Los chunks se generan en
+streaming, sin materializar la lista completa.
 """
 
 import logging
+from collections.abc import Callable, Iterator
 from dataclasses import dataclass
 
 import tiktoken
@@ -29,6 +35,9 @@ class RecursiveChunker:
     Chunker recursivo que divide texto en fragmentos optimizados para embeddings.
     """
 
+    # Subir al cambiar el algoritmo de corte: invalida el manifiesto de ingesta
+    VERSION = 3
+
     def __init__(
         self,
         chunk_size: int = 400,
@@ -52,136 +61,124 @@ class RecursiveChunker:
             "",  # Caracteres
         ]
 
+    @property
+    def version(self) -> str:
+        """Identifica algoritmo y parámetros: otro valor produce otros chunks."""
+        sizes = f"{self.chunk_size}/{self.chunk_overlap}"
+        return f"{self.VERSION}:{sizes}:{self.encoding.name}"
+
     def count_tokens(self, text: str) -> int:
         """Cuenta tokens usando tiktoken."""
         return len(self.encoding.encode(text))
 
-    def _create_chunk(self, content: str, metadata: dict) -> Chunk:
-        """Crea un objeto Chunk con metadatos."""
-        return Chunk(
-            content=content,
-            start_index=0,  # TODO: calcular índices reales
-            end_index=len(content),
-            metadata={
-                **metadata,
-                "tokens": self.count_tokens(content),
-            },
-        )
-
-    def _calculate_overlap(self, current_chunk: list[str]) -> tuple[list[str], int]:
-        """Calcula el overlap para el siguiente chunk."""
-        overlap_chunks: list[str] = []
-        overlap_tokens = 0
-
-        # Tomar los últimos elementos hasta completar el overlap
-        for i in range(len(current_chunk) - 1, -1, -1):
-            piece = current_chunk[i]
-            piece_tokens = self.count_tokens(piece)
-
-            if overlap_tokens + piece_tokens <= self.chunk_overlap:
-                overlap_chunks.insert(0, piece)
-                overlap_tokens += piece_tokens
-            else:
-                break
-        return overlap_chunks, overlap_tokens
-
     def chunk(self, text: str, metadata: dict | None = None) -> list[Chunk]:
         """
         Divide el texto en chunks recursivamente.
         """
+        chunks = list(self.iter_chunks(text, metadata))
+        if chunks:
+            total_tokens = sum(c.metadata["tokens"] for c in chunks)
+            logger.info(
+                "Chunked text into %d chunks (avg %.0f tokens/chunk)",
+                len(chunks),
+                total_tokens / len(chunks),
+            )
+        return chunks
+
+    def iter_chunks(self, text: str, metadata: dict | None = None) -> Iterator[Chunk]:
+        """
+        Genera los chunks en orden, en una sola pasada sobre los tokens.
+
+        Cada chunk ocupa como máximo `chunk_size` tokens y termina en el
+        separador de mayor prioridad disponible en la segunda mitad de su
+        ventana; el siguiente retrocede hasta `chunk_overlap` tokens, alineado
+        a un límite de palabra.
+        """
         if not text or not text.strip():
-            return []
+            return
 
         metadata = metadata or {}
-        chunks = []
-        splits = self._recursive_split(text)
-
-        current_chunk: list[str] = []
-        current_length = 0
-
-        for split in splits:
-            split_tokens = self.count_tokens(split)
-
-            # Si el split solo ya excede el tamaño
-            if split_tokens > self.chunk_size:
-                if current_chunk:
-                    chunks.append(self._create_chunk("".join(current_chunk), metadata))
-                    current_chunk = []
-                    current_length = 0
-
-                # Añadir split grande como chunk individual
-                # Usamos _create_chunk pero marcamos oversized en metadata
-                large_chunk = self._create_chunk(split, metadata)
-                large_chunk.metadata["oversized"] = True
-                chunks.append(large_chunk)
-                continue
-
-            # Si añadir este split excede el límite
-            if current_length + split_tokens > self.chunk_size:
-                chunks.append(self._create_chunk("".join(current_chunk), metadata))
-
-                # Iniciar nuevo chunk con overlap
-                current_chunk, current_length = self._calculate_overlap(current_chunk)
-
-            # Añadir split al chunk actual
-            current_chunk.append(split)
-            current_length += split_tokens
-
-        if current_chunk:
-            chunks.append(self._create_chunk("".join(current_chunk), metadata))
-
-        total_tokens = sum(c.metadata["tokens"] for c in chunks)
-        avg_tokens = total_tokens / len(chunks) if chunks else 0
-        logger.info(
-            "Chunked text into %d chunks (avg %.0f tokens/chunk)",
-            len(chunks),
-            avg_tokens,
-        )
-
-        return chunks
+        tokens = self.encoding.encode_ordinary(text)
+        _, offsets = self.encoding.decode_with_offsets(tokens)
+        n = len(tokens)
+
+        def char_at(i: int) -> int:
+            return offsets[i] if i < n else len(text)
+
+        start = 0
+        while start < n:
+            end = self._find_cut(text, char_at, start, min(start + self.chunk_size, n))
+            first, last = char_at(start), char_at(end)
+            content = text[first:last]
+            if content.strip():
+                yield Chunk(
+                    content=content,
+                    start_index=first,
+                    end_index=last,
+                    metadata={
+                        **metadata,
+                        "tokens": end - start,
+                        "start_index": first,
+                        "end_index": last,
+                    },
+                )
+            if end >= n:
+                break
+            start = self._overlap_start(text, char_at, start, end)
 
-    def _recursive_split(self, text: str, separator_index: int = 0) -> list[str]:
+    def _find_cut(
+        self, text: str, char_at: Callable[[int], int], start: int, limit: int
+    ) -> int:
+        """
+        Token donde cortar la ventana [start, limit]: el último límite del
+        separador de mayor prioridad en la segunda mitad; si no hay ninguno,
+        un corte duro en `limit`.
         """
-        Divide texto recursivamente usando separadores en orden de prioridad.
+        if char_at(limit) >= len(text):
+            return limit
+        floor = start + max(1, (limit - start) // 2)
+        best_level, best_cut = len(self.separators), limit
+        for cut in range(limit, floor - 1, -1):
+            level = self._boundary_level(text, char_at(cut), best_level)
+            if level < best_level:
+                best_level, best_cut = level, cut
+                if level == 0:
+                    break
+        return best_cut
+
+    def _overlap_start(
+        self, text: str, char_at: Callable[[int], int], start: int, end: int
+    ) -> int:
         """
-        if separator_index >= len(self.separators):
-            return [text] if text else []
-
-        separator = self.separators[separator_index]
-
-        # Si no hay separador (último recurso), dividir por caracteres
-        if separator == "":
-            splits = []
-            current = ""
-            for char in text:
-                current += char
-                if self.count_tokens(current) >= self.chunk_size:
-                    splits.append(current)
-                    current = ""
-            if current:
-                splits.append(current)
-            return splits
-
-        # Dividir por el separador actual
-        splits = text.split(separator)
-
-        # Re-añadir el separador excepto al final
-        if separator:
-            splits = [
-                split + separator if i < len(splits) - 1 else split
-                for i, split in enumerate(splits)
-            ]
-
-        # Procesar cada split
-        result = []
-        for split in splits:
-            if not split:
-                continue
-
-            # Si el split es demasiado grande, dividirlo recursivamente
-            if self.count_tokens(split) > self.chunk_size:
-                result.extend(self._recursive_split(split, separator_index + 1))
-            else:
-                result.append(split)
-
-        return result
+        Inicio del siguiente chunk: primer límite de palabra en el overlap.
+        El overlap no pasa de la mitad del chunk, así cada paso avanza al
+        menos media ventana aunque `chunk_overlap >= chunk_size`.
+        """
+        word_level = self.separators.index(" ")
+        overlap = min(self.chunk_overlap, (end - start) // 2)
+        for candidate in range(max(start + 1, end - overlap), end):
+            if self._boundary_level(text, char_at(candidate), word_level + 1) <= (
+                word_level
+            ):
+                return candidate
+        return end
+
+    def _boundary_level(self, text: str, pos: int, worse_than: int) -> int:
+        """
+        Prioridad del separador que termina en `pos` (0 = párrafo); solo
+        evalúa los mejores que `worse_than`. Los tokens de tiktoken llevan el
+        espacio inicial, por eso ". " también vale cortando antes del espacio.
+        """
+        for level, sep in enumerate(self.separators[:worse_than]):
+            if not sep:
+                break
+            if text.endswith(sep, 0, pos):
+                return level
+            stem = sep.rstrip(" ")
+            if (
+                stem != sep
+                and text.startswith(" ", pos)
+                and text.endswith(stem, 0, pos)
+            ):
+                return level
+        return worse_than
@@ -0,0 +1,280 @@
+# src/memory/compaction.py
+"""
+Compactación de memorias borradas de forma suave.
+
+`soft_delete_memories` solo marca `is_active = 0`: las filas siguen en
+`memories`, `memories_fts`, `memory_embeddings` (y tablas cuantizadas) y el
+KNN las sigue recorriendo. El compactador las borra físicamente en lotes
+(los triggers propagan el borrado a FTS, vec0 y al mapeo legado), barre los
+vectores huérfanos, ejecuta `optimize` de FTS5 y devuelve páginas libres al
+sistema con `incremental_vacuum`, acotado en páginas y tiempo.
+
+`incremental_vacuum` requiere `auto_vacuum = INCREMENTAL`. Las bases nuevas
+lo fijan en `init_db`; las existentes se convierten con un VACUUM completo
+solo si caben en el presupuesto de tamaño.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import functools
+import logging
+import time
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any
+
+from src.core.config import settings
+
+if TYPE_CHECKING:
+    import aiosqlite
+
+    from src.memory.sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+_AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+# Páginas liberadas por intención del escritor
+_VACUUM_STEP_PAGES = 256
+
+
+async def _scalar(db: aiosqlite.Connection, sql: str) -> int:
+    async with db.execute(sql) as cursor:
+        row = await cursor.fetchone()
+        return int(row[0] or 0) if row else 0
+
+
+async def collect_stats(db: aiosqlite.Connection) -> dict[str, Any]:
+    """Filas, tamaño y fragmentación (páginas libres / totales) de la base."""
+    async with db.execute(
+        "SELECT COUNT(*), COALESCE(SUM(is_active = 0), 0) FROM memories"
+    ) as cursor:
+        row = await cursor.fetchone()
+    memories, inactive = (int(row[0]), int(row[1])) if row else (0, 0)
+    page_size = await _scalar(db, "PRAGMA page_size")
+    page_count = await _scalar(db, "PRAGMA page_count")
+    freelist = await _scalar(db, "PRAGMA freelist_count")
+    auto_vacuum = await _scalar(db, "PRAGMA auto_vacuum")
+    return {
+        "memories": memories,
+        "inactive_memories": inactive,
+        "vectors": await _scalar(db, "SELECT COUNT(*) FROM memory_embeddings"),
+        "fts_rows": await _scalar(db, "SELECT COUNT(*) FROM memories_fts_docsize"),
+        "page_size": page_size,
+        "page_count": page_count,
+        "freelist_count": freelist,
+        "db_bytes": page_size * page_count,
+        "free_bytes": page_size * freelist,
+        "fragmentation": round(freelist / page_count, 4) if page_count else 0.0,
+        "auto_vacuum": _AUTO_VACUUM_MODES.get(auto_vacuum, str(auto_vacuum)),
+    }
+
+
+async def _delete_inactive_batch(db: aiosqlite.Connection, batch_size: int) -> int:
+    """Borra un lote de memorias inactivas; los triggers limpian FTS y vec0."""
+    async with db.execute(
+        "SELECT id FROM memories WHERE is_active = 0 ORDER BY id LIMIT ?",
+        (batch_size,),
+    ) as cursor:
+        ids = [int(r[0]) for r in await cursor.fetchall()]
+    if not ids:
+        return 0
+    marks = ",".join(["?"] * len(ids))
+    # El mapeo legado también cae por ON DELETE CASCADE; explícito por si la
+    # base se creó sin claves foráneas
+    await db.execute(
+        f"DELETE FROM vector_memory_map WHERE memory_id IN ({marks})",  # noqa: S608
+        ids,
+    )
+    await db.execute(f"DELETE FROM memories WHERE id IN ({marks})", ids)  # noqa: S608
+    return len(ids)
+
+
+async def _delete_orphans(db: aiosqlite.Connection) -> int:
+    """Vectores y mapeos cuya memoria ya no existe."""
+    from src.memory.vector_quantization import QUANTIZATION_MODES, quantized_table
+
+    cursor = await db.execute(
+        "DELETE FROM vector_memory_map WHERE memory_id NOT IN (SELECT id FROM memories)"
+    )
+    removed = max(cursor.rowcount, 0)
+    async with db.execute(
+        "SELECT rowid FROM memory_vectors "
+        "WHERE rowid NOT IN (SELECT vector_id FROM vector_memory_map)"
+    ) as cursor:
+        legacy = [(int(r[0]),) for r in await cursor.fetchall()]
+    await db.executemany("DELETE FROM memory_vectors WHERE rowid = ?", legacy)
+    removed += len(legacy)
+
+    tables = ["memory_embeddings"]
+    for mode in QUANTIZATION_MODES:
+        table = quantized_table(mode)
+        async with db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ) as cursor:
+            if await cursor.fetchone() is not None:
+                tables.append(table)
+    for table in tables:
+        async with db.execute(
+            f"SELECT memory_id FROM {table} "  # noqa: S608
+            "WHERE memory_id NOT IN (SELECT id FROM memories)"
+        ) as cursor:
+            ids = [(int(r[0]),) for r in await cursor.fetchall()]
+        # vec0 resuelve `memory_id = ?` como lectura puntual
+        await db.executemany(f"DELETE FROM {table} WHERE memory_id = ?", ids)  # noqa: S608
+        removed += len(ids)
+    return removed
+
+
+async def _optimize_fts(db: aiosqlite.Connection) -> None:
+    await db.execute("INSERT INTO memories_fts(memories_fts) VALUES('optimize')")
+
+
+async def _vacuum_step(db: aiosqlite.Connection) -> int:
+    """
+    Libera hasta `_VACUUM_STEP_PAGES` páginas; retorna las liberadas. Sin
+    auto_vacuum incremental la pragma no hace nada.
+    """
+    before = await _scalar(db, "PRAGMA freelist_count")
+    if not before:
+        return 0
+    # Cada paso del cursor libera una página: hay que consumirlo entero
+    async with db.execute(f"PRAGMA incremental_vacuum({_VACUUM_STEP_PAGES})") as c:
+        await c.fetchall()
+    return before - await _scalar(db, "PRAGMA freelist_count")
+
+
+class MemoryCompactor:
+    """Borrado físico periódico de memorias inactivas y vectores huérfanos."""
+
+    def __init__(
+        self,
+        store: SQLiteStore | None = None,
+        interval_hours: float | None = None,
+        batch_size: int | None = None,
+        vacuum_max_mb: int | None = None,
+        vacuum_seconds: float | None = None,
+    ) -> None:
+        self._store = store
+        self.interval_hours = interval_hours or settings.COMPACTION_INTERVAL_HOURS
+        self.batch_size = batch_size or settings.COMPACTION_BATCH_SIZE
+        self.vacuum_max_mb = (
+            settings.COMPACTION_VACUUM_MAX_MB
+            if vacuum_max_mb is None
+            else vacuum_max_mb
+        )
+        self.vacuum_seconds = (
+            settings.COMPACTION_VACUUM_SECONDS
+            if vacuum_seconds is None
+            else vacuum_seconds
+        )
+        self.last_report: dict[str, Any] | None = None
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def store(self) -> SQLiteStore:
+        if self._store is None:
+            from src.core.dependencies import get_sqlite_store
+
+            self._store = get_sqlite_store()
+        return self._store
+
+    async def stats(self) -> dict[str, Any]:
+        async with self.store.reader() as db:
+            return await collect_stats(db)
+
+    async def run_once(self) -> dict[str, Any]:
+        """Una pasada completa; retorna el informe con estadísticas antes/después."""
+        async with self._lock:
+            start = time.monotonic()
+            before = await self.stats()
+
+            deleted = 0
+            delete_batch = functools.partial(
+                _delete_inactive_batch, batch_size=self.batch_size
+            )
+            while batch := await self.store.run_in_writer(delete_batch):
+                deleted += batch
+            orphans = await self.store.run_in_writer(_delete_orphans)
+            if deleted or orphans:
+                await self.store.run_in_writer(_optimize_fts)
+
+            if before["auto_vacuum"] != "incremental":
+                await self._ensure_incremental(await self.stats())
+            vacuumed = await self._incremental_vacuum(before["page_size"])
+
+            report = {
+                "before": before,
+                "after": await self.stats(),
+                "deleted_memories": deleted,
+                "deleted_orphans": orphans,
+                "vacuumed_pages": vacuumed,
+                "duration_ms": round((time.monotonic() - start) * 1000, 1),
+                "finished_at": datetime.now(UTC).isoformat(),
+            }
+            self.last_report = report
+            logger.info(
+                "Compaction: %d memories, %d orphans deleted, %d pages vacuumed "
+                "(%.1fms)",
+                deleted,
+                orphans,
+                vacuumed,
+                report["duration_ms"],
+                extra={"event": "memory_compaction"},
+            )
+            return report
+
+    async def _ensure_incremental(self, stats: dict[str, Any]) -> None:
+        """
+        Convierte una base sin auto_vacuum a INCREMENTAL con un VACUUM
+        completo, solo si la base cabe en el presupuesto de tamaño.
+        """
+        if stats["auto_vacuum"] == "incremental" or not stats["freelist_count"]:
+            return
+        if stats["db_bytes"] > self.vacuum_max_mb * 1024 * 1024:
+            logger.info(
+                "Compaction: base de %d bytes sin auto_vacuum incremental; "
+                "supera el presupuesto para convertirla",
+                stats["db_bytes"],
+            )
+            return
+        await self.store.vacuum(auto_vacuum="INCREMENTAL")
+        logger.info("Compaction: base convertida a auto_vacuum incremental")
+
+    async def _incremental_vacuum(self, page_size: int) -> int:
+        """Libera páginas por pasos hasta agotar el presupuesto de páginas o tiempo."""
+        max_pages = self.vacuum_max_mb * 1024 * 1024 // max(page_size, 1)
+        deadline = time.monotonic() + self.vacuum_seconds
+        freed = 0
+        while freed < max_pages and time.monotonic() < deadline:
+            step = await self.store.run_in_writer(_vacuum_step)
+            if not step:
+                break
+            freed += step
+        return freed
+
+    # === Ejecución periódica ===
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._loop())
+        logger.info(f"MemoryCompactor ok ({self.interval_hours}h)")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        logger.info("MemoryCompactor detenido")
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_hours * 3600)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Error MemoryCompactor: {e}")
+
+
+memory_compactor = MemoryCompactor()
@@ -0,0 +1,156 @@
+# src/memory/embedding_cache.py
+"""
+Caché persistente de embeddings en dos niveles.
+
+L1: LRU acotado en proceso. L2: tabla `embedding_cache` de SQLite.
+Las claves combinan modelo, tipo de tarea y texto, de modo que cambiar de
+modelo nunca devuelve vectores de otro espacio.
+"""
+
+import hashlib
+import logging
+import struct
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from src.core.observability.prometheus_metrics import embedding_cache_requests_total
+
+if TYPE_CHECKING:
+    from src.memory.sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+_IN_BATCH = 500
+
+
+class EmbeddingCache:
+    """
+    Caché LRU en memoria delante de la tabla `embedding_cache`.
+
+    Política de expulsión: L1 es LRU estricto; L2 conserva como máximo
+    `max_rows` filas y expulsa las más antiguas (por `created_at`).
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        store: "SQLiteStore | None" = None,
+        l1_size: int = 2048,
+        max_rows: int = 50_000,
+    ) -> None:
+        self.model_name = model_name
+        self.store = store
+        self.l1_size = l1_size
+        self.max_rows = max_rows
+        self._l1: OrderedDict[str, list[float]] = OrderedDict()
+        self._writes_since_evict = 0
+        self.stats = {"l1_hit": 0, "l2_hit": 0, "miss": 0}
+
+    def key(self, text: str, task_type: str) -> str:
+        """Clave determinista: modelo + tipo de tarea + texto exacto."""
+        raw = f"{self.model_name}\x00{task_type}\x00{text}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        """Resuelve claves en L1 y luego en L2; las ausentes cuentan como miss."""
+        found: dict[str, list[float]] = {}
+        pending: list[str] = []
+        for k in keys:
+            vector = self._l1.get(k)
+            if vector is not None:
+                self._l1.move_to_end(k)
+                found[k] = vector
+            else:
+                pending.append(k)
+        self._record("l1_hit", len(found))
+
+        if pending and self.store is not None:
+            l2 = await self._load_l2(pending)
+            for k, vector in l2.items():
+                self._remember(k, vector)
+            found.update(l2)
+            self._record("l2_hit", len(l2))
+
+        self._record("miss", len(keys) - len(found))
+        return found
+
+    async def put_many(self, items: dict[str, list[float]]) -> None:
+        """Guarda vectores nuevos en ambos niveles."""
+        if not items:
+            return
+        for k, vector in items.items():
+            self._remember(k, vector)
+
+        if self.store is None:
+            return
+        try:
+            await self.store.execute_write_many(
+                "INSERT OR REPLACE INTO embedding_cache "
+                "(content_hash, model, embedding) VALUES (?, ?, ?)",
+                [(k, self.model_name, _pack(v)) for k, v in items.items()],
+            )
+            self._writes_since_evict += len(items)
+            if self._writes_since_evict >= max(1, self.max_rows // 10):
+                await self.evict()
+        except Exception as e:
+            logger.warning("Embedding cache write failed: %s", e)
+
+    async def evict(self) -> int:
+        """Recorta L2 a `max_rows` expulsando las entradas más antiguas."""
+        self._writes_since_evict = 0
+        if self.store is None:
+            return 0
+        result = await self.store.execute_write(
+            """
+            DELETE FROM embedding_cache WHERE rowid IN (
+                SELECT rowid FROM embedding_cache ORDER BY created_at ASC
+                LIMIT MAX(0, (SELECT COUNT(*) FROM embedding_cache) - ?)
+            )
+            """,
+            (self.max_rows,),
+        )
+        if result.rowcount > 0:
+            logger.info("Embedding cache evicted %d rows", result.rowcount)
+        return int(result.rowcount)
+
+    async def _load_l2(self, keys: list[str]) -> dict[str, list[float]]:
+        found: dict[str, list[float]] = {}
+        if self.store is None:
+            return found
+        try:
+            async with self.store.reader() as db:
+                for i in range(0, len(keys), _IN_BATCH):
+                    batch = keys[i : i + _IN_BATCH]
+                    marks = ",".join(["?"] * len(batch))
+                    sql = (
+                        "SELECT content_hash, embedding FROM embedding_cache "  # noqa: S608
+                        f"WHERE content_hash IN ({marks})"
+                    )
+                    async with db.execute(sql, batch) as cursor:
+                        for row in await cursor.fetchall():
+                            found[row[0]] = _unpack(row[1])
+        except Exception as e:
+            logger.warning("Embedding cache read failed: %s", e)
+        return found
+
+    def _remember(self, key: str, vector: list[float]) -> None:
+        self._l1[key] = vector
+        self._l1.move_to_end(key)
+        while len(self._l1) > self.l1_size:
+            self._l1.popitem(last=False)
+
+    def _record(self, result: str, count: int) -> None:
+        if count <= 0:
+            return
+        self.stats[result] += count
+        embedding_cache_requests_total.labels(model=self.model_name, result=result).inc(
+            count
+        )
+
+
+def _pack(vector: list[float]) -> bytes:
+    return struct.pack(f"{len(vector)}f", *vector)
+
+
+def _unpack(blob: bytes) -> list[float]:
+    return list(struct.unpack(f"{len(blob) // 4}f", blob))
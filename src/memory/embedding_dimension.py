@@ -0,0 +1,268 @@
+# src/memory/embedding_dimension.py
+"""
+Dimensión configurable de los embeddings (Matryoshka).
+
+text-embedding-004 se entrena con Matryoshka Representation Learning: el
+prefijo de los primeros `d` componentes, renormalizado, es un embedding
+válido de dimensión `d`. `EMBEDDING_DIMENSION` fija esa dimensión para la
+tabla `memory_embeddings`, las consultas y las escrituras.
+
+Cambiar la dimensión de una base existente:
+1. `backfill_dimension` llena la tabla de staging `memory_embeddings_next`
+   en lotes mientras `memory_embeddings` sigue sirviendo.
+2. `switch_dimension` completa los rezagados y reconstruye
+   `memory_embeddings` desde el staging en una sola transacción de escritura.
+   vec0 (sqlite-vec 0.1.6) no soporta `ALTER TABLE ... RENAME`, por eso se
+   copia en lugar de renombrar; los lectores WAL ven la tabla vieja hasta
+   el COMMIT.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import re
+import struct
+from typing import TYPE_CHECKING, Any, Protocol
+
+if TYPE_CHECKING:
+    import aiosqlite
+
+    from src.memory.sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIMENSION = 768
+STAGING_TABLE = "memory_embeddings_next"
+
+_BATCH_SIZE = 500
+_DIMENSION_RE = re.compile(r"embedding\s+FLOAT\[(\d+)\]", re.IGNORECASE)
+
+
+class TextEmbedder(Protocol):
+    async def embed_texts(
+        self,
+        texts: list[str],
+        task_type: str = "RETRIEVAL_DOCUMENT",
+        dimension: int | None = None,
+    ) -> list[list[float]]: ...
+
+
+def fit_dimension(vector: list[float], dim: int) -> list[float]:
+    """
+    Trunca al prefijo de `dim` componentes y renormaliza (Matryoshka).
+    Nunca ensancha: un vector más corto se devuelve tal cual y sqlite-vec
+    rechazará la dimensión al usarlo.
+    """
+    if len(vector) <= dim:
+        return vector
+    prefix = vector[:dim]
+    norm = math.sqrt(sum(v * v for v in prefix))
+    return [v / norm for v in prefix] if norm else prefix
+
+
+def pack_vector(vector: list[float], dim: int) -> bytes:
+    """Ajusta a `dim` y serializa como float32 para sqlite-vec."""
+    fitted = fit_dimension(vector, dim)
+    return struct.pack(f"{len(fitted)}f", *fitted)
+
+
+def embeddings_table_ddl(table: str, dim: int) -> str:
+    """DDL vec0 de `memory_embeddings` (o su staging) para una dimensión."""
+    return f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING vec0(
+            memory_id INTEGER PRIMARY KEY,
+            embedding FLOAT[{int(dim)}],
+            namespace TEXT PARTITION KEY,
+            chat_id TEXT,
+            memory_type TEXT,
+            is_active INTEGER
+        )
+    """
+
+
+async def vector_dimension(
+    db: aiosqlite.Connection, table: str = "memory_embeddings"
+) -> int | None:
+    """Dimensión declarada de una tabla vec0, o None si no existe."""
+    async with db.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ) as cursor:
+        row = await cursor.fetchone()
+    match = _DIMENSION_RE.search(row[0]) if row and row[0] else None
+    return int(match.group(1)) if match else None
+
+
+async def ensure_staging_table(db: aiosqlite.Connection, dim: int) -> None:
+    """Crea el staging con `dim`; lo recrea si quedó de otra dimensión."""
+    current = await vector_dimension(db, STAGING_TABLE)
+    if current is not None and current != dim:
+        await db.execute(f"DROP TABLE {STAGING_TABLE}")
+        logger.info("Dropped stale %s (%d dims)", STAGING_TABLE, current)
+    await db.execute(embeddings_table_ddl(STAGING_TABLE, dim))
+
+
+def _truncate_sql(column: str, dim: int) -> str:
+    return f"vec_normalize(vec_slice({column}, 0, {int(dim)}))"
+
+
+async def _missing_ids(db: aiosqlite.Connection, ids: list[int]) -> list[int]:
+    """Ids con vector activo-o-no en origen que aún no están en el staging."""
+    missing = []
+    for mid in ids:
+        async with db.execute(
+            f"SELECT 1 FROM {STAGING_TABLE} WHERE memory_id = ?",  # noqa: S608
+            (mid,),
+        ) as cursor:
+            if await cursor.fetchone() is None:
+                missing.append(mid)
+    return missing
+
+
+async def _copy_truncated(db: aiosqlite.Connection, ids: list[int], dim: int) -> int:
+    """Copia al staging el prefijo renormalizado de los vectores de origen."""
+    cursor = await db.executemany(
+        f"""
+        INSERT INTO {STAGING_TABLE}
+            (memory_id, embedding, namespace, chat_id, memory_type, is_active)
+        SELECT memory_id, {_truncate_sql("embedding", dim)},
+               namespace, chat_id, memory_type, is_active
+        FROM memory_embeddings WHERE memory_id = ?
+        """,  # noqa: S608
+        [(mid,) for mid in ids],
+    )
+    return max(cursor.rowcount, 0)
+
+
+async def _reembed_batch(
+    store: SQLiteStore, ids: list[int], dim: int, embedder: TextEmbedder
+) -> int:
+    """Re-embebe el contenido (necesario al aumentar la dimensión)."""
+    async with store.reader() as db:
+        rows: list[Any] = []
+        for mid in ids:
+            async with db.execute(
+                "SELECT id, content, namespace, chat_id, memory_type, is_active "
+                "FROM memories WHERE id = ?",
+                (mid,),
+            ) as cursor:
+                row = await cursor.fetchone()
+            if row is not None:
+                rows.append(row)
+    if not rows:
+        return 0
+
+    vectors = await embedder.embed_texts([r[1] for r in rows], dimension=dim)
+    params = [
+        (r[0], pack_vector(vec, dim), r[2], r[3], r[4], r[5])
+        for r, vec in zip(rows, vectors, strict=True)
+    ]
+
+    async def _insert(db: aiosqlite.Connection) -> int:
+        pending = set(await _missing_ids(db, [p[0] for p in params]))
+        cursor = await db.executemany(
+            f"""
+            INSERT INTO {STAGING_TABLE}
+                (memory_id, embedding, namespace, chat_id, memory_type, is_active)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,  # noqa: S608
+            [p for p in params if p[0] in pending],
+        )
+        return max(cursor.rowcount, 0)
+
+    return int(await store.run_in_writer(_insert))
+
+
+async def backfill_dimension(
+    store: SQLiteStore,
+    dim: int,
+    embedder: TextEmbedder | None = None,
+    batch_size: int = _BATCH_SIZE,
+) -> int:
+    """
+    Llena el staging con vectores de dimensión `dim` mientras la tabla activa
+    sigue sirviendo. Reducir la dimensión trunca los vectores existentes sin
+    llamar a la API; aumentarla re-embebe el contenido con `embedder`.
+    Retorna el número de vectores copiados.
+    """
+    db = await store.get_db()
+    source_dim = await vector_dimension(db) or DEFAULT_DIMENSION
+    if source_dim < dim and embedder is None:
+        raise ValueError(f"Widening {source_dim} -> {dim} dims requires an embedder")
+    await store.run_in_writer(lambda db: ensure_staging_table(db, dim))
+
+    total, after_id = 0, 0
+    while True:
+        async with (
+            store.reader() as rdb,
+            rdb.execute(
+                "SELECT id FROM memories WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, batch_size),
+            ) as cursor,
+        ):
+            ids = [int(r[0]) for r in await cursor.fetchall()]
+        if not ids:
+            break
+        after_id = ids[-1]
+
+        if source_dim >= dim:
+
+            async def _copy(db: aiosqlite.Connection, batch: list[int] = ids) -> int:
+                return await _copy_truncated(db, await _missing_ids(db, batch), dim)
+
+            total += int(await store.run_in_writer(_copy))
+        elif embedder is not None:
+            async with store.reader() as rdb:
+                missing = await _missing_ids(rdb, ids)
+            if missing:
+                total += await _reembed_batch(store, missing, dim, embedder)
+
+    logger.info("Dimension backfill (%d -> %d): %d vectors", source_dim, dim, total)
+    return total
+
+
+async def switch_dimension(store: SQLiteStore, dim: int) -> bool:
+    """
+    Conmuta `memory_embeddings` a la dimensión del staging de forma atómica.
+
+    En la misma transacción: copia los vectores escritos desde el último
+    backfill (solo posible al truncar), reconstruye la tabla activa desde el
+    staging tomando `is_active` actual de `memories` y borra el staging.
+    Retorna False si quedan vectores sin equivalente y no se conmutó.
+    """
+
+    async def _switch(db: aiosqlite.Connection) -> bool:
+        if await vector_dimension(db, STAGING_TABLE) != dim:
+            return False
+        source_dim = await vector_dimension(db) or DEFAULT_DIMENSION
+        async with db.execute("SELECT memory_id FROM memory_embeddings") as cursor:
+            ids = [int(r[0]) for r in await cursor.fetchall()]
+        missing = await _missing_ids(db, ids)
+        if missing:
+            if source_dim < dim:
+                return False
+            await _copy_truncated(db, missing, dim)
+
+        await db.execute("DROP TABLE memory_embeddings")
+        await db.execute(embeddings_table_ddl("memory_embeddings", dim))
+        await db.execute(
+            f"""
+            INSERT INTO memory_embeddings
+                (memory_id, embedding, namespace, chat_id, memory_type, is_active)
+            SELECT s.memory_id, s.embedding, s.namespace, s.chat_id,
+                   s.memory_type, m.is_active
+            FROM {STAGING_TABLE} s JOIN memories m ON m.id = s.memory_id
+            """  # noqa: S608
+        )
+        await db.execute(f"DROP TABLE {STAGING_TABLE}")
+        # Las tablas cuantizadas derivan de la dimensión: se recrean vacías
+        from src.memory.vector_quantization import rebuild_quantized_tables
+
+        await rebuild_quantized_tables(db)
+        return True
+
+    switched = bool(await store.run_in_writer(_switch))
+    if switched:
+        store.embedding_dim = dim
+        logger.info("memory_embeddings switched to %d dims", dim)
+    return switched
@@ -1,10 +1,16 @@
 import asyncio
 import logging
+from typing import TYPE_CHECKING
 
 from google.api_core import exceptions as google_exceptions
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 
 from src.core.config import settings
+from src.memory.embedding_cache import EmbeddingCache
+from src.memory.embedding_dimension import fit_dimension
+
+if TYPE_CHECKING:
+    from src.memory.sqlite_store import SQLiteStore
 
 logger = logging.getLogger(__name__)
 
@@ -13,11 +19,29 @@ class EmbeddingService:
     """
     Wrapper para el servicio de embeddings usando LangChain nativo.
     Soporta modelos modernos (text-embedding-004) y maneja Rate Limiting/Batching.
+
+    Si recibe un `store`, los vectores se cachean en SQLite (`embedding_cache`)
+    además del LRU en proceso; solo los textos no cacheados llegan a la API.
+
+    La API devuelve siempre el vector completo (es lo que se cachea) y la
+    salida se trunca a la dimensión activa (Matryoshka), de modo que la caché
+    sigue siendo válida al cambiar `EMBEDDING_DIMENSION`.
     """
 
-    def __init__(self, model_name: str = "models/text-embedding-004") -> None:
+    def __init__(
+        self,
+        model_name: str = "models/text-embedding-004",
+        store: "SQLiteStore | None" = None,
+    ) -> None:
         """Inicializa el cliente de Google Embeddings vía LangChain."""
         self.model_name = model_name
+        self._store = store
+        self.cache = EmbeddingCache(
+            model_name,
+            store=store,
+            l1_size=settings.EMBEDDING_CACHE_L1_SIZE,
+            max_rows=settings.EMBEDDING_CACHE_MAX_ROWS,
+        )
 
         api_key = (
             settings.GOOGLE_API_KEY.get_secret_value()
@@ -35,14 +59,44 @@ class EmbeddingService:
         )
         logger.info("EmbeddingService configured with LangChain: %s", model_name)
 
+    @property
+    def dimension(self) -> int:
+        """Dimensión activa: la de `memory_embeddings` si hay store."""
+        if self._store is not None:
+            return self._store.embedding_dim
+        return settings.EMBEDDING_DIMENSION
+
     async def embed_texts(
-        self, texts: list[str], task_type: str = "RETRIEVAL_DOCUMENT"
+        self,
+        texts: list[str],
+        task_type: str = "RETRIEVAL_DOCUMENT",
+        dimension: int | None = None,
     ) -> list[list[float]]:
-        """Genera embeddings procesando en lotes pequeños."""
+        """Genera embeddings consultando la caché y enviando solo los faltantes."""
         if not texts:
             return []
 
-        all_embeddings = []
+        keys = [self.cache.key(text, task_type) for text in texts]
+        cached = await self.cache.get_many(list(dict.fromkeys(keys)))
+
+        # Textos únicos no cacheados, en orden de aparición
+        missing: dict[str, str] = {}
+        for key, text in zip(keys, texts, strict=True):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            fresh = await self._embed_batches(list(missing.values()))
+            computed = dict(zip(missing, fresh, strict=True))
+            await self.cache.put_many(computed)
+            cached.update(computed)
+
+        dim = dimension or self.dimension
+        return [fit_dimension(cached[key], dim) for key in keys]
+
+    async def _embed_batches(self, texts: list[str]) -> list[list[float]]:
+        """Llama a la API procesando en lotes pequeños con reintentos."""
+        all_embeddings: list[list[float]] = []
         batch_size = 100
 
         # Procesar en lotes
@@ -89,9 +143,16 @@ class EmbeddingService:
 
     async def embed_query(self, query: str) -> list[float]:
         """Genera embedding para una búsqueda."""
+        key = self.cache.key(query, "RETRIEVAL_QUERY")
+        cached = await self.cache.get_many([key])
+        if key in cached:
+            return fit_dimension(cached[key], self.dimension)
+
         # Usa aembed_query para queries individuales
         try:
-            return await self._embedder.aembed_query(query)
+            embedding = await self._embedder.aembed_query(query)
         except Exception as e:
             logger.error(f"Error generating query embedding: {e}")
             return []
+        await self.cache.put_many({key: embedding})
+        return fit_dimension(embedding, self.dimension)
@@ -70,8 +70,9 @@ def _apply_personality_adaptation(profile: dict[str, Any], evo: dict[str, Any])
 
     # Nuevas preferencias
     if pa_evo.get("new_preferences"):
+        # Orden de llegada: el perfil conserva solo las más recientes
         pa["learned_preferences"] = list(
-            set(pa.get("learned_preferences", []) + pa_evo["new_preferences"])
+            dict.fromkeys(pa.get("learned_preferences", []) + pa_evo["new_preferences"])
         )
         updated = True
 
@@ -106,7 +107,7 @@ def _apply_linguistic_adaptation(profile: dict[str, Any], evo: dict[str, Any]) -
         pa.setdefault("learned_preferences", []).append(
             f"Feedback de tono: {lp['language_feedback']}"
         )
-        pa["learned_preferences"] = list(set(pa["learned_preferences"]))
+        pa["learned_preferences"] = list(dict.fromkeys(pa["learned_preferences"]))
         updated = True
 
     profile["personality_adaptation"] = pa
@@ -5,6 +5,9 @@ from typing import Any
 
 logger = logging.getLogger(__name__)
 
+FACT_CATEGORIES = ("entities", "preferences", "medical", "relationships", "milestones")
+_PROVENANCE_FIELDS = ("source_type", "confidence", "evidence", "sensitivity")
+
 
 def get_identity_key(item: dict[str, Any], category: str) -> str:
     """Returns a dedup key based on the semantic identity of a fact."""
@@ -21,6 +24,16 @@ def get_identity_key(item: dict[str, Any], category: str) -> str:
     return json.dumps(item, sort_keys=True)
 
 
+def fact_text(category: str, item: dict[str, Any]) -> str:
+    """Texto a embeber de un hecho: categoría y campos, sin la procedencia."""
+    fields = [
+        f"{k}: {json.dumps(v, ensure_ascii=False) if isinstance(v, dict | list) else v}"
+        for k, v in item.items()
+        if k not in _PROVENANCE_FIELDS and v not in (None, "", [], {})
+    ]
+    return f"{category}: " + "; ".join(fields)
+
+
 def merge_fact_knowledge(old: dict[str, Any], new: dict[str, Any]) -> dict[str, Any]:
     """Merges new knowledge into old, deduplicating by semantic identity."""
     merged = old.copy()
@@ -29,8 +42,7 @@ def merge_fact_knowledge(old: dict[str, Any], new: dict[str, Any]) -> dict[str,
     if new.get("user_name"):
         merged["user_name"] = new["user_name"]
 
-    categories = ("entities", "preferences", "medical", "relationships", "milestones")
-    for key in categories:
+    for key in FACT_CATEGORIES:
         _merge_category(merged, new, key)
 
     return merged
@@ -0,0 +1,103 @@
+# src/memory/fts_index.py
+"""
+Índice FTS5 de memorias.
+
+`memories_fts` es contentless (el texto vive solo en `memories`) con
+`contentless_delete` para borrar por rowid y `contentless_unindexed` para
+guardar `chat_id` y `namespace`: el filtro por chat y namespace ocurre dentro
+de FTS, sin JOIN. El tokenizer `unicode61 remove_diacritics 2` hace que
+"terapía"/"terapia" o "cómo"/"como" coincidan; los índices de prefijo de 2 y
+3 caracteres aceleran las consultas con prefijos cortos.
+
+`memories_fts_vocab` expone la frecuencia documental de cada término para
+construir consultas por IDF (ver keyword_search.py).
+
+schema.sql crea este layout en bases nuevas; `rebuild_fts` migra las bases
+con el índice anterior (external content, tokenizer por defecto).
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+
+FTS_TABLE_DDL = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+        content,
+        chat_id UNINDEXED,
+        namespace UNINDEXED,
+        content='',
+        contentless_delete=1,
+        contentless_unindexed=1,
+        tokenize='{FTS_TOKENIZER}',
+        prefix='2 3'
+    )
+"""
+
+FTS_VOCAB_DDL = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts_vocab
+    USING fts5vocab(memories_fts, 'row')
+"""
+
+FTS_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS memories_ai AFTER INSERT ON memories BEGIN
+        INSERT INTO memories_fts(rowid, content, chat_id, namespace)
+        VALUES (new.id, new.content, new.chat_id, new.namespace);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS memories_ad AFTER DELETE ON memories BEGIN
+        DELETE FROM memories_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS memories_au
+    AFTER UPDATE OF content, chat_id, namespace ON memories BEGIN
+        DELETE FROM memories_fts WHERE rowid = old.id;
+        INSERT INTO memories_fts(rowid, content, chat_id, namespace)
+        VALUES (new.id, new.content, new.chat_id, new.namespace);
+    END
+    """,
+]
+
+
+async def fts_is_current(db: aiosqlite.Connection) -> bool:
+    """True si `memories_fts` ya tiene el tokenizer y las columnas actuales."""
+    async with db.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'memories_fts'"
+    ) as cursor:
+        row = await cursor.fetchone()
+    sql = (row[0] or "") if row else ""
+    return "remove_diacritics" in sql and "contentless_unindexed" in sql
+
+
+async def rebuild_fts(db: aiosqlite.Connection) -> int:
+    """
+    Reemplaza el índice y sus triggers por el layout actual y lo repuebla
+    desde `memories`. No hace COMMIT. Retorna las filas indexadas.
+    """
+    for trigger in ("memories_ai", "memories_ad", "memories_au"):
+        await db.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    await db.execute("DROP TABLE IF EXISTS memories_fts_vocab")
+    await db.execute("DROP TABLE IF EXISTS memories_fts")
+    # DROP de una tabla contentless_unindexed deja su tabla sombra _content
+    await db.execute("DROP TABLE IF EXISTS memories_fts_content")
+    await db.execute(FTS_TABLE_DDL)
+    await db.execute(FTS_VOCAB_DDL)
+    for sql in FTS_TRIGGERS:
+        await db.execute(sql)
+    cursor = await db.execute(
+        "INSERT INTO memories_fts(rowid, content, chat_id, namespace) "
+        "SELECT id, content, chat_id, namespace FROM memories"
+    )
+    rows = max(cursor.rowcount, 0)
+    logger.info("FTS index rebuilt (%s): %d rows", FTS_TOKENIZER, rows)
+    return rows
@@ -1,14 +1,30 @@
 # src/memory/global_knowledge_loader.py
+import asyncio
+import hashlib
 import logging
 import os
 from pathlib import Path
+from typing import Any
 
 import aiofiles
 
-from src.memory.vector_memory_manager import MemoryType, VectorMemoryManager
+from src.core.exceptions import DocumentExtractionError, TransientExtractionError
+from src.memory.vector_memory_manager import VectorMemoryManager
+from src.tools.document_extraction import extraction_kind, get_document_extractor
 
 logger = logging.getLogger(__name__)
 
+_HASH_BLOCK = 1 << 20
+
+
+def _file_sha256(path: Path) -> str:
+    """Hash del archivo completo, leído por bloques."""
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        while block := f.read(_HASH_BLOCK):
+            digest.update(block)
+    return digest.hexdigest()
+
 
 class GlobalKnowledgeLoader:
     """
@@ -23,6 +39,8 @@ class GlobalKnowledgeLoader:
             self.knowledge_path = Path(knowledge_dir)
 
         self._manager: VectorMemoryManager | None = None
+        self._sync_lock = asyncio.Lock()
+        self._rejected: set[str] = set()
         logger.info(
             "GlobalKnowledgeLoader inicializado en: %s", self.knowledge_path.absolute()
         )
@@ -36,23 +54,6 @@ class GlobalKnowledgeLoader:
             self._manager = get_vector_memory_manager()
         return self._manager
 
-    def _extract_pdf_text(self, pdf_path: Path) -> str:
-        """Extrae texto plano de un PDF usando PyMuPDF."""
-        try:
-            import fitz
-
-            text = ""
-            with fitz.open(str(pdf_path)) as doc:
-                for page in doc:
-                    text += str(page.get_text())
-            return text
-        except ImportError:
-            logger.error("PyMuPDF (fitz) no instalado. No se puede procesar PDF.")
-            return ""
-        except Exception as e:
-            logger.error("Error extrayendo texto de PDF %s: %s", pdf_path.name, e)
-            return ""
-
     def _should_process_file(self, file_path: Path) -> tuple[bool, str]:
         """Determina si un archivo debe ser procesado."""
         import re
@@ -76,75 +77,189 @@ class GlobalKnowledgeLoader:
 
     async def ingest_file(self, file_path: Path) -> int:
         """Ingiere un archivo individual en el sistema de memoria."""
-        logger.info("Procesando conocimiento global: %s", file_path.name)
         try:
-            content = ""
-            if file_path.suffix.lower() == ".pdf":
-                content = self._extract_pdf_text(file_path)
-            else:
-                async with aiofiles.open(file_path, encoding="utf-8") as f:
-                    content = await f.read()
-
-            if not content or not content.strip():
-                logger.warning("No se pudo extraer contenido de %s", file_path.name)
-                return 0
-
-            return await self.manager.store_context(
-                user_id="system",
-                content=content,
-                context_type=MemoryType.DOCUMENT,
-                metadata={
-                    "filename": file_path.name,
-                    "source": "global_knowledge",
-                    "source_type": "explicit",
-                    "sensitivity": "low",
-                },
-                namespace="global",
-            )
+            return await self._ingest(file_path)
         except Exception as e:
             logger.error("Error sincronizando %s: %s", file_path.name, e)
             return 0
 
-    async def sync_knowledge(self) -> None:
-        """Escanea e ingiere archivos nuevos en SQLite."""
+    async def _ingest(self, file_path: Path) -> int:
+        """
+        Re-ingesta diferencial del archivo: reutiliza los chunks ya
+        almacenados y solo embebe los nuevos. Retorna los chunks vigentes.
+        """
+        logger.info("Procesando conocimiento global: %s", file_path.name)
+        content = ""
+        if extraction_kind(file_path):
+            # Pool de procesos: el parser no bloquea el event loop
+            try:
+                content = await get_document_extractor().extract_text(file_path)
+            except TransientExtractionError:
+                # Tiempo, worker caído o memoria: sin diff ni manifiesto, el
+                # siguiente sync reintenta
+                raise
+            except DocumentExtractionError as e:
+                # Fallo determinista: se registra vacío y no se reintenta
+                # hasta que el archivo cambie
+                logger.error("Error extrayendo texto de %s: %s", file_path.name, e)
+        else:
+            async with aiofiles.open(file_path, encoding="utf-8") as f:
+                content = await f.read()
+
+        if not content or not content.strip():
+            # Sin contenido: el diff desactiva los chunks previos del archivo
+            logger.warning("No se pudo extraer contenido de %s", file_path.name)
+
+        diff = await self.manager.update_file_knowledge(
+            filename=file_path.name,
+            content=content,
+            metadata={
+                "source": "global_knowledge",
+                "source_type": "explicit",
+                "sensitivity": "low",
+            },
+            namespace="global",
+        )
+        return diff.chunks
+
+    def _versions(self) -> tuple[str, str]:
+        """(versión del chunker, modelo de embeddings) vigentes."""
+        pipeline = self.manager.pipeline
+        return pipeline.chunker.version, pipeline.embedding_service.model_name
+
+    async def sync_file(self, file_path: Path, entry: dict[str, Any] | None) -> bool:
+        """
+        Ingiere el archivo solo si su huella difiere del manifiesto.
+
+        Tamaño y mtime iguales se omiten sin leer el archivo; si solo cambió
+        el mtime, el hash completo confirma que el contenido es el mismo.
+        Retorna True si cambió el conocimiento almacenado.
+        """
+        stat = file_path.stat()
+        chunker_version, model = self._versions()
+        same_versions = (
+            entry is not None
+            and entry["chunker_version"] == chunker_version
+            and entry["embedding_model"] == model
+        )
+        if (
+            same_versions
+            and entry is not None
+            and entry["size"] == stat.st_size
+            and entry["mtime_ns"] == stat.st_mtime_ns
+        ):
+            return False
+
+        repo = self.manager.store.manifest_repo
+        content_hash = await asyncio.to_thread(_file_sha256, file_path)
+        if (
+            same_versions
+            and entry is not None
+            and entry["content_hash"] == content_hash
+        ):
+            await repo.upsert(
+                file_path.name,
+                stat.st_size,
+                stat.st_mtime_ns,
+                content_hash,
+                chunker_version,
+                model,
+                entry["chunks"],
+            )
+            return False
+
+        logger.info(
+            "Detectado archivo %s: %s",
+            "nuevo" if entry is None else "modificado",
+            file_path.name,
+        )
+        try:
+            chunks = await self._ingest(file_path)
+        except Exception as e:
+            # El diff es atómico: sin cambios ni entrada, se reintenta después
+            logger.error("Error sincronizando %s: %s", file_path.name, e)
+            return False
+
+        await repo.upsert(
+            file_path.name,
+            stat.st_size,
+            stat.st_mtime_ns,
+            content_hash,
+            chunker_version,
+            model,
+            chunks,
+        )
+        return True
+
+    async def remove_file(self, filename: str) -> None:
+        """Desactiva el conocimiento de un archivo borrado y su entrada."""
+        logger.info("Detectado archivo eliminado: %s", filename)
+        await self.manager.delete_file_knowledge(filename, namespace="global")
+        await self.manager.store.manifest_repo.delete(filename)
+
+    async def sync_knowledge(self) -> list[str]:
+        """
+        Sincroniza storage/knowledge contra el manifiesto persistido.
+        Retorna los archivos cuyo conocimiento cambió (ingestados o borrados).
+        """
         if not self.knowledge_path.exists():
             logger.info(
                 "Directorio de conocimiento no encontrado: %s. "
                 "Saltando sincronización global.",
                 self.knowledge_path.absolute(),
             )
-            return
+            return []
 
-        processed_count = 0
-        skipped_count = 0
+        async with self._sync_lock:
+            manifest = await self.manager.store.manifest_repo.get_all()
+            changed: list[str] = []
+            seen: set[str] = set()
+            unchanged_count = 0
+            skipped_count = 0
 
-        for file_path in self.knowledge_path.glob("*"):
-            if file_path.is_dir() or file_path.name.startswith("."):
-                continue
+            for file_path in sorted(self.knowledge_path.glob("*")):
+                if file_path.is_dir() or file_path.name.startswith("."):
+                    continue
 
-            should_process, reason = self._should_process_file(file_path)
-            if not should_process:
-                logger.info(
-                    "[INGESTA] Archivo descartado: %s | Razón: %s",
-                    file_path.name,
-                    reason,
-                )
-                skipped_count += 1
-                continue
+                should_process, reason = self._should_process_file(file_path)
+                if not should_process:
+                    if file_path.name not in self._rejected:
+                        logger.info(
+                            "[INGESTA] Archivo descartado: %s | Razón: %s",
+                            file_path.name,
+                            reason,
+                        )
+                        self._rejected.add(file_path.name)
+                    skipped_count += 1
+                    continue
 
-            await self.ingest_file(file_path)
-            processed_count += 1
+                seen.add(file_path.name)
+                try:
+                    if await self.sync_file(file_path, manifest.get(file_path.name)):
+                        changed.append(file_path.name)
+                    else:
+                        unchanged_count += 1
+                except FileNotFoundError:
+                    seen.discard(file_path.name)
 
-        logger.info(
-            "Sincronización finalizada. Procesados: %d, Saltados: %d",
-            processed_count,
+            for name in sorted(manifest.keys() - seen):
+                await self.remove_file(name)
+                changed.append(name)
+
+        logger.log(
+            logging.INFO if changed else logging.DEBUG,
+            "Sincronización finalizada. Cambiados: %d, Sin cambios: %d, Saltados: %d",
+            len(changed),
+            unchanged_count,
             skipped_count,
         )
+        return changed
 
     async def check_and_bootstrap(self) -> None:
         """Hook para ejecutar en el startup de la aplicación."""
         logger.info("Iniciando sincronización de conocimiento en segundo plano...")
         await self.sync_knowledge()
+        await self.manager.refresh_global_index()
         logger.info("Sincronización de conocimiento global completada.")
 
 
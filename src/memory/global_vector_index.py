@@ -0,0 +1,284 @@
+# src/memory/global_vector_index.py
+"""
+Índice vectorial exacto en memoria para el namespace global.
+
+El conocimiento global (storage/knowledge) es de lectura casi exclusiva y se
+consulta en cada turno. Este índice mantiene todos sus vectores activos en
+una matriz float32 contigua y responde top-k con un único producto matricial
+más `argpartition`. SQLite sigue siendo la fuente de verdad: el índice se
+reconstruye desde `memory_embeddings` y la hidratación filtra `is_active`.
+
+Con `mmap_path` la matriz se persiste en disco y se abre con memory-map, de
+modo que varios workers de uvicorn comparten las mismas páginas. Cada
+versión se publica con un único rename (ver `_persist`).
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import shutil
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from src.memory.sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+_IN_BATCH = 500
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """Estado inmutable del índice; se reemplaza entero en cada cambio."""
+
+    ids: np.ndarray
+    chat_ids: np.ndarray
+    matrix: np.ndarray
+    sq_norms: np.ndarray
+
+    @classmethod
+    def build(
+        cls, ids: np.ndarray, chat_ids: np.ndarray, matrix: np.ndarray
+    ) -> "_Snapshot":
+        if not matrix.size:
+            matrix = np.empty((0, 0), dtype=np.float32)
+        elif not isinstance(matrix, np.memmap):
+            matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        return cls(
+            ids=ids.astype(np.int64, copy=False),
+            chat_ids=chat_ids,
+            matrix=matrix,
+            sq_norms=np.einsum("ij,ij->i", matrix, matrix),
+        )
+
+
+def _empty_arrays() -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    return (
+        np.empty(0, np.int64),
+        np.empty(0, dtype=object),
+        np.empty((0, 0), np.float32),
+    )
+
+
+class GlobalVectorIndex:
+    """Búsqueda exacta (distancia L2, igual que vec0) sobre una matriz NumPy."""
+
+    def __init__(
+        self,
+        store: SQLiteStore,
+        namespace: str = "global",
+        mmap_path: str | None = None,
+    ) -> None:
+        self.store = store
+        self.namespace = namespace
+        self.mmap_path = Path(mmap_path) if mmap_path else None
+        self._snap = _Snapshot.build(*_empty_arrays())
+        self._lock = asyncio.Lock()
+        self.ready = False
+
+    def __len__(self) -> int:
+        return int(self._snap.ids.shape[0])
+
+    async def load(self) -> int:
+        """Carga completa desde SQLite (o desde el archivo mmap si está al día)."""
+        async with self._lock:
+            signature = await self._signature()
+            mapped = await asyncio.to_thread(self._load_mmap, signature)
+            if mapped is not None:
+                self._snap = mapped
+                self.ready = True
+                logger.info("Global vector index mapped: %d vectors", len(self))
+                return len(self)
+
+            rows = await self._fetch(
+                "SELECT memory_id, chat_id, embedding FROM memory_embeddings "
+                "WHERE namespace = ? AND is_active = 1",
+                [self.namespace],
+            )
+            snap = _Snapshot.build(*self._to_arrays(rows))
+            self._snap = await asyncio.to_thread(self._persist, snap, signature)
+            self.ready = True
+            logger.info("Global vector index built: %d vectors", len(self))
+            return len(self)
+
+    async def refresh_file(self, filename: str) -> None:
+        """Actualización incremental tras ingerir o borrar un archivo."""
+        async with self._lock:
+            if not self.ready:
+                return
+            snap = self._snap
+            ids = await self._file_memory_ids(filename)
+            keep = ~np.isin(snap.ids, ids)
+
+            parts = [(snap.ids[keep], snap.chat_ids[keep], snap.matrix[keep])]
+            for i in range(0, len(ids), _IN_BATCH):
+                batch = ids[i : i + _IN_BATCH]
+                marks = ",".join(["?"] * len(batch))
+                rows = await self._fetch(
+                    "SELECT memory_id, chat_id, embedding FROM memory_embeddings "  # noqa: S608
+                    f"WHERE memory_id IN ({marks}) AND is_active = 1",
+                    list(batch),
+                )
+                parts.append(self._to_arrays(rows))
+
+            parts = [p for p in parts if p[2].size]
+            snap = _Snapshot.build(
+                *(
+                    (
+                        np.concatenate([p[0] for p in parts]),
+                        np.concatenate([p[1] for p in parts]),
+                        np.vstack([p[2] for p in parts]),
+                    )
+                    if parts
+                    else _empty_arrays()
+                )
+            )
+            signature = await self._signature()
+            self._snap = await asyncio.to_thread(self._persist, snap, signature)
+            logger.info(
+                "Global vector index refreshed for %s: %d vectors", filename, len(self)
+            )
+
+    async def search(
+        self, query_embedding: list[float], limit: int, chat_id: str | None = None
+    ) -> list[tuple[int, float]]:
+        """Top-k exacto; retorna (memory_id, distancia L2) como VectorSearch."""
+        if not self.ready or not len(self) or not query_embedding:
+            return []
+        return await asyncio.to_thread(self._top_k, query_embedding, limit, chat_id)
+
+    def _top_k(
+        self, query_embedding: list[float], limit: int, chat_id: str | None
+    ) -> list[tuple[int, float]]:
+        snap = self._snap
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if query.shape[0] != snap.matrix.shape[1]:
+            return []
+
+        # ||x - q||² = ||x||² - 2·x·q + ||q||²
+        dists = snap.sq_norms - 2.0 * (snap.matrix @ query) + float(query @ query)
+        if chat_id:
+            dists = np.where(snap.chat_ids == chat_id, dists, np.inf)
+
+        k = min(limit, dists.shape[0])
+        if k <= 0:
+            return []
+        top = np.argpartition(dists, k - 1)[:k]
+        top = top[np.argsort(dists[top])]
+        return [
+            (int(snap.ids[i]), float(np.sqrt(max(dists[i], 0.0))))
+            for i in top
+            if np.isfinite(dists[i])
+        ]
+
+    @staticmethod
+    def _to_arrays(rows: list[Any]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if not rows:
+            return _empty_arrays()
+        ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        chats = np.array([r[1] for r in rows], dtype=object)
+        matrix = np.vstack([np.frombuffer(r[2], dtype=np.float32) for r in rows])
+        return ids, chats, matrix
+
+    async def _fetch(self, sql: str, params: list[Any]) -> list[Any]:
+        async with self.store.reader() as db, db.execute(sql, params) as cursor:
+            return list(await cursor.fetchall())
+
+    async def _file_memory_ids(self, filename: str) -> list[int]:
+        rows = await self._fetch(
+            "SELECT id FROM memories WHERE namespace = ? AND filename = ?",
+            [self.namespace, filename],
+        )
+        return [int(r[0]) for r in rows]
+
+    async def _signature(self) -> str:
+        """
+        Huella del contenido activo: sha256 de los ids activos ordenados y de
+        la dimensión (tras un cambio de dimensión los ids no cambian).
+        """
+        rows = await self._fetch(
+            "SELECT id FROM memories WHERE namespace = ? AND is_active = 1 ORDER BY id",
+            [self.namespace],
+        )
+        ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        digest = hashlib.sha256(ids.tobytes())
+        digest.update(f":{self.store.embedding_dim}".encode())
+        return digest.hexdigest()
+
+    # === Persistencia opcional (memory-map) ===
+    #
+    # Cada versión es un directorio propio (vectors.npy, ids.npy, meta.json)
+    # y `<base>.current` nombra la vigente: se reemplaza con un solo rename,
+    # así un worker nunca empareja la matriz de una versión con los ids de
+    # otra. Corre en hilos: np.save/np.load no bloquean el event loop.
+
+    def _versions_dir(self, base: Path) -> Path:
+        return base.with_name(base.name + ".versions")
+
+    def _pointer(self, base: Path) -> Path:
+        return base.with_name(base.name + ".current")
+
+    def _load_mmap(self, signature: str) -> _Snapshot | None:
+        """Abre la versión compartida si corresponde al contenido actual."""
+        if self.mmap_path is None:
+            return None
+        try:
+            name = self._pointer(self.mmap_path).read_text().strip()
+            directory = self._versions_dir(self.mmap_path) / name
+            meta = json.loads((directory / "meta.json").read_text())
+            if meta.get("signature") != signature:
+                return None
+            matrix = np.load(directory / "vectors.npy", mmap_mode="r")
+            ids = np.load(directory / "ids.npy")
+        except (OSError, ValueError):
+            return None
+        chat_ids = np.array(meta.get("chat_ids", []), dtype=object)
+        if not (len(ids) == matrix.shape[0] == len(chat_ids)):
+            logger.warning("Global vector index file %s is inconsistent", name)
+            return None
+        return _Snapshot.build(ids, chat_ids, matrix)
+
+    def _persist(self, snap: _Snapshot, signature: str) -> _Snapshot:
+        """Escribe una versión nueva, la publica y la reabre con memory-map."""
+        if self.mmap_path is None or not snap.matrix.size:
+            return snap
+        versions = self._versions_dir(self.mmap_path)
+        name = f"{signature[:16]}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        directory = versions / name
+        try:
+            directory.mkdir(parents=True)
+            np.save(directory / "vectors.npy", snap.matrix)
+            np.save(directory / "ids.npy", snap.ids)
+            meta = {"signature": signature, "chat_ids": snap.chat_ids.tolist()}
+            (directory / "meta.json").write_text(json.dumps(meta))
+
+            pointer = self._pointer(self.mmap_path)
+            tmp = pointer.with_name(f"{pointer.name}.{name}.tmp")
+            tmp.write_text(name)
+            tmp.replace(pointer)
+            mapped = _Snapshot.build(
+                snap.ids,
+                snap.chat_ids,
+                np.load(directory / "vectors.npy", mmap_mode="r"),
+            )
+        except OSError as e:
+            logger.warning("Could not persist global vector index: %s", e)
+            shutil.rmtree(directory, ignore_errors=True)
+            return snap
+        # Versiones anteriores: los workers que ya las mapearon conservan el
+        # inodo; uno que llegue tarde reconstruye desde SQLite. Se conserva
+        # la vigente aunque la haya publicado otro worker entretanto.
+        keep = {name}
+        with contextlib.suppress(OSError):
+            keep.add(pointer.read_text().strip())
+        for old in versions.iterdir():
+            if old.name not in keep:
+                shutil.rmtree(old, ignore_errors=True)
+        return mapped
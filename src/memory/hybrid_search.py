@@ -5,13 +5,30 @@ import json
 import logging
 from typing import Any
 
+from src.core.config import settings
+from src.memory.ann_backend import IVFBackend
 from src.memory.embeddings import EmbeddingService
+from src.memory.global_vector_index import GlobalVectorIndex
 from src.memory.keyword_search import KeywordSearch
 from src.memory.sqlite_store import SQLiteStore
 from src.memory.vector_search import VectorSearch
 
 logger = logging.getLogger(__name__)
 
+# Las columnas generadas (filename, source, page...) sirven a filtros e
+# índices; al hidratar se lee metadata y se parsea una sola vez en Python
+_MEMORY_COLUMNS = "id, chat_id, content, memory_type, metadata"
+
+
+def _row_to_memory(row: Any) -> dict[str, Any]:
+    return {
+        "id": row["id"],
+        "content": row["content"],
+        "memory_type": row["memory_type"],
+        "metadata": json.loads(row["metadata"]) if row["metadata"] else {},
+        "chat_id": row["chat_id"],
+    }
+
 
 class HybridSearch:
     """Búsqueda híbrida."""
@@ -20,7 +37,28 @@ class HybridSearch:
         self.store = store
         self.vector_search = VectorSearch(store)
         self.keyword_search = KeywordSearch(store)
-        self.embedding_service = EmbeddingService()
+        self.embedding_service = EmbeddingService(store=store)
+        self.global_index = (
+            GlobalVectorIndex(store, mmap_path=settings.GLOBAL_VECTOR_INDEX_MMAP_PATH)
+            if settings.GLOBAL_VECTOR_INDEX_ENABLED
+            else None
+        )
+        if self.global_index is not None:
+            self.vector_search.backends["global"] = self.global_index
+
+        # Backends ANN por namespace (tienen prioridad sobre el índice exacto)
+        self.ann_backends = {
+            ns: IVFBackend(
+                store,
+                ns,
+                nlist=settings.ANN_IVF_NLIST,
+                nprobe=settings.ANN_IVF_NPROBE,
+                pq_m=settings.ANN_IVF_PQ_M,
+                retrain_ratio=settings.ANN_IVF_RETRAIN_RATIO,
+            )
+            for ns in settings.ANN_IVF_NAMESPACES
+        }
+        self.vector_search.backends.update(self.ann_backends)
 
     async def search(
         self,
@@ -33,16 +71,54 @@ class HybridSearch:
         kw: float = 0.3,
     ) -> list[dict[str, Any]]:
         """Búsqueda principal."""
-        emb = await self.embedding_service.embed_query(query)
-        v_res, k_res = await asyncio.gather(
-            self.vector_search.search(emb, limit * 2, chat_id, namespace),
-            self.keyword_search.search(query, limit * 2, chat_id, namespace),
+        results = await self.search_multi(
+            query, [(namespace, chat_id, limit)], rrf_k, vw, kw
         )
-        rrf = self._merge_rrf(v_res, k_res, rrf_k, vw, kw)
-        sorted_ids = sorted(rrf.items(), key=lambda x: x[1], reverse=True)[:limit]
-        if not sorted_ids:
+        return results[0]
+
+    async def search_multi(
+        self,
+        query: str,
+        scopes: list[tuple[str, str | None, int]],
+        rrf_k: int = 60,
+        vw: float = 0.7,
+        kw: float = 0.3,
+    ) -> list[list[dict[str, Any]]]:
+        """
+        Búsqueda sobre varios ámbitos (namespace, chat_id, limit) a la vez.
+
+        Embebe la consulta una sola vez, lanza las patas vectorial y FTS de
+        todos los ámbitos en paralelo e hidrata todos los ids en una consulta.
+        Retorna una lista de resultados por ámbito, en el orden recibido.
+        """
+        if not scopes:
             return []
-        return await self._hydrate([it[0] for it in sorted_ids], sorted_ids)
+        emb = await self.embedding_service.embed_query(query)
+        legs = await asyncio.gather(
+            *(
+                self.vector_search.search(emb, limit * 2, chat_id, namespace)
+                for namespace, chat_id, limit in scopes
+            ),
+            *(
+                self.keyword_search.search(query, limit * 2, chat_id, namespace)
+                for namespace, chat_id, limit in scopes
+            ),
+        )
+        v_legs, k_legs = legs[: len(scopes)], legs[len(scopes) :]
+
+        ranked: list[list[tuple[int, float]]] = []
+        for (_, _, limit), v_res, k_res in zip(scopes, v_legs, k_legs, strict=True):
+            rrf = self._merge_rrf(v_res, k_res, rrf_k, vw, kw)
+            ranked.append(sorted(rrf.items(), key=lambda x: x[1], reverse=True)[:limit])
+
+        ids = list(dict.fromkeys(mid for scope in ranked for mid, _ in scope))
+        if not ids:
+            return [[] for _ in scopes]
+        rows = await self._hydrate(ids)
+        return [
+            [{**rows[mid], "score": score} for mid, score in scope if mid in rows]
+            for scope in ranked
+        ]
 
     async def search_by_type(
         self,
@@ -52,9 +128,8 @@ class HybridSearch:
         namespace: str = "user",
     ) -> list[dict[str, Any]]:
         """Búsqueda por tipo."""
-        db = await self.store.get_db()
         sql = (
-            "SELECT id, content, memory_type, metadata, chat_id "
+            f"SELECT {_MEMORY_COLUMNS} "
             "FROM memories WHERE memory_type = ? AND is_active = 1"
         )
         params: list[Any] = [memory_type]
@@ -68,17 +143,8 @@ class HybridSearch:
         sql += " ORDER BY created_at DESC LIMIT ?"
         params.append(limit)
 
-        async with db.execute(sql, params) as cursor:
-            return [
-                {
-                    "id": r[0],
-                    "content": r[1],
-                    "memory_type": r[2],
-                    "metadata": json.loads(r[3]),
-                    "chat_id": r[4],
-                }
-                for r in await cursor.fetchall()
-            ]
+        async with self.store.reader() as db, db.execute(sql, params) as cursor:
+            return [_row_to_memory(r) for r in await cursor.fetchall()]
 
     def _merge_rrf(
         self, v: list, k: list, k_val: int, vw: float, kw: float
@@ -91,28 +157,12 @@ class HybridSearch:
             scores[mid] = scores.get(mid, 0.0) + (kw * (1.0 / (k_val + r)))
         return scores
 
-    async def _hydrate(
-        self, ids: list[int], sorted_ids: list[tuple[int, float]]
-    ) -> list[dict[str, Any]]:
+    async def _hydrate(self, ids: list[int]) -> dict[int, dict[str, Any]]:
         """Carga de SQLite."""
-        db = await self.store.get_db()
         m = ",".join(["?"] * len(ids))
         sql = (
-            "SELECT id, chat_id, content, memory_type, metadata "
+            f"SELECT {_MEMORY_COLUMNS} "
             f"FROM memories WHERE id IN ({m}) AND is_active = 1"
         )  # noqa: S608
-        res = []
-        async with db.execute(sql, ids) as cursor:
-            rows = {r["id"]: r for r in await cursor.fetchall()}
-            for mid, score in sorted_ids:
-                if mid in rows:
-                    r = rows[mid]
-                    res.append({
-                        "id": r["id"],
-                        "content": r["content"],
-                        "memory_type": r["memory_type"],
-                        "metadata": json.loads(r["metadata"]),
-                        "score": score,
-                        "chat_id": r["chat_id"],
-                    })
-        return res
+        async with self.store.reader() as db, db.execute(sql, ids) as cursor:
+            return {r["id"]: _row_to_memory(r) for r in await cursor.fetchall()}
@@ -5,26 +5,50 @@ Ingestion pipeline for processing and storing memories.
 Orchestrates Chunker, Deduplicator, EmbeddingService, and SQLiteStore.
 """
 
+import itertools
 import logging
+import time
+from dataclasses import dataclass
 
-from src.memory.chunker import RecursiveChunker
+from src.memory.chunker import Chunk, RecursiveChunker
 from src.memory.deduplicator import Deduplicator
 from src.memory.embeddings import EmbeddingService
 from src.memory.sqlite_store import SQLiteStore
 
 logger = logging.getLogger(__name__)
 
+_PROVENANCE_KEYS = ("source_type", "confidence", "sensitivity", "evidence")
+
+
+@dataclass
+class FileDiff:
+    """Resultado de una re-ingesta diferencial de archivo."""
+
+    reused: int = 0
+    inserted: int = 0
+    removed: int = 0
+    # Chunks cuyo contenido ya pertenece a otro archivo (no se almacenan aquí)
+    shared: int = 0
+
+    @property
+    def chunks(self) -> int:
+        """Chunks del archivo presentes tras aplicar el diff."""
+        return self.reused + self.inserted
+
 
 class IngestionPipeline:
     """
     Orquestador del pipeline de ingestión de memoria.
     """
 
+    # Chunks escritos por transacción
+    batch_size = 200
+
     def __init__(self, store: SQLiteStore):
         self.store = store
         self.chunker = RecursiveChunker()
         self.deduplicator = Deduplicator()
-        self.embedding_service = EmbeddingService()
+        self.embedding_service = EmbeddingService(store=store)
 
     async def process_text(
         self,
@@ -52,24 +76,109 @@ class IngestionPipeline:
 
         metadata = metadata or {}
 
-        # 1. Chunking
-        chunks = self.chunker.chunk(text, metadata)
-        if not chunks:
-            return 0
-
+        # 1. Chunking en streaming: cada ventana de `batch_size` chunks pasa
+        # por dedupe -> embedding -> storage antes de generar la siguiente
         new_chunks_count = 0
+        for window in itertools.batched(
+            self.chunker.iter_chunks(text, metadata), self.batch_size, strict=False
+        ):
+            new_chunks_count += await self._ingest_window(
+                chat_id, memory_type, namespace, window
+            )
 
-        # 2. Filtrar duplicados y preparar para inserción
-        to_embed = []
-        for chunk in chunks:
-            content_hash = self.deduplicator.generate_hash(chunk.content)
-
-            # Verificar si ya existe en la DB
-            if not await self.store.hash_exists(content_hash):
-                to_embed.append((chunk, content_hash))
-            else:
-                logger.debug(f"Skipping duplicate chunk with hash {content_hash}")
+        logger.info(f"Ingested {new_chunks_count} new chunks for chat {chat_id}")
+        return new_chunks_count
 
+    async def update_file(
+        self,
+        chat_id: str,
+        text: str,
+        filename: str,
+        memory_type: str = "document",
+        namespace: str = "global",
+        metadata: dict | None = None,
+    ) -> FileDiff:
+        """
+        Re-ingesta diferencial de un archivo.
+
+        Re-chunkea el texto y compara los hashes con las filas existentes del
+        archivo: los chunks presentes se reutilizan (reactivándolos si
+        estaban inactivos), solo los nuevos se embeben y los desaparecidos se
+        desactivan, todo en una transacción. Los chunks reutilizados
+        conservan los metadatos de su ingesta original; los que ya almacena
+        otro archivo se cuentan aparte y no se duplican.
+        """
+        metadata = {**(metadata or {}), "filename": filename}
+        chunks: dict[str, Chunk] = {}
+        for chunk in self.chunker.iter_chunks(text, metadata):
+            chunks.setdefault(self.deduplicator.generate_hash(chunk.content), chunk)
+
+        existing = await self.store.file_chunk_hashes(filename, namespace)
+        fresh = [h for h in chunks if h not in existing]
+        # Contenido idéntico ya almacenado por otro archivo (hash único)
+        taken = await self.store.existing_hashes(fresh)
+        to_embed = [(chunks[h], h) for h in fresh if h not in taken]
+        activate = [
+            mid for h, (mid, active) in existing.items() if h in chunks and not active
+        ]
+        deactivate = [
+            mid for h, (mid, active) in existing.items() if h not in chunks and active
+        ]
+
+        embeddings = await self.embedding_service.embed_texts([
+            chunk.content for chunk, _ in to_embed
+        ])
+        records = self._to_records(list(zip(to_embed, embeddings, strict=True)))
+        start = time.monotonic()
+        ids = await self.store.apply_file_diff(
+            chat_id, memory_type, namespace, records, activate, deactivate
+        )
+
+        diff = FileDiff(
+            reused=len(chunks) - len(fresh),
+            inserted=len(ids),
+            removed=len(deactivate),
+            # Incluye los que otro proceso insertó entre la consulta y la escritura
+            shared=len(fresh) - len(ids),
+        )
+        logger.info(
+            "File diff %s: %d reused, %d re-embedded, %d owned by another file, "
+            "%d removed (%.1fms)",
+            filename,
+            diff.reused,
+            diff.inserted,
+            diff.shared,
+            diff.removed,
+            (time.monotonic() - start) * 1000,
+            extra={"event": "ingestion_file_diff", "namespace": namespace},
+        )
+        return diff
+
+    async def _ingest_window(
+        self,
+        chat_id: str,
+        memory_type: str,
+        namespace: str,
+        chunks: tuple[Chunk, ...],
+    ) -> int:
+        """Dedupe, embedding y escritura de una ventana de chunks."""
+        # 2. Resolver duplicados con una sola consulta IN (...)
+        # (dict preserva el orden y descarta chunks repetidos en la ventana;
+        # los de ventanas anteriores ya están en la base)
+        hashed = {
+            self.deduplicator.generate_hash(chunk.content): chunk for chunk in chunks
+        }
+        start = time.monotonic()
+        existing = await self.store.existing_hashes(list(hashed))
+        lookup_ms = (time.monotonic() - start) * 1000
+
+        to_embed = [(c, h) for h, c in hashed.items() if h not in existing]
+        logger.debug(
+            "Hash lookup: %d chunks, %d duplicates (%.1fms)",
+            len(hashed),
+            len(existing),
+            lookup_ms,
+        )
         if not to_embed:
             return 0
 
@@ -77,36 +186,54 @@ class IngestionPipeline:
         texts_to_embed = [item[0].content for item in to_embed]
         embeddings = await self.embedding_service.embed_texts(texts_to_embed)
 
-        # 4. Storage
-        for (chunk, content_hash), embedding in zip(to_embed, embeddings, strict=False):
-            try:
-                # Extract provenance from chunk metadata (if provided)
-                chunk_meta = chunk.metadata or {}
-                provenance = {
-                    k: chunk_meta.pop(k)
-                    for k in ("source_type", "confidence", "sensitivity", "evidence")
-                    if k in chunk_meta
-                }
-
-                # Insertar memoria de texto
-                memory_id = await self.store.insert_memory(
-                    chat_id=chat_id,
-                    content=chunk.content,
-                    content_hash=content_hash,
-                    memory_type=memory_type,
-                    namespace=namespace,
-                    metadata=chunk_meta,
-                    **provenance,
-                )
-
-                # Insertar vector
-                if memory_id != -1:
-                    await self.store.insert_vector(memory_id, embedding)
-                    new_chunks_count += 1
-
-            except Exception as e:
-                logger.error(f"Error processing chunk: {e}")
-                continue
+        # 4. Storage transaccional
+        batch = list(zip(to_embed, embeddings, strict=False))
+        return await self._store_batch(chat_id, memory_type, namespace, batch)
 
-        logger.info(f"Ingested {new_chunks_count} new chunks for chat {chat_id}")
-        return new_chunks_count
+    async def _store_batch(
+        self,
+        chat_id: str,
+        memory_type: str,
+        namespace: str,
+        batch: list[tuple[tuple[Chunk, str], list[float]]],
+    ) -> int:
+        """Escribe un lote de chunks (memorias + vectores) en una transacción."""
+        records = self._to_records(batch)
+        start = time.monotonic()
+        try:
+            ids = await self.store.insert_memories_batch(
+                chat_id, memory_type, namespace, records
+            )
+        except Exception as e:
+            logger.error(f"Error storing chunk batch: {e}")
+            return 0
+
+        logger.info(
+            "Batch stored: %d/%d chunks in %.1fms",
+            len(ids),
+            len(records),
+            (time.monotonic() - start) * 1000,
+            extra={"event": "ingestion_batch", "namespace": namespace},
+        )
+        return len(ids)
+
+    @staticmethod
+    def _to_records(
+        batch: list[tuple[tuple[Chunk, str], list[float]]],
+    ) -> list[dict]:
+        """Registros para el repositorio, con la procedencia fuera de metadata."""
+        records = []
+        for (chunk, content_hash), embedding in batch:
+            # Extract provenance from chunk metadata (if provided)
+            chunk_meta = chunk.metadata or {}
+            provenance = {
+                k: chunk_meta.pop(k) for k in _PROVENANCE_KEYS if k in chunk_meta
+            }
+            records.append({
+                "content": chunk.content,
+                "content_hash": content_hash,
+                "metadata": chunk_meta,
+                "embedding": embedding,
+                **provenance,
+            })
+        return records
@@ -0,0 +1,249 @@
+# src/memory/ivf_index.py
+"""
+Índice ANN IVF (inverted file) en NumPy puro.
+
+Un cuantizador grueso k-means reparte los vectores en `nlist` listas; una
+búsqueda solo examina las `nprobe` listas más cercanas a la consulta. Con
+`pq_m > 0` los vectores se guardan como códigos de product quantization
+(`pq_m` bytes por vector) y la distancia se aproxima con tablas ADC.
+
+El índice es síncrono y sin E/S de base de datos; `ann_backend` lo conecta
+con SQLite y lo persiste junto a la DB.
+"""
+
+import logging
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Máximo de vectores usados para entrenar k-means (muestra aleatoria)
+_TRAIN_SAMPLE_PER_CENTROID = 256
+
+
+def kmeans(
+    x: np.ndarray, k: int, iters: int = 20, rng: np.random.Generator | None = None
+) -> np.ndarray:
+    """k-means de Lloyd con distancias L2 vectorizadas. Retorna (k, d)."""
+    rng = rng or np.random.default_rng(0)
+    k = max(1, min(k, x.shape[0]))
+    centroids = x[rng.choice(x.shape[0], k, replace=False)].copy()
+
+    for _ in range(iters):
+        assign = _nearest(x, centroids)
+        counts = np.bincount(assign, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, x)
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        # Centroides vacíos se re-siembran con puntos aleatorios
+        if empty.any():
+            centroids[empty] = x[rng.choice(x.shape[0], int(empty.sum()))]
+    return centroids
+
+
+def _nearest(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Índice del centroide más cercano para cada fila de x."""
+    c_norms = np.einsum("ij,ij->i", centroids, centroids)
+    return np.asarray(np.argmin(c_norms - 2.0 * (x @ centroids.T), axis=1))
+
+
+class ProductQuantizer:
+    """Product quantization: `m` subespacios con hasta 256 centroides cada uno."""
+
+    def __init__(self, m: int) -> None:
+        self.m = m
+        self.codebooks: np.ndarray = np.empty((0, 0, 0), dtype=np.float32)
+
+    def train(self, x: np.ndarray, rng: np.random.Generator) -> None:
+        d = x.shape[1]
+        if d % self.m:
+            raise ValueError(f"Dimension {d} is not divisible by pq_m={self.m}")
+        dsub = d // self.m
+        ksub = min(256, x.shape[0])
+        self.codebooks = np.stack([
+            kmeans(x[:, j * dsub : (j + 1) * dsub], ksub, rng=rng)
+            for j in range(self.m)
+        ]).astype(np.float32)
+
+    def encode(self, x: np.ndarray) -> np.ndarray:
+        dsub = self.codebooks.shape[2]
+        codes = np.empty((x.shape[0], self.m), dtype=np.uint8)
+        for j in range(self.m):
+            codes[:, j] = _nearest(x[:, j * dsub : (j + 1) * dsub], self.codebooks[j])
+        return codes
+
+    def distances(self, query: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Distancia L2² asimétrica (ADC): consulta exacta contra códigos."""
+        sub = query.reshape(self.m, 1, -1)
+        table = ((self.codebooks - sub) ** 2).sum(axis=2)  # (m, ksub)
+        return np.asarray(table[np.arange(self.m), codes].sum(axis=1))
+
+
+class IVFIndex:
+    """
+    Índice IVF con adiciones incrementales y borrado lógico.
+
+    Las filas se almacenan en arreglos planos; cada lista invertida guarda
+    las posiciones de sus filas. Reentrenar (`train`) compacta los borrados.
+    """
+
+    def __init__(self, nlist: int = 0, pq_m: int = 0, seed: int = 0) -> None:
+        self.nlist = nlist
+        self.pq = ProductQuantizer(pq_m) if pq_m else None
+        self._rng = np.random.default_rng(seed)
+        self.centroids: np.ndarray = np.empty((0, 0), dtype=np.float32)
+        self.ids: np.ndarray = np.empty(0, dtype=np.int64)
+        self.chat_ids: np.ndarray = np.empty(0, dtype=str)
+        self.assign: np.ndarray = np.empty(0, dtype=np.int64)
+        self.alive: np.ndarray = np.empty(0, dtype=bool)
+        self.payload: np.ndarray = np.empty((0, 0), np.float32)  # floats o códigos PQ
+        self._lists: list[np.ndarray] = []
+        self._pos: dict[int, int] = {}
+        self.trained_size = 0
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids.size > 0
+
+    def __len__(self) -> int:
+        return int(self.alive.sum())
+
+    def train(self, ids: np.ndarray, vectors: np.ndarray, chat_ids: np.ndarray) -> None:
+        """Entrena cuantizadores sobre el corpus completo y lo indexa."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        n = vectors.shape[0]
+        nlist = self.nlist or max(1, int(np.sqrt(n)))
+        sample = vectors
+        limit = nlist * _TRAIN_SAMPLE_PER_CENTROID
+        if n > limit:
+            sample = vectors[self._rng.choice(n, limit, replace=False)]
+
+        self.centroids = kmeans(sample, nlist, rng=self._rng).astype(np.float32)
+        if self.pq is not None:
+            self.pq.train(sample, self._rng)
+
+        self.ids = np.empty(0, dtype=np.int64)
+        self.chat_ids = np.empty(0, dtype=str)
+        self.assign = np.empty(0, dtype=np.int64)
+        self.alive = np.empty(0, dtype=bool)
+        self.payload = np.empty((0, 0), dtype=np.float32)
+        self._pos = {}
+        self.add(ids, vectors, chat_ids)
+        self.trained_size = n
+
+    def add(self, ids: np.ndarray, vectors: np.ndarray, chat_ids: np.ndarray) -> None:
+        """Añade filas nuevas (o reemplaza ids existentes) sin reentrenar."""
+        if not self.is_trained:
+            raise RuntimeError("IVFIndex must be trained before adding vectors")
+        if not len(ids):
+            return
+        self.remove(ids)
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        payload = self.pq.encode(vectors) if self.pq is not None else vectors
+
+        start = self.ids.shape[0]
+        self.ids = np.concatenate([self.ids, ids.astype(np.int64)])
+        self.chat_ids = np.concatenate([self.chat_ids, chat_ids.astype(str)])
+        self.assign = np.concatenate([self.assign, _nearest(vectors, self.centroids)])
+        self.alive = np.concatenate([self.alive, np.ones(len(ids), dtype=bool)])
+        self.payload = (
+            payload if start == 0 else np.concatenate([self.payload, payload])
+        )
+        for offset, mid in enumerate(ids.tolist()):
+            self._pos[int(mid)] = start + offset
+        self._rebuild_lists()
+
+    def remove(self, ids: np.ndarray | list[int]) -> int:
+        """Borrado lógico; las filas se compactan al reentrenar."""
+        removed = 0
+        for mid in np.asarray(ids).tolist():
+            pos = self._pos.pop(int(mid), None)
+            if pos is not None:
+                self.alive[pos] = False
+                removed += 1
+        return removed
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        nprobe: int = 8,
+        chat_id: str | None = None,
+    ) -> list[tuple[int, float]]:
+        """Top-k aproximado: (memory_id, distancia L2) ordenado ascendente."""
+        if not self.is_trained or not len(self):
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        nprobe = max(1, min(nprobe, self.centroids.shape[0]))
+        c_dists = ((self.centroids - query) ** 2).sum(axis=1)
+        probe = np.argpartition(c_dists, nprobe - 1)[:nprobe]
+
+        rows = np.concatenate([self._lists[p] for p in probe])
+        rows = rows[self.alive[rows]]
+        if chat_id:
+            rows = rows[self.chat_ids[rows] == chat_id]
+        if not rows.size:
+            return []
+
+        if self.pq is not None:
+            dists = self.pq.distances(query, self.payload[rows])
+        else:
+            diff = self.payload[rows] - query
+            dists = np.einsum("ij,ij->i", diff, diff)
+
+        k = min(k, rows.size)
+        top = np.argpartition(dists, k - 1)[:k]
+        top = top[np.argsort(dists[top])]
+        return [(int(self.ids[rows[i]]), float(np.sqrt(dists[i]))) for i in top]
+
+    def _rebuild_lists(self) -> None:
+        order = np.argsort(self.assign, kind="stable")
+        bounds = np.searchsorted(
+            self.assign[order], np.arange(self.centroids.shape[0] + 1)
+        )
+        self._lists = [
+            order[bounds[i] : bounds[i + 1]] for i in range(self.centroids.shape[0])
+        ]
+
+    # === Persistencia ===
+
+    def save(self, path: Path) -> None:
+        """Escritura atómica en formato .npz (sin pickle)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp.npz")
+        np.savez(
+            tmp,
+            centroids=self.centroids,
+            ids=self.ids,
+            chat_ids=self.chat_ids.astype(str),
+            assign=self.assign,
+            alive=self.alive,
+            payload=self.payload,
+            codebooks=self.pq.codebooks if self.pq is not None else np.empty(0),
+            meta=np.array([self.nlist, self.pq.m if self.pq else 0, self.trained_size]),
+        )
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "IVFIndex":
+        with np.load(path, allow_pickle=False) as data:
+            nlist, pq_m, trained_size = (int(v) for v in data["meta"])
+            index = cls(nlist=nlist, pq_m=pq_m)
+            index.centroids = data["centroids"]
+            index.ids = data["ids"]
+            index.chat_ids = data["chat_ids"]
+            index.assign = data["assign"]
+            index.alive = data["alive"]
+            index.payload = data["payload"]
+            if index.pq is not None:
+                index.pq.codebooks = data["codebooks"]
+        index.trained_size = trained_size
+        index._pos = {
+            int(mid): pos
+            for pos, mid in enumerate(index.ids.tolist())
+            if index.alive[pos]
+        }
+        index._rebuild_lists()
+        return index
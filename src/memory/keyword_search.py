@@ -2,17 +2,41 @@
 """
 Keyword search module using SQLite FTS5.
 
-Implements full-text search for exact and prefix matching.
+Las consultas se construyen por IDF: de los términos del mensaje se conservan
+los más selectivos (menor frecuencia documental según `memories_fts_vocab`),
+unidos con OR y ordenados por BM25. Un mensaje largo de Telegram ya no exige
+que aparezcan todos sus términos ni recorre las listas de los más comunes.
 """
 
+from __future__ import annotations
+
 import logging
 import re
-from typing import Any
+import unicodedata
+from typing import TYPE_CHECKING, Any
 
 from src.memory.sqlite_store import SQLiteStore
 
+if TYPE_CHECKING:
+    import aiosqlite
+
 logger = logging.getLogger(__name__)
 
+# Términos candidatos por consulta (un mensaje largo se recorta) y términos
+# que llegan al MATCH
+_MAX_CANDIDATES = 32
+_MAX_TERMS = 6
+# Desde esta longitud el término se busca como prefijo (plurales, flexiones)
+_PREFIX_MIN_LEN = 5
+# Letras y dígitos: unicode61 también separa en "_"
+_TERM_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def _fold(text: str) -> str:
+    """Minúsculas sin diacríticos, como el tokenizer `remove_diacritics 2`."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
 
 class KeywordSearch:
     """
@@ -23,30 +47,42 @@ class KeywordSearch:
         self.store = store
 
     @staticmethod
-    def _sanitize_fts5_query(query: str) -> str:
-        """
-        Escapa caracteres especiales para FTS5 MATCH.
-        Enfocado en robustez para consultas de chat.
-        """
-        # 1. Eliminar caracteres que FTS5 interpreta como operadores
-        # Mantenemos letras, números y espacios.
-        sanitized = re.sub(r"[^\w\s]", " ", query, flags=re.UNICODE)
-
-        # 2. Colapsar espacios múltiples
-        sanitized = re.sub(r"\s+", " ", sanitized).strip()
-
-        if not sanitized:
-            return ""
+    def _query_terms(query: str) -> list[str]:
+        """Términos únicos normalizados (>= 2 caracteres), en orden de aparición."""
+        terms = (_fold(t) for t in _TERM_RE.findall(query))
+        unique = dict.fromkeys(t for t in terms if len(t) >= 2)
+        return list(unique)[:_MAX_CANDIDATES]
 
-        # 3. Envolver cada término en comillas para búsqueda literal.
-        # SQLite FTS5 maneja bien "termino1" "termino2" como AND implícito.
-        terms = [f'"{t}"' for t in sanitized.split() if len(t) >= 2]
-
-        if not terms:
-            return ""
+    @staticmethod
+    def _match_expression(terms: list[str]) -> str:
+        """Términos entre comillas (literales para FTS5) unidos con OR."""
+        return " OR ".join(
+            f'"{t}"*' if len(t) >= _PREFIX_MIN_LEN else f'"{t}"' for t in terms
+        )
 
-        # Unimos con espacios (AND implícito en FTS5).
-        return " ".join(terms)
+    @staticmethod
+    async def _document_frequency(db: aiosqlite.Connection, term: str) -> int:
+        """Documentos con el término (o con el prefijo, si se busca como tal)."""
+        if len(term) >= _PREFIX_MIN_LEN:
+            sql = (
+                "SELECT COALESCE(SUM(doc), 0) FROM memories_fts_vocab "
+                "WHERE term >= ? AND term < ?"
+            )
+            params: tuple[str, ...] = (term, term + "\U0010ffff")
+        else:
+            sql = "SELECT COALESCE(SUM(doc), 0) FROM memories_fts_vocab WHERE term = ?"
+            params = (term,)
+        async with db.execute(sql, params) as cursor:
+            row = await cursor.fetchone()
+            return int(row[0]) if row else 0
+
+    async def _selective_terms(
+        self, db: aiosqlite.Connection, terms: list[str]
+    ) -> list[str]:
+        """Los `_MAX_TERMS` términos presentes con menor frecuencia documental."""
+        frequencies = {t: await self._document_frequency(db, t) for t in terms}
+        present = [t for t in terms if frequencies[t] > 0]
+        return sorted(present, key=frequencies.__getitem__)[:_MAX_TERMS]
 
     async def search(
         self,
@@ -56,58 +92,35 @@ class KeywordSearch:
         namespace: str = "user",
     ) -> list[tuple[int, float]]:
         """
-        Realiza una búsqueda FTS5.
-        """
-        if not query_text or not query_text.strip():
-            return []
-
-        # Sanitizar la entrada del usuario antes de pasarla a MATCH
-        sanitized_query = self._sanitize_fts5_query(query_text)
-        if not sanitized_query:
-            return []
-
-        db = await self.store.get_db()
+        Realiza una búsqueda FTS5 con los términos más selectivos.
 
-        # SQL para FTS5
-        # rank es el score BM25 (negativo por defecto, más negativo es mejor)
-        # Usamos rowid para identificar la memoria
-
-        query = """
-            SELECT
-                rowid,
-                rank
-            FROM memories_fts
-            WHERE memories_fts MATCH ?
-        """
-        params: list[Any] = [sanitized_query]
-
-        # Filtros adicionales requieren JOIN con memories si no están en la tabla FTS
-        # Como no están en la tabla virtual, unimos:
-
-        query = """
-            SELECT
-                m.id,
-                f.rank
-            FROM memories_fts f
-            JOIN memories m ON f.rowid = m.id
-            WHERE f.content MATCH ?
+        Retorna (memory_id, rank BM25); más negativo es mejor.
         """
+        terms = self._query_terms(query_text or "")
+        if not terms:
+            return []
 
+        # chat_id/namespace son columnas UNINDEXED de memories_fts: el filtro
+        # ocurre dentro de FTS, sin JOIN con memories
+        query = "SELECT rowid, rank FROM memories_fts WHERE memories_fts MATCH ?"
+        filters: list[Any] = []
         if chat_id:
-            query += " AND m.chat_id = ?"
-            params.append(chat_id)
-
+            query += " AND chat_id = ?"
+            filters.append(chat_id)
         if namespace:
-            query += " AND m.namespace = ?"
-            params.append(namespace)
-
+            query += " AND namespace = ?"
+            filters.append(namespace)
         query += " ORDER BY rank LIMIT ?"
-        params.append(limit)
 
         try:
-            async with db.execute(query, params) as cursor:
-                rows = await cursor.fetchall()
-                return [(row[0], row[1]) for row in rows]
+            async with self.store.reader() as db:
+                selected = await self._selective_terms(db, terms)
+                if not selected:
+                    return []
+                params = [self._match_expression(selected), *filters, limit]
+                async with db.execute(query, params) as cursor:
+                    rows = await cursor.fetchall()
+                    return [(row[0], row[1]) for row in rows]
         except Exception as e:
             logger.error(f"Error in keyword search: {e}")
             return []
@@ -46,19 +46,18 @@ class KnowledgeAuditor:
         """
         Retorna el inventario de documentos globales con estadísticas.
         """
-        db = await self.store.get_db()
         query = """
             SELECT
-                json_extract(metadata, '$.filename') as filename,
+                filename,
                 COUNT(*) as chunk_count,
                 MAX(created_at) as last_sync
             FROM memories
             WHERE namespace = 'global' AND is_active = 1
-            GROUP BY json_extract(metadata, '$.filename')
+            GROUP BY filename
             ORDER BY last_sync DESC
         """
         results = []
-        async with db.execute(query) as cursor:
+        async with self.store.reader() as db, db.execute(query) as cursor:
             rows = await cursor.fetchall()
             for row in rows:
                 results.append({
@@ -70,17 +69,15 @@ class KnowledgeAuditor:
 
     async def get_global_stats(self) -> dict[str, Any]:
         """Retorna estadísticas globales del conocimiento."""
-        db = await self.store.get_db()
         query = """
             SELECT
-                COUNT(DISTINCT json_extract(metadata, '$.filename'))
-                    as total_documents,
+                COUNT(DISTINCT filename) as total_documents,
                 COUNT(*) as total_chunks,
                 MAX(created_at) as last_sync
             FROM memories
             WHERE namespace = 'global' AND is_active = 1
         """
-        async with db.execute(query) as cursor:
+        async with self.store.reader() as db, db.execute(query) as cursor:
             row = await cursor.fetchone()
             if not row:
                 return {
@@ -1,24 +1,47 @@
 # src/memory/knowledge_base.py
+"""
+Bóveda de Conocimiento Estructurado.
+
+Redis guarda la bóveda completa; SQLite la guarda normalizada en
+`knowledge_facts` (un hecho por categoría y clave de identidad) y
+`knowledge_vaults` (campos escalares). Cada hecho tiene su propia memoria
+'fact' embebida: al guardar solo se embeben los hechos nuevos o cambiados.
+"""
+
+import hashlib
 import json
 import logging
+import time
 from datetime import datetime
 from typing import Any
 
 from src.core.dependencies import get_sqlite_store
-from src.memory.ingestion_pipeline import IngestionPipeline
+from src.memory.embeddings import EmbeddingService
+from src.memory.fact_utils import FACT_CATEGORIES, fact_text, get_identity_key
 from src.memory.json_sanitizer import safe_json_loads
+from src.memory.sqlite_store import SQLiteStore
 
 logger = logging.getLogger(__name__)
 
 
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
 class KnowledgeBaseManager:
     """
     Gestiona la Bóveda de Conocimiento Estructurado.
     """
 
     def __init__(self) -> None:
+        self._embedding_service: EmbeddingService | None = None
         logger.info("KnowledgeBaseManager initialized")
 
+    def _embedder(self, store: SQLiteStore) -> EmbeddingService:
+        if self._embedding_service is None:
+            self._embedding_service = EmbeddingService(store=store)
+        return self._embedding_service
+
     def _get_default_knowledge(self) -> dict[str, Any]:
         """Estructura base de la Bóveda de Conocimiento."""
         return {
@@ -56,18 +79,23 @@ class KnowledgeBaseManager:
                     "Error cargando conocimiento de Redis para %s: %s", chat_id, e
                 )
 
-        # 2. Intentar desde SQLite
+        # 2. Intentar desde SQLite (tablas normalizadas)
         try:
+            store = get_sqlite_store()
+            kb_data = await store.knowledge_repo.load(chat_id)
+            if kb_data:
+                return kb_data
+
+            # Bóvedas guardadas antes de knowledge_facts: JSON completo como
+            # memoria 'fact'. Se normalizan en el siguiente guardado.
             from src.memory.hybrid_search import HybridSearch
 
-            store = get_sqlite_store()
-            search = HybridSearch(store)
-            results = await search.search_by_type(
+            results = await HybridSearch(store).search_by_type(
                 memory_type="fact", limit=1, chat_id=chat_id, namespace="user"
             )
             if results:
                 kb_data = safe_json_loads(results[0]["content"])
-                if kb_data:
+                if isinstance(kb_data, dict):
                     return kb_data
         except Exception as e:
             logger.error(
@@ -91,27 +119,123 @@ class KnowledgeBaseManager:
 
             # 2. Sincronización con SQLite
             try:
-                store = get_sqlite_store()
-                pipeline = IngestionPipeline(store)
-
-                await pipeline.process_text(
-                    chat_id=chat_id,
-                    text=payload,
-                    memory_type="fact",
-                    metadata={
-                        "source": "knowledge_base",
-                        "type": "structured",
-                        "source_type": "explicit",
-                        "sensitivity": "medium",
-                    },
-                )
-                logger.debug("Knowledge Base synchronized with SQLite for %s", chat_id)
+                await self._sync_to_sqlite(get_sqlite_store(), chat_id, knowledge)
             except Exception as se:
                 logger.warning("Error synchronizing Knowledge Base with SQLite: %s", se)
 
         except Exception as e:
             logger.error("Error guardando conocimiento para %s: %s", chat_id, e)
 
+    @staticmethod
+    def _flatten(knowledge: dict[str, Any]) -> dict[tuple[str, str], dict[str, Any]]:
+        """(categoría, clave de identidad) -> hecho, posición y hash del JSON."""
+        facts: dict[tuple[str, str], dict[str, Any]] = {}
+        for category in FACT_CATEGORIES:
+            for item in knowledge.get(category) or []:
+                if not isinstance(item, dict):
+                    continue
+                key = get_identity_key(item, category)
+                data = json.dumps(item, ensure_ascii=False, sort_keys=True)
+                # Claves repetidas: prevalece la última, en la primera posición
+                position = (
+                    facts[category, key]["position"]
+                    if (category, key) in facts
+                    else len(facts)
+                )
+                facts[category, key] = {
+                    "category": category,
+                    "identity_key": key,
+                    "position": position,
+                    "item": item,
+                    "data": data,
+                    "data_hash": _sha256(data),
+                }
+        return facts
+
+    async def _sync_to_sqlite(
+        self, store: SQLiteStore, chat_id: str, knowledge: dict[str, Any]
+    ) -> None:
+        """
+        Guarda la diferencia de la bóveda contra lo almacenado: solo los hechos
+        con contenido nuevo se embeben; los movidos solo cambian de posición y
+        los eliminados desactivan su memoria.
+        """
+        start = time.monotonic()
+        facts = self._flatten(knowledge)
+        stored = await store.knowledge_repo.fact_hashes(chat_id)
+
+        upserts: list[dict[str, Any]] = []
+        records: dict[str, dict[str, Any]] = {}
+        retired: list[int] = []
+        for ident, fact in facts.items():
+            previous = stored.get(ident)
+            if previous and previous.data_hash == fact["data_hash"]:
+                if previous.position != fact["position"]:
+                    upserts.append(fact)
+                continue
+            text = fact_text(fact["category"], fact["item"])
+            fact["content_hash"] = _sha256(f"{chat_id}:{text}")
+            records.setdefault(fact["content_hash"], self._to_record(fact, text))
+            upserts.append(fact)
+            if previous and previous.memory_id is not None:
+                retired.append(previous.memory_id)
+        removed = [ident for ident in stored if ident not in facts]
+        retired += [
+            memory_id
+            for ident in removed
+            if (memory_id := stored[ident].memory_id) is not None
+        ]
+
+        # Solo se embeben los textos que aún no tienen memoria
+        existing = await store.existing_hashes(list(records))
+        to_embed = [r for h, r in records.items() if h not in existing]
+        embeddings = await self._embedder(store).embed_texts([
+            r["content"] for r in to_embed
+        ])
+        for record, embedding in zip(to_embed, embeddings, strict=True):
+            record["embedding"] = embedding
+
+        header = {k: v for k, v in knowledge.items() if k not in FACT_CATEGORIES}
+        # Primera normalización: los JSON completos de la bóveda dejan de
+        # competir con los hechos en el RAG
+        inserted = await store.knowledge_repo.apply_changes(
+            chat_id,
+            header,
+            upserts,
+            removed,
+            list(records.values()),
+            retired,
+            retire_legacy=not stored,
+        )
+        logger.debug(
+            "Knowledge Base synchronized for %s: %d facts, %d changed, "
+            "%d removed, %d embedded (%.1fms)",
+            chat_id,
+            len(facts),
+            len(records),
+            len(removed),
+            inserted,
+            (time.monotonic() - start) * 1000,
+        )
+
+    @staticmethod
+    def _to_record(fact: dict[str, Any], text: str) -> dict[str, Any]:
+        item = fact["item"]
+        evidence = item.get("evidence")
+        return {
+            "content": text,
+            "content_hash": fact["content_hash"],
+            "metadata": {
+                "source": "knowledge_base",
+                "category": fact["category"],
+                "identity_key": fact["identity_key"],
+            },
+            "source_type": item.get("source_type") or "explicit",
+            "confidence": item.get("confidence", 1.0),
+            "sensitivity": item.get("sensitivity") or "medium",
+            "evidence": evidence if isinstance(evidence, str) else None,
+        }
+
     async def sync_to_cloud(self, chat_id: str, knowledge: dict[str, Any]) -> None:
         """OBSOLETO."""
         pass
@@ -4,30 +4,63 @@ import contextlib
 import logging
 from pathlib import Path
 
+from src.core.config import settings
 from src.memory.global_knowledge_loader import GlobalKnowledgeLoader
 
+try:
+    import watchfiles
+except ImportError:  # pragma: no cover - dependencia de uvicorn[standard]
+    watchfiles = None  # type: ignore[assignment]
+
 logger = logging.getLogger(__name__)
 
+# Sin eventos durante este tiempo, el lote agrupado se entrega
+_QUIET_MS = 300
+
+# Temporales de editores y descargas: su rename atómico al nombre final sí
+# genera evento, el archivo intermedio no dispara sincronización
+_TEMP_SUFFIXES = (".swp", ".swx", ".tmp", ".part", ".crdownload")
+
+
+def _is_candidate(name: str) -> bool:
+    return not (
+        name.startswith(".") or name.endswith("~") or name.endswith(_TEMP_SUFFIXES)
+    )
+
 
 class KnowledgeWatcher:
     """
     Vigilante de archivos de conocimiento base (Auto-Sync).
-    Detecta archivos nuevos, modificados o eliminados en storage/knowledge/
-    usando una estrategia de Async Polling.
+    Detecta archivos nuevos, modificados o eliminados en storage/knowledge/.
+
+    Usa eventos del sistema de archivos (inotify vía watchfiles) agrupados
+    con debounce; si no están disponibles o fallan, cae al Async Polling.
+    El estado conocido de cada archivo vive en el manifiesto persistido
+    (`knowledge_manifest`), compartido con el arranque: un reinicio no
+    provoca un re-escaneo completo.
     """
 
     def __init__(
-        self, loader: GlobalKnowledgeLoader, interval: int | float = 30
+        self,
+        loader: GlobalKnowledgeLoader,
+        interval: int | float | None = None,
+        use_events: bool | None = None,
+        debounce_ms: int | None = None,
     ) -> None:
         self.loader = loader
-        self.interval = interval
+        self.interval = interval or settings.KNOWLEDGE_POLL_SECONDS
+        self.use_events = (
+            settings.KNOWLEDGE_WATCH_EVENTS if use_events is None else use_events
+        )
+        self.debounce_ms = debounce_ms or settings.KNOWLEDGE_WATCH_DEBOUNCE_MS
         self.knowledge_path = loader.knowledge_path
-        self._file_snapshots: dict[str, float] = {}
+        self.mode: str | None = None
         self._watch_task: asyncio.Task | None = None
+        self._stop_event = asyncio.Event()
         self._is_running = False
 
     async def start(self) -> None:
-        """Inicia el loop de vigilancia en segundo plano."""
+        """Inicia la vigilancia en segundo plano."""
         if self._is_running:
             logger.warning("KnowledgeWatcher ya está en ejecución.")
             return
@@ -39,19 +72,17 @@ class KnowledgeWatcher:
             )
             return
 
-        # Snapshot inicial
-        self._update_snapshots()
-
         self._is_running = True
-        self._watch_task = asyncio.create_task(self._poll_loop())
-        logger.info(
-            f"KnowledgeWatcher iniciado. Monitoreando {self.knowledge_path} "
-            f"cada {self.interval}s"
-        )
+        self._stop_event.clear()
+        if self.use_events and watchfiles is not None:
+            self._watch_task = asyncio.create_task(self._event_loop())
+        else:
+            self._watch_task = asyncio.create_task(self._poll_loop())
 
     async def stop(self) -> None:
-        """Detiene el loop de vigilancia."""
+        """Detiene la vigilancia."""
         self._is_running = False
+        self._stop_event.set()
         if self._watch_task:
             self._watch_task.cancel()
             with contextlib.suppress(asyncio.CancelledError):
@@ -59,32 +90,46 @@ class KnowledgeWatcher:
             self._watch_task = None
         logger.info("KnowledgeWatcher detenido.")
 
-    def _get_current_files(self) -> dict[str, tuple[Path, float]]:
-        """Escanea el directorio y retorna los archivos válidos con su mtime."""
-        files: dict[str, tuple[Path, float]] = {}
-        if not self.knowledge_path.exists():
-            return files
-
-        for file_path in self.knowledge_path.glob("*"):
-            if file_path.is_dir() or file_path.name.startswith("."):
-                continue
+    def _watch_filter(self, change: "watchfiles.Change", path: str) -> bool:
+        """Solo archivos directos del directorio, sin temporales."""
+        p = Path(path)
+        return p.parent == self.knowledge_path.absolute() and _is_candidate(p.name)
 
-            should_process, _ = self.loader._should_process_file(file_path)
-            if should_process:
+    async def _event_loop(self) -> None:
+        """Sincroniza al recibir lotes de eventos; cae al polling si falla."""
+        self.mode = "events"
+        logger.info(
+            f"KnowledgeWatcher iniciado. Eventos de {self.knowledge_path} "
+            f"(debounce {self.debounce_ms}ms)"
+        )
+        try:
+            async for changes in watchfiles.awatch(
+                self.knowledge_path.absolute(),
+                watch_filter=self._watch_filter,
+                debounce=self.debounce_ms,
+                step=_QUIET_MS,
+                stop_event=self._stop_event,
+                recursive=False,
+            ):
+                logger.debug("Eventos de conocimiento: %d", len(changes))
                 try:
-                    files[file_path.name] = (file_path, file_path.stat().st_mtime)
-                except FileNotFoundError:
-                    continue
-
-        return files
-
-    def _update_snapshots(self) -> None:
-        """Actualiza el estado interno sin disparar ingestas."""
-        current = self._get_current_files()
-        self._file_snapshots = {name: mtime for name, (_, mtime) in current.items()}
+                    await self._check_for_changes()
+                except Exception as e:
+                    logger.error(f"Error sincronizando conocimiento: {e}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # p. ej. límite de watches inotify alcanzado
+            logger.warning(f"Vigilancia por eventos no disponible ({e}); polling.")
+            await self._poll_loop()
 
     async def _poll_loop(self) -> None:
         """Loop infinito de escaneo periódico."""
+        self.mode = "poll"
+        logger.info(
+            f"KnowledgeWatcher iniciado. Monitoreando {self.knowledge_path} "
+            f"cada {self.interval}s"
+        )
         while self._is_running:
             try:
                 await asyncio.sleep(self.interval)
@@ -95,35 +140,6 @@ class KnowledgeWatcher:
                 logger.error(f"Error en loop de KnowledgeWatcher: {e}")
 
     async def _check_for_changes(self) -> None:
-        """Detecta y procesa cambios en los archivos."""
-        current_files = self._get_current_files()
-        current_names = set(current_files.keys())
-        previous_names = set(self._file_snapshots.keys())
-
-        # 1. Archivos nuevos
-        added = current_names - previous_names
-        for name in added:
-            path, mtime = current_files[name]
-            logger.info(f"Detectado archivo nuevo: {name}")
-            await self.loader.ingest_file(path)
-            self._file_snapshots[name] = mtime
-
-        # 2. Archivos eliminados
-        removed = previous_names - current_names
-        for name in removed:
-            logger.info(f"Detectado archivo eliminado: {name}")
-            await self.loader.manager.delete_file_knowledge(name, namespace="global")
-            del self._file_snapshots[name]
-
-        # 3. Archivos modificados
-        common = current_names & previous_names
-        for name in common:
-            path, mtime = current_files[name]
-            if mtime > self._file_snapshots[name]:
-                logger.info(f"Detectado archivo modificado: {name}")
-                # Re-ingesta: Borrar suave y volver a procesar
-                await self.loader.manager.delete_file_knowledge(
-                    name, namespace="global"
-                )
-                await self.loader.ingest_file(path)
-                self._file_snapshots[name] = mtime
+        """Sincroniza contra el manifiesto y refresca el índice de lo cambiado."""
+        for name in await self.loader.sync_knowledge():
+            await self.loader.manager.refresh_global_index(name)
@@ -57,9 +57,9 @@ class LongTermMemoryManager:
     async def store_raw_message(self, chat_id: str, role: str, content: str) -> None:
         """Guarda un mensaje en el búfer."""
         try:
-            from src.core.profile_manager import user_profile_manager
+            from src.core.turn_context import turn_context_for
 
-            profile = await user_profile_manager.load_profile(chat_id)
+            profile = await turn_context_for(chat_id).profile()
             if profile.get("memory_settings", {}).get("ephemeral_mode"):
                 return
         except Exception as e:
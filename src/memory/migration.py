@@ -11,7 +11,11 @@ from __future__ import annotations
 
 import logging
 
+from src.core.config import settings
+from src.memory.embedding_dimension import ensure_staging_table, vector_dimension
+from src.memory.fts_index import fts_is_current, rebuild_fts
 from src.memory.sqlite_store import SQLiteStore
+from src.memory.vector_quantization import QUANTIZATION_MODES, ensure_quantized_table
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +29,21 @@ _PROVENANCE_COLUMNS: list[tuple[str, str]] = [
     ("is_active", "INTEGER NOT NULL DEFAULT 1"),
 ]
 
+# Claves de metadata promovidas a columnas generadas. ALTER TABLE solo admite
+# columnas VIRTUAL; el índice guarda el valor, así que filtrar y agrupar por
+# ellas no vuelve a parsear el JSON.
+METADATA_COLUMNS: list[tuple[str, str]] = [
+    ("filename", "TEXT"),
+    ("source", "TEXT"),
+    ("page", "INTEGER"),
+    ("chunk_index", "INTEGER"),
+]
+
+# Columnas nuevas en tablas auxiliares: (tabla, columna, definición)
+_TABLE_COLUMNS: list[tuple[str, str, str]] = [
+    ("embedding_cache", "model", "TEXT NOT NULL DEFAULT ''"),
+]
+
 _INDEXES: list[tuple[str, str]] = [
     (
         "idx_memories_chat_namespace",
@@ -40,35 +59,149 @@ _INDEXES: list[tuple[str, str]] = [
             "ON memories(is_active) WHERE is_active = 1"
         ),
     ),
+    (
+        # Memorias desactivadas pendientes de compactación (compaction.py)
+        "idx_memories_inactive",
+        (
+            "CREATE INDEX IF NOT EXISTS idx_memories_inactive "
+            "ON memories(id) WHERE is_active = 0"
+        ),
+    ),
+    (
+        "idx_memories_filename",
+        (
+            "CREATE INDEX IF NOT EXISTS idx_memories_filename "
+            "ON memories(namespace, filename, page, chunk_index)"
+        ),
+    ),
+    (
+        "idx_memories_source",
+        "CREATE INDEX IF NOT EXISTS idx_memories_source ON memories(source)",
+    ),
+    # Comprobación de la clave foránea al borrar memorias (compactación)
+    (
+        "idx_vector_map_memory",
+        (
+            "CREATE INDEX IF NOT EXISTS idx_vector_map_memory "
+            "ON vector_memory_map(memory_id)"
+        ),
+    ),
+    # Estado de vida: hitos recientes por chat (prompt de cada turno) y chats
+    # activos en una ventana (LifeReviewerWorker)
+    (
+        "idx_milestones_chat_created",
+        (
+            "CREATE INDEX IF NOT EXISTS idx_milestones_chat_created "
+            "ON user_milestones(chat_id, created_at)"
+        ),
+    ),
+    (
+        "idx_milestones_created",
+        (
+            "CREATE INDEX IF NOT EXISTS idx_milestones_created "
+            "ON user_milestones(created_at, chat_id)"
+        ),
+    ),
+    (
+        "idx_goals_chat_status",
+        (
+            "CREATE INDEX IF NOT EXISTS idx_goals_chat_status "
+            "ON user_goals(chat_id, status)"
+        ),
+    ),
+    # Outbox: sondeo de vencidos (ProactiveWorker) e intenciones por chat
+    (
+        "idx_outbox_status_scheduled",
+        (
+            "CREATE INDEX IF NOT EXISTS idx_outbox_status_scheduled "
+            "ON outbox_messages(status, scheduled_for)"
+        ),
+    ),
+    (
+        "idx_outbox_chat_status",
+        (
+            "CREATE INDEX IF NOT EXISTS idx_outbox_chat_status "
+            "ON outbox_messages(chat_id, status)"
+        ),
+    ),
 ]
 
 
-async def _get_existing_columns(store: SQLiteStore) -> set[str]:
-    """Retorna el conjunto de nombres de columnas en la tabla memories."""
+def _generated_column_sql(name: str, sql_type: str) -> str:
+    """Definición de una columna generada a partir de `metadata.<name>`."""
+    return (
+        f"{name} {sql_type} GENERATED ALWAYS AS ("
+        f"CASE WHEN json_valid(metadata) THEN json_extract(metadata, '$.{name}') END"
+        ") VIRTUAL"
+    )
+
+
+async def _get_existing_columns(
+    store: SQLiteStore, table: str = "memories"
+) -> set[str]:
+    """Retorna el conjunto de nombres de columnas (incluidas las generadas)."""
     db = await store.get_db()
-    cursor = await db.execute("PRAGMA table_info(memories)")
+    cursor = await db.execute(f"PRAGMA table_xinfo({table})")
     rows = await cursor.fetchall()
     return {row[1] for row in rows}
 
 
-async def apply_migrations(store: SQLiteStore) -> None:
-    """
-    Aplica todas las migraciones pendientes de forma idempotente.
-
-    Seguro de llamar en cada arranque: omite columnas/índices que ya existen.
-    """
+async def _add_missing_columns(store: SQLiteStore) -> int:
+    """ALTER TABLE ADD COLUMN para cada columna declarada que aún no existe."""
     db = await store.get_db()
     existing = await _get_existing_columns(store)
-    applied_cols = 0
+    applied = 0
 
-    # 1. Add missing columns first
     for col_name, col_def in _PROVENANCE_COLUMNS:
         if col_name not in existing:
             sql = f"ALTER TABLE memories ADD COLUMN {col_name} {col_def}"
             await db.execute(sql)
-            applied_cols += 1
+            applied += 1
             logger.info(f"Migration: added column '{col_name}' to memories")
 
+    for col_name, sql_type in METADATA_COLUMNS:
+        if col_name not in existing:
+            col_def = _generated_column_sql(col_name, sql_type)
+            await db.execute(f"ALTER TABLE memories ADD COLUMN {col_def}")
+            applied += 1
+            logger.info(f"Migration: added generated column '{col_name}' to memories")
+
+    for table, col_name, col_def in _TABLE_COLUMNS:
+        if col_name not in await _get_existing_columns(store, table):
+            await db.execute(f"ALTER TABLE {table} ADD COLUMN {col_name} {col_def}")
+            applied += 1
+            logger.info(f"Migration: added column '{col_name}' to {table}")
+    return applied
+
+
+async def _prepare_dimension_change(store: SQLiteStore) -> None:
+    """
+    Si `EMBEDDING_DIMENSION` difiere de la dimensión de `memory_embeddings`,
+    prepara el staging; el relleno y la conmutación corren en segundo plano
+    (`VectorMemoryManager.migrate_embedding_dimension`).
+    """
+    db = await store.get_db()
+    current = await vector_dimension(db)
+    if current is None:
+        return
+    store.embedding_dim = current
+    target = settings.EMBEDDING_DIMENSION
+    if current != target:
+        await ensure_staging_table(db, target)
+        await db.commit()
+        logger.info(f"Migration: embedding dimension {current} -> {target} pending")
+
+
+async def apply_migrations(store: SQLiteStore) -> None:
+    """
+    Aplica todas las migraciones pendientes de forma idempotente.
+
+    Seguro de llamar en cada arranque: omite columnas/índices que ya existen.
+    """
+    db = await store.get_db()
+
+    # 1. Add missing columns first
+    applied_cols = await _add_missing_columns(store)
     if applied_cols > 0:
         await db.commit()
         logger.info(f"Migration: {applied_cols} columns added successfully")
@@ -86,5 +219,18 @@ async def apply_migrations(store: SQLiteStore) -> None:
         await db.commit()
         logger.info("Migration: index check complete")
 
+    # 3. Índice FTS con el tokenizer sin diacríticos y columnas de filtro
+    if not await fts_is_current(db):
+        await rebuild_fts(db)
+        await db.commit()
+
+    # 4. Tabla cuantizada opcional (el backfill corre en segundo plano)
+    if settings.VECTOR_QUANTIZATION in QUANTIZATION_MODES:
+        await ensure_quantized_table(db, settings.VECTOR_QUANTIZATION)
+        await db.commit()
+
+    # 5. Cambio de dimensión de embeddings (staging)
+    await _prepare_dimension_change(store)
+
     if applied_cols == 0 and applied_idx == 0:
         logger.debug("Migration: schema already up to date")
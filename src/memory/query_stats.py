@@ -0,0 +1,136 @@
+# src/memory/query_stats.py
+"""
+Tiempos por sentencia SQL.
+
+Las conexiones de `SQLiteStore` miden cada `execute`/`executemany` en el hilo
+de aiosqlite y lo registran aquí bajo la sentencia normalizada (literales y
+listas `IN (...)` colapsados), además de en el histograma Prometheus
+`sqlite_statement_duration_seconds`. El tiempo cubre la ejecución hasta la
+primera fila: escrituras, agregados y KNN completos; las filas restantes de
+un SELECT largo se leen después con fetch.
+
+Las sentencias por encima de `SQLITE_SLOW_QUERY_MS` se registran en el log
+junto con su `EXPLAIN QUERY PLAN`.
+"""
+
+import functools
+import logging
+import re
+import threading
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from src.core.config import settings
+from src.core.observability.prometheus_metrics import (
+    sqlite_statement_duration_seconds,
+)
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+# Límite de la etiqueta Prometheus
+_LABEL_MAX = 200
+
+
+@functools.lru_cache(maxsize=2048)
+def normalize_sql(sql: str) -> str:
+    """Sentencia sin espacios redundantes, literales ni listas IN variables."""
+    text = _WHITESPACE.sub(" ", sql).strip()
+    text = _NUMBER.sub("?", _STRING.sub("?", text))
+    return _IN_LIST.sub("(?, ...)", text)
+
+
+@dataclass
+class StatementStats:
+    """Acumulado de una sentencia normalizada."""
+
+    statement: str
+    calls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    slow_calls: int = 0
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
+
+class QueryStats:
+    """Acumulado de tiempos por sentencia; seguro entre hilos de aiosqlite."""
+
+    def __init__(self, slow_ms: float | None = None) -> None:
+        self.slow_ms = settings.SQLITE_SLOW_QUERY_MS if slow_ms is None else slow_ms
+        self._stats: dict[str, StatementStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, sql: str, seconds: float) -> bool:
+        """Registra una ejecución; retorna True si superó el umbral de lentitud."""
+        statement = normalize_sql(sql)
+        elapsed_ms = seconds * 1000
+        slow = elapsed_ms >= self.slow_ms
+        with self._lock:
+            stats = self._stats.get(statement)
+            if stats is None:
+                stats = self._stats[statement] = StatementStats(statement)
+            stats.calls += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.slow_calls += slow
+        sqlite_statement_duration_seconds.labels(statement[:_LABEL_MAX]).observe(
+            seconds
+        )
+        return slow
+
+    def top(self, limit: int = 20) -> list[dict[str, Any]]:
+        """Sentencias ordenadas por tiempo total, con media en ms."""
+        with self._lock:
+            ranked = sorted(
+                self._stats.values(), key=lambda s: s.total_ms, reverse=True
+            )[:limit]
+            return [
+                {
+                    **asdict(s),
+                    "total_ms": round(s.total_ms, 3),
+                    "max_ms": round(s.max_ms, 3),
+                    "mean_ms": round(s.mean_ms, 3),
+                }
+                for s in ranked
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+def log_slow_query(
+    sql: str,
+    parameters: Iterable[Any] | None,
+    seconds: float,
+    execute: Callable[[str, Any], Any],
+) -> None:
+    """
+    Registra una sentencia lenta con su plan. `execute` corre el EXPLAIN en la
+    misma conexión (sin medir); sin parámetros (executemany) no hay plan.
+    """
+    plan: list[str] = []
+    if parameters is not None and _EXPLAINABLE.match(sql):
+        try:
+            rows = execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+            plan = [str(row[3]) for row in rows]
+        except Exception as e:
+            plan = [f"<EXPLAIN failed: {e}>"]
+    logger.warning(
+        "Slow SQLite statement (%.1fms): %s | plan: %s",
+        seconds * 1000,
+        normalize_sql(sql),
+        "; ".join(plan) or "-",
+        extra={"event": "sqlite_slow_query"},
+    )
+
+
+query_stats = QueryStats()
@@ -0,0 +1,199 @@
+import json
+import logging
+from contextlib import AbstractAsyncContextManager
+from typing import Any, NamedTuple, cast
+
+import aiosqlite
+
+from src.memory.fact_utils import FACT_CATEGORIES
+from src.memory.json_sanitizer import safe_json_loads
+from src.memory.repositories.memory_repo import MemoryRepository
+
+logger = logging.getLogger(__name__)
+
+# Máximo de parámetros por consulta IN (...)
+_IN_BATCH = 500
+
+
+# Bóveda completa como memoria 'fact' (antes de knowledge_facts)
+_RETIRE_LEGACY_VAULT = """
+    UPDATE memories SET is_active = 0
+    WHERE chat_id = ? AND namespace = 'user' AND memory_type = 'fact'
+      AND is_active = 1 AND source = 'knowledge_base'
+      AND json_extract(metadata, '$.type') = 'structured'
+"""
+
+
+class StoredFact(NamedTuple):
+    """Huella de un hecho almacenado."""
+
+    data_hash: str
+    memory_id: int | None
+    position: int
+
+
+class KnowledgeRepository:
+    """
+    Repositorio de la bóveda de conocimiento normalizada: un hecho por
+    (chat_id, categoría, clave de identidad), con su memoria 'fact' embebida.
+    """
+
+    def __init__(self, store: Any, memories: MemoryRepository) -> None:
+        self.store = store
+        self.memories = memories
+
+    def reader(self) -> AbstractAsyncContextManager[aiosqlite.Connection]:
+        return cast(
+            AbstractAsyncContextManager[aiosqlite.Connection], self.store.reader()
+        )
+
+    async def load(self, chat_id: str) -> dict[str, Any] | None:
+        """Bóveda reconstruida desde las tablas, o None si no hay nada guardado."""
+        async with self.reader() as db:
+            async with db.execute(
+                "SELECT data FROM knowledge_vaults WHERE chat_id = ?", (chat_id,)
+            ) as cursor:
+                header = await cursor.fetchone()
+            async with db.execute(
+                "SELECT category, data FROM knowledge_facts WHERE chat_id = ? "
+                "ORDER BY category, position",
+                (chat_id,),
+            ) as cursor:
+                facts = await cursor.fetchall()
+        if header is None and not facts:
+            return None
+
+        vault: dict[str, Any] = (safe_json_loads(header[0]) if header else None) or {}
+        for category in FACT_CATEGORIES:
+            vault[category] = []
+        for category, data in facts:
+            item = safe_json_loads(data)
+            if item is not None:
+                vault.setdefault(category, []).append(item)
+        return vault
+
+    async def fact_hashes(self, chat_id: str) -> dict[tuple[str, str], StoredFact]:
+        """(categoría, clave de identidad) -> huella de cada hecho del chat."""
+        async with (
+            self.reader() as db,
+            db.execute(
+                "SELECT category, identity_key, data_hash, memory_id, position "
+                "FROM knowledge_facts WHERE chat_id = ?",
+                (chat_id,),
+            ) as cursor,
+        ):
+            return {
+                (row[0], row[1]): StoredFact(row[2], row[3], row[4])
+                for row in await cursor.fetchall()
+            }
+
+    async def apply_changes(
+        self,
+        chat_id: str,
+        header: dict[str, Any],
+        upserts: list[dict[str, Any]],
+        removed: list[tuple[str, str]],
+        records: list[dict[str, Any]],
+        retired_memory_ids: list[int],
+        retire_legacy: bool = False,
+    ) -> int:
+        """
+        Aplica los cambios de la bóveda en una única transacción.
+
+        `records` son las memorias 'fact' de los hechos con texto nuevo; cada
+        upsert referencia la suya por `content_hash` (None conserva la
+        actual). Las memorias retiradas se desactivan, y con `retire_legacy`
+        también los JSON completos de la bóveda anteriores a knowledge_facts.
+        Retorna las memorias insertadas.
+        """
+
+        async def _apply(db: aiosqlite.Connection) -> int:
+            memory_ids, inserted = await self._store_memories(db, chat_id, records)
+            await db.executemany(
+                """
+                INSERT INTO knowledge_facts
+                    (chat_id, category, identity_key, position, data, data_hash,
+                     memory_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(chat_id, category, identity_key) DO UPDATE SET
+                    position = excluded.position,
+                    data = excluded.data,
+                    data_hash = excluded.data_hash,
+                    memory_id = COALESCE(excluded.memory_id, memory_id),
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                [
+                    (
+                        chat_id,
+                        f["category"],
+                        f["identity_key"],
+                        f["position"],
+                        f["data"],
+                        f["data_hash"],
+                        memory_ids.get(f.get("content_hash") or ""),
+                    )
+                    for f in upserts
+                ],
+            )
+            await db.executemany(
+                "DELETE FROM knowledge_facts "
+                "WHERE chat_id = ? AND category = ? AND identity_key = ?",
+                [(chat_id, category, key) for category, key in removed],
+            )
+            await self._set_active(
+                db, [i for i in retired_memory_ids if i not in memory_ids.values()], 0
+            )
+            if retire_legacy:
+                await db.execute(_RETIRE_LEGACY_VAULT, (chat_id,))
+            await db.execute(
+                """
+                INSERT INTO knowledge_vaults (chat_id, data, updated_at)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(chat_id) DO UPDATE SET
+                    data = excluded.data,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                (chat_id, json.dumps(header, ensure_ascii=False)),
+            )
+            return inserted
+
+        return cast(int, await self.store.run_in_writer(_apply))
+
+    async def _store_memories(
+        self, db: aiosqlite.Connection, chat_id: str, records: list[dict[str, Any]]
+    ) -> tuple[dict[str, int], int]:
+        """
+        Memorias de los textos nuevos: reactiva las que ya existían (un hecho
+        que vuelve a un valor anterior) e inserta el resto. Retorna
+        hash -> id y el número de insertadas.
+        """
+        memory_ids: dict[str, int] = {}
+        hashes = [r["content_hash"] for r in records]
+        for i in range(0, len(hashes), _IN_BATCH):
+            batch = hashes[i : i + _IN_BATCH]
+            marks = ",".join(["?"] * len(batch))
+            sql = (
+                f"SELECT id, content_hash FROM memories WHERE content_hash IN ({marks})"  # noqa: S608, E501
+            )
+            async with db.execute(sql, batch) as cursor:
+                memory_ids.update(
+                    (row[1], int(row[0])) for row in await cursor.fetchall()
+                )
+        await self._set_active(db, list(memory_ids.values()), 1)
+
+        fresh = [r for r in records if r["content_hash"] not in memory_ids]
+        ids = await self.memories.insert_rows(db, chat_id, "fact", "user", fresh)
+        memory_ids.update(zip((r["content_hash"] for r in fresh), ids, strict=True))
+        return memory_ids, len(ids)
+
+    @staticmethod
+    async def _set_active(
+        db: aiosqlite.Connection, ids: list[int], active: int
+    ) -> None:
+        for i in range(0, len(ids), _IN_BATCH):
+            batch = ids[i : i + _IN_BATCH]
+            marks = ",".join(["?"] * len(batch))
+            await db.execute(
+                f"UPDATE memories SET is_active = ? WHERE id IN ({marks})",  # noqa: S608
+                [active, *batch],
+            )
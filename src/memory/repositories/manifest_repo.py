@@ -0,0 +1,69 @@
+import logging
+from contextlib import AbstractAsyncContextManager
+from typing import Any, cast
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+
+class ManifestRepository:
+    """
+    Repositorio del manifiesto de ingesta del conocimiento global.
+    """
+
+    def __init__(self, store: Any):
+        self.store = store
+
+    def reader(self) -> AbstractAsyncContextManager[aiosqlite.Connection]:
+        return cast(
+            AbstractAsyncContextManager[aiosqlite.Connection], self.store.reader()
+        )
+
+    async def get_all(self) -> dict[str, dict[str, Any]]:
+        sql = "SELECT * FROM knowledge_manifest"
+        async with self.reader() as db, db.execute(sql) as cursor:
+            rows = await cursor.fetchall()
+            return {r["filename"]: dict(r) for r in rows}
+
+    async def upsert(
+        self,
+        filename: str,
+        size: int,
+        mtime_ns: int,
+        content_hash: str,
+        chunker_version: str,
+        embedding_model: str,
+        chunks: int,
+    ) -> None:
+        sql = """
+            INSERT INTO knowledge_manifest
+                (filename, size, mtime_ns, content_hash, chunker_version,
+                 embedding_model, chunks)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(filename) DO UPDATE SET
+                size = excluded.size,
+                mtime_ns = excluded.mtime_ns,
+                content_hash = excluded.content_hash,
+                chunker_version = excluded.chunker_version,
+                embedding_model = excluded.embedding_model,
+                chunks = excluded.chunks,
+                ingested_at = CURRENT_TIMESTAMP
+        """
+        await self.store.execute_write(
+            sql,
+            (
+                filename,
+                size,
+                mtime_ns,
+                content_hash,
+                chunker_version,
+                embedding_model,
+                chunks,
+            ),
+        )
+
+    async def delete(self, filename: str) -> bool:
+        sql = "DELETE FROM knowledge_manifest WHERE filename = ?"
+        result = await self.store.execute_write(sql, (filename,))
+        return bool(result.rowcount > 0)
@@ -1,13 +1,21 @@
+import functools
 import json
 import logging
 import sqlite3
-import struct
+from contextlib import AbstractAsyncContextManager
 from typing import Any, cast
 
 import aiosqlite
 
+from src.core.config import settings
+from src.memory.embedding_dimension import pack_vector
+from src.memory.vector_quantization import QUANTIZATION_MODES, quantized_copy_sql
+
 logger = logging.getLogger(__name__)
 
+# Máximo de parámetros por consulta IN (...) para no exceder los límites de SQLite
+_IN_BATCH = 500
+
 
 class MemoryRepository:
     """Repositorio de memorias."""
@@ -15,8 +23,10 @@ class MemoryRepository:
     def __init__(self, store: Any) -> None:
         self.store = store
 
-    async def get_db(self) -> aiosqlite.Connection:
-        return cast(aiosqlite.Connection, await self.store.get_db())
+    def reader(self) -> AbstractAsyncContextManager[aiosqlite.Connection]:
+        return cast(
+            AbstractAsyncContextManager[aiosqlite.Connection], self.store.reader()
+        )
 
     async def insert_memory(
         self,
@@ -31,52 +41,201 @@ class MemoryRepository:
         sensitivity: str = "low",
         evidence: str | None = None,
     ) -> int:
-        db = await self.get_db()
         metadata_json = json.dumps(metadata or {})
+        params = (
+            chat_id,
+            namespace,
+            content,
+            content_hash,
+            memory_type,
+            metadata_json,
+            source_type,
+            confidence,
+            sensitivity,
+            evidence,
+        )
+
+        async def _insert(db: aiosqlite.Connection) -> int:
+            try:
+                cursor = await db.execute(
+                    """
+                    INSERT INTO memories
+                        (chat_id, namespace, content, content_hash, memory_type,
+                         metadata, source_type, confidence, sensitivity, evidence)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    params,
+                )
+                mid = cursor.lastrowid
+                return int(mid) if mid is not None else -1
+            except sqlite3.IntegrityError:
+                async with db.execute(
+                    "SELECT id FROM memories WHERE content_hash = ?", (content_hash,)
+                ) as cursor:
+                    row = await cursor.fetchone()
+                    return int(row[0]) if row else -1
+
         try:
-            cursor = await db.execute(
-                """
-                INSERT INTO memories
-                    (chat_id, namespace, content, content_hash, memory_type,
-                     metadata, source_type, confidence, sensitivity, evidence)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    chat_id,
-                    namespace,
-                    content,
-                    content_hash,
-                    memory_type,
-                    metadata_json,
-                    source_type,
-                    confidence,
-                    sensitivity,
-                    evidence,
-                ),
-            )
-            mid = cursor.lastrowid
-            await db.commit()
-            return int(mid) if mid is not None else -1
-        except sqlite3.IntegrityError:
-            async with db.execute(
-                "SELECT id FROM memories WHERE content_hash = ?", (content_hash,)
-            ) as cursor:
-                row = await cursor.fetchone()
-                return int(row[0]) if row else -1
+            return cast(int, await self.store.run_in_writer(_insert))
         except Exception as e:
             logger.error("Insert error: %s", e)
-            await db.rollback()
             raise
 
+    async def insert_memories_batch(
+        self,
+        chat_id: str,
+        memory_type: str,
+        namespace: str,
+        records: list[dict[str, Any]],
+    ) -> list[int]:
+        """
+        Inserta memorias con sus vectores en una única transacción.
+
+        Cada registro lleva `content`, `content_hash`, `embedding`, `metadata` y,
+        opcionalmente, los campos de procedencia. Los hashes ya presentes se
+        ignoran. Retorna los ids de las memorias nuevas.
+        """
+        if not records:
+            return []
+
+        return cast(
+            list[int],
+            await self.store.run_in_writer(
+                functools.partial(
+                    self.insert_rows,
+                    chat_id=chat_id,
+                    memory_type=memory_type,
+                    namespace=namespace,
+                    records=records,
+                )
+            ),
+        )
+
+    async def file_chunk_hashes(
+        self, filename: str, namespace: str = "global"
+    ) -> dict[str, tuple[int, bool]]:
+        """Chunks almacenados de un archivo: hash -> (id, activo)."""
+        async with (
+            self.reader() as db,
+            db.execute(
+                "SELECT content_hash, id, is_active FROM memories WHERE namespace = ? "
+                "AND filename = ?",
+                (namespace, filename),
+            ) as cursor,
+        ):
+            return {
+                row[0]: (int(row[1]), bool(row[2])) for row in await cursor.fetchall()
+            }
+
+    async def apply_file_diff(
+        self,
+        chat_id: str,
+        memory_type: str,
+        namespace: str,
+        records: list[dict[str, Any]],
+        activate_ids: list[int],
+        deactivate_ids: list[int],
+    ) -> list[int]:
+        """
+        Aplica el diff de un archivo en una única transacción: inserta los
+        chunks nuevos, reactiva los reutilizados que estaban inactivos y
+        desactiva los desaparecidos. Retorna los ids insertados.
+        """
+
+        async def _apply(db: aiosqlite.Connection) -> list[int]:
+            for ids, active in ((deactivate_ids, 0), (activate_ids, 1)):
+                for i in range(0, len(ids), _IN_BATCH):
+                    batch = ids[i : i + _IN_BATCH]
+                    marks = ",".join(["?"] * len(batch))
+                    await db.execute(
+                        f"UPDATE memories SET is_active = ? WHERE id IN ({marks})",  # noqa: S608
+                        [active, *batch],
+                    )
+            return await self.insert_rows(db, chat_id, memory_type, namespace, records)
+
+        return cast(list[int], await self.store.run_in_writer(_apply))
+
+    async def insert_rows(
+        self,
+        db: aiosqlite.Connection,
+        chat_id: str,
+        memory_type: str,
+        namespace: str,
+        records: list[dict[str, Any]],
+    ) -> list[int]:
+        """Inserta memorias y vectores dentro de la transacción del escritor."""
+        if not records:
+            return []
+
+        rows = [
+            (
+                chat_id,
+                namespace,
+                r["content"],
+                r["content_hash"],
+                memory_type,
+                json.dumps(r.get("metadata") or {}),
+                r.get("source_type", "explicit"),
+                r.get("confidence", 1.0),
+                r.get("sensitivity", "low"),
+                r.get("evidence"),
+            )
+            for r in records
+        ]
+        hashes = {r["content_hash"] for r in records}
+        embeddings: dict[str, list[float]] = {
+            r["content_hash"]: r["embedding"] for r in records if r.get("embedding")
+        }
+
+        max_id = await self._scalar(db, "SELECT COALESCE(MAX(id), 0) FROM memories")
+
+        await db.executemany(
+            """
+            INSERT OR IGNORE INTO memories
+                (chat_id, namespace, content, content_hash, memory_type,
+                 metadata, source_type, confidence, sensitivity, evidence)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+
+        async with db.execute(
+            "SELECT id, content_hash FROM memories WHERE id > ? ORDER BY id",
+            (max_id,),
+        ) as c:
+            new_rows = [
+                (row[0], row[1]) for row in await c.fetchall() if row[1] in hashes
+            ]
+
+        vec_rows = [
+            (mid, self._pack(embeddings[h]), namespace, chat_id, memory_type)
+            for mid, h in new_rows
+            if h in embeddings
+        ]
+        if vec_rows:
+            await db.executemany(
+                """
+                INSERT INTO memory_embeddings
+                    (memory_id, embedding, namespace, chat_id, memory_type,
+                     is_active)
+                VALUES (?, ?, ?, ?, ?, 1)
+                """,
+                vec_rows,
+            )
+            await self._copy_quantized(db, [row[0] for row in vec_rows])
+        return [mid for mid, _ in new_rows]
+
     async def get_memory_stats(self, chat_id: str) -> dict[str, Any]:
-        db = await self.get_db()
         stats: dict[str, Any] = {"total": 0, "by_type": {}, "by_sensitivity": {}}
         try:
-            async with db.execute(
-                "SELECT memory_type, sensitivity, COUNT(*) FROM memories "
-                "WHERE chat_id = ? AND is_active = 1 GROUP BY 1, 2",
-                (chat_id,),
-            ) as cursor:
+            async with (
+                self.reader() as db,
+                db.execute(
+                    "SELECT memory_type, sensitivity, COUNT(*) FROM memories "
+                    "WHERE chat_id = ? AND is_active = 1 GROUP BY 1, 2",
+                    (chat_id,),
+                ) as cursor,
+            ):
                 for row in await cursor.fetchall():
                     mtype, sens, cnt = row[0], row[1] or "low", row[2]
                     stats["by_type"][mtype] = stats["by_type"].get(mtype, 0) + cnt
@@ -89,62 +248,85 @@ class MemoryRepository:
         return stats
 
     async def insert_vector(self, mid: int, embedding: list[float]) -> int:
-        db = await self.get_db()
-        blob = struct.pack(f"{len(embedding)}f", *embedding)
-        try:
-            # 1. Insert into virtual table memory_vectors to get the vector rowid
-            cursor = await db.execute(
-                "INSERT INTO memory_vectors (embedding) VALUES (?)",
-                (blob,),
-            )
-            vec_id = cursor.lastrowid
+        blob = self._pack(embedding)
 
-            # 2. Map the vector rowid to the memory id
+        async def _insert_vector(db: aiosqlite.Connection) -> int:
+            # Copia los filtros de la memoria como metadatos del vector
             await db.execute(
-                "INSERT INTO vector_memory_map (vector_id, memory_id) VALUES (?, ?)",
-                (vec_id, mid),
+                """
+                INSERT INTO memory_embeddings
+                    (memory_id, embedding, namespace, chat_id, memory_type, is_active)
+                SELECT id, ?, namespace, chat_id, memory_type, is_active
+                FROM memories WHERE id = ?
+                """,
+                (blob, mid),
             )
-
-            await db.commit()
+            await self._copy_quantized(db, [mid])
             return mid
+
+        try:
+            return cast(int, await self.store.run_in_writer(_insert_vector))
         except Exception as e:
             logger.error("Vector error: %s", e)
-            await db.rollback()
             raise
 
     async def hash_exists(self, h: str) -> bool:
-        db = await self.get_db()
-        async with db.execute(
-            "SELECT 1 FROM memories WHERE content_hash = ?", (h,)
-        ) as cursor:
+        async with (
+            self.reader() as db,
+            db.execute("SELECT 1 FROM memories WHERE content_hash = ?", (h,)) as cursor,
+        ):
             return await cursor.fetchone() is not None
 
+    async def existing_hashes(self, hashes: list[str]) -> set[str]:
+        """Resuelve qué hashes ya existen con consultas IN (...) por lotes."""
+        found: set[str] = set()
+        async with self.reader() as db:
+            for i in range(0, len(hashes), _IN_BATCH):
+                batch = hashes[i : i + _IN_BATCH]
+                marks = ",".join(["?"] * len(batch))
+                sql = (
+                    f"SELECT content_hash FROM memories WHERE content_hash IN ({marks})"  # noqa: S608
+                )
+                async with db.execute(sql, batch) as cursor:
+                    found.update(row[0] for row in await cursor.fetchall())
+        return found
+
     async def soft_delete_memories(self, ids: list[int]) -> int:
         if not ids:
             return 0
-        db = await self.get_db()
         marks = ",".join(["?"] * len(ids))
         try:
             sql = f"UPDATE memories SET is_active = 0 WHERE id IN ({marks})"  # noqa: S608
-            cursor = await db.execute(sql, ids)
-            await db.commit()
-            return int(cursor.rowcount)
+            result = await self.store.execute_write(sql, ids)
+            return int(result.rowcount)
         except Exception as e:
             logger.error("Delete error: %s", e)
-            await db.rollback()
             return 0
 
     async def delete_memories_by_filename(self, f: str, ns: str = "global") -> int:
-        db = await self.get_db()
         try:
             sql = (
-                "UPDATE memories SET is_active = 0 WHERE namespace = ? "
-                "AND json_extract(metadata, '$.filename') = ?"
+                "UPDATE memories SET is_active = 0 WHERE namespace = ? AND filename = ?"
             )
-            cursor = await db.execute(sql, (ns, f))
-            await db.commit()
-            return int(cursor.rowcount)
+            result = await self.store.execute_write(sql, (ns, f))
+            return int(result.rowcount)
         except Exception as e:
             logger.error("Delete file error: %s", e)
-            await db.rollback()
             return 0
+
+    @staticmethod
+    async def _copy_quantized(db: aiosqlite.Connection, ids: list[int]) -> None:
+        """Replica los vectores nuevos en la tabla cuantizada si el modo está activo."""
+        mode = settings.VECTOR_QUANTIZATION
+        if mode in QUANTIZATION_MODES and ids:
+            await db.executemany(quantized_copy_sql(mode), [(i,) for i in ids])
+
+    def _pack(self, embedding: list[float]) -> bytes:
+        """Serializa a la dimensión activa de `memory_embeddings`."""
+        return pack_vector(embedding, self.store.embedding_dim)
+
+    @staticmethod
+    async def _scalar(db: aiosqlite.Connection, sql: str) -> int:
+        async with db.execute(sql) as cursor:
+            row = await cursor.fetchone()
+            return int(row[0]) if row else 0
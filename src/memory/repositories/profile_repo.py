@@ -1,5 +1,6 @@
 import json
 import logging
+from contextlib import AbstractAsyncContextManager
 from typing import Any, cast
 
 import aiosqlite
@@ -8,6 +9,14 @@ from src.memory.json_sanitizer import safe_json_loads
 
 logger = logging.getLogger(__name__)
 
+_UPSERT_PROFILE = """
+    INSERT INTO profiles (chat_id, data, updated_at)
+    VALUES (?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(chat_id) DO UPDATE SET
+        data = excluded.data,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
 
 class ProfileRepository:
     """
@@ -17,38 +26,55 @@ class ProfileRepository:
     def __init__(self, store: Any) -> None:
         self.store = store
 
-    async def get_db(self) -> aiosqlite.Connection:
-        return cast(aiosqlite.Connection, await self.store.get_db())
+    def reader(self) -> AbstractAsyncContextManager[aiosqlite.Connection]:
+        return cast(
+            AbstractAsyncContextManager[aiosqlite.Connection], self.store.reader()
+        )
 
-    async def save_profile(self, chat_id: str, profile_data: dict[str, Any]) -> None:
-        """Guarda un perfil de usuario en la DB."""
-        db = await self.get_db()
+    async def save_profile(
+        self,
+        chat_id: str,
+        profile_data: dict[str, Any],
+        archived: dict[str, list[Any]] | None = None,
+    ) -> None:
+        """
+        Guarda un perfil de usuario en la DB. `archived` son las entradas que
+        salieron del documento, por tipo: se escriben en `profile_history` en
+        la misma transacción.
+        """
         payload = json.dumps(profile_data, ensure_ascii=False)
+        history = [
+            (chat_id, kind, json.dumps(entry, ensure_ascii=False, sort_keys=True))
+            for kind, entries in (archived or {}).items()
+            for entry in entries
+        ]
 
-        try:
-            await db.execute(
-                """
-                INSERT INTO profiles (chat_id, data, updated_at)
-                VALUES (?, ?, CURRENT_TIMESTAMP)
-                ON CONFLICT(chat_id) DO UPDATE SET
-                    data = excluded.data,
-                    updated_at = CURRENT_TIMESTAMP
-                """,
-                (chat_id, payload),
+        async def _save(db: aiosqlite.Connection) -> None:
+            await db.execute(_UPSERT_PROFILE, (chat_id, payload))
+            await db.executemany(
+                "INSERT OR IGNORE INTO profile_history (chat_id, kind, data) "
+                "VALUES (?, ?, ?)",
+                history,
             )
-            await db.commit()
+
+        try:
+            if history:
+                await self.store.run_in_writer(_save)
+            else:
+                await self.store.execute_write(_UPSERT_PROFILE, (chat_id, payload))
         except Exception as e:
             logger.error(f"Error saving profile to SQLite: {e}")
-            await db.rollback()
             raise
 
     async def load_profile(self, chat_id: str) -> dict[str, Any] | None:
         """Carga un perfil de usuario de la DB con reparación JSON."""
-        db = await self.get_db()
         try:
-            async with db.execute(
-                "SELECT data FROM profiles WHERE chat_id = ?", (chat_id,)
-            ) as cursor:
+            async with (
+                self.reader() as db,
+                db.execute(
+                    "SELECT data FROM profiles WHERE chat_id = ?", (chat_id,)
+                ) as cursor,
+            ):
                 row = await cursor.fetchone()
                 if row:
                     result = safe_json_loads(row["data"])
@@ -63,11 +89,44 @@ class ProfileRepository:
             logger.error(f"Error loading profile from SQLite: {e}")
             return None
 
+    async def load_history(
+        self, chat_id: str, kind: str, limit: int = 50, before_id: int | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Historial archivado del perfil, del más reciente al más antiguo.
+        Paginación por `before_id` (id de la última fila de la página anterior).
+        """
+        sql = (
+            "SELECT id, data, archived_at FROM profile_history "
+            "WHERE chat_id = ? AND kind = ?"
+        )
+        params: list[Any] = [chat_id, kind]
+        if before_id is not None:
+            sql += " AND id < ?"
+            params.append(before_id)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        try:
+            async with self.reader() as db, db.execute(sql, params) as cursor:
+                return [
+                    {
+                        "id": row["id"],
+                        "entry": safe_json_loads(row["data"]),
+                        "archived_at": row["archived_at"],
+                    }
+                    for row in await cursor.fetchall()
+                ]
+        except Exception as e:
+            logger.error(f"Error loading profile history from SQLite: {e}")
+            return []
+
     async def list_all_chat_ids(self) -> list[str]:
         """Retorna una lista de todos los chat_id con perfiles en la DB."""
-        db = await self.get_db()
         try:
-            async with db.execute("SELECT chat_id FROM profiles") as cursor:
+            async with (
+                self.reader() as db,
+                db.execute("SELECT chat_id FROM profiles") as cursor,
+            ):
                 rows = await cursor.fetchall()
                 return [row["chat_id"] for row in rows]
         except Exception as e:
@@ -1,4 +1,5 @@
 import logging
+from contextlib import AbstractAsyncContextManager
 from typing import Any, cast
 
 import aiosqlite
@@ -14,9 +15,10 @@ class StateRepository:
     def __init__(self, store: Any):
         self.store = store
 
-    async def get_db(self) -> aiosqlite.Connection:
-        db = await self.store.get_db()
-        return cast(aiosqlite.Connection, db)
+    def reader(self) -> AbstractAsyncContextManager[aiosqlite.Connection]:
+        return cast(
+            AbstractAsyncContextManager[aiosqlite.Connection], self.store.reader()
+        )
 
     async def add_goal(
         self,
@@ -25,30 +27,25 @@ class StateRepository:
         description: str,
         target_date: str | None = None,
     ) -> int:
-        db = await self.get_db()
         sql = """
             INSERT INTO user_goals (chat_id, goal_type, description, target_date)
             VALUES (?, ?, ?, ?)
         """
-        async with db.execute(
+        result = await self.store.execute_write(
             sql, (chat_id, goal_type, description, target_date)
-        ) as cursor:
-            await db.commit()
-            return cursor.lastrowid or 0
+        )
+        return result.lastrowid or 0
 
     async def get_active_goals(self, chat_id: str) -> list[dict[str, Any]]:
-        db = await self.get_db()
         sql = "SELECT * FROM user_goals WHERE chat_id = ? AND status = 'active'"
-        async with db.execute(sql, (chat_id,)) as cursor:
+        async with self.reader() as db, db.execute(sql, (chat_id,)) as cursor:
             rows = await cursor.fetchall()
             return [dict(r) for r in rows]
 
     async def update_goal_status(self, goal_id: int, status: str) -> bool:
-        db = await self.get_db()
         sql = "UPDATE user_goals SET status = ? WHERE id = ?"
-        async with db.execute(sql, (status, goal_id)) as cursor:
-            await db.commit()
-            return bool(cursor.rowcount > 0)
+        result = await self.store.execute_write(sql, (status, goal_id))
+        return bool(result.rowcount > 0)
 
     async def add_milestone(
         self,
@@ -59,22 +56,19 @@ class StateRepository:
         description: str | None = None,
         goal_id: int | None = None,
     ) -> int:
-        db = await self.get_db()
         sql = """
             INSERT INTO user_milestones
                 (chat_id, goal_id, action, status, emotion, description)
             VALUES (?, ?, ?, ?, ?, ?)
         """
-        async with db.execute(
+        result = await self.store.execute_write(
             sql, (chat_id, goal_id, action, status, emotion, description)
-        ) as cursor:
-            await db.commit()
-            return cursor.lastrowid or 0
+        )
+        return result.lastrowid or 0
 
     async def get_recent_milestones(
         self, chat_id: str, limit: int = 5
     ) -> list[dict[str, Any]]:
-        db = await self.get_db()
         sql = """
             SELECT m.*, g.description as goal_description
             FROM user_milestones m
@@ -83,6 +77,17 @@ class StateRepository:
             ORDER BY m.created_at DESC
             LIMIT ?
         """
-        async with db.execute(sql, (chat_id, limit)) as cursor:
+        async with self.reader() as db, db.execute(sql, (chat_id, limit)) as cursor:
             rows = await cursor.fetchall()
             return [dict(r) for r in rows]
+
+    async def get_recently_active_chat_ids(self, days: int = 30) -> list[str]:
+        """Chats con algún hito en los últimos `days` días."""
+        # `+chat_id`: sin él, el planner recorre entero idx_milestones_chat_created
+        # para obtener el DISTINCT ordenado en vez de buscar el rango de fechas
+        sql = (
+            "SELECT DISTINCT +chat_id AS chat_id FROM user_milestones "
+            "WHERE created_at >= datetime('now', ? || ' days')"
+        )
+        async with self.reader() as db, db.execute(sql, (-days,)) as cursor:
+            return [r["chat_id"] for r in await cursor.fetchall()]
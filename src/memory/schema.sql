@@ -20,37 +20,88 @@ CREATE TABLE IF NOT EXISTS memories (
     evidence TEXT,
     confirmed_at TEXT,
     is_active INTEGER NOT NULL DEFAULT 1,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Claves de metadata frecuentes como columnas generadas (índices en migration.py)
+    filename TEXT GENERATED ALWAYS AS (
+        CASE WHEN json_valid(metadata) THEN json_extract(metadata, '$.filename') END
+    ) VIRTUAL,
+    source TEXT GENERATED ALWAYS AS (
+        CASE WHEN json_valid(metadata) THEN json_extract(metadata, '$.source') END
+    ) VIRTUAL,
+    page INTEGER GENERATED ALWAYS AS (
+        CASE WHEN json_valid(metadata) THEN json_extract(metadata, '$.page') END
+    ) VIRTUAL,
+    chunk_index INTEGER GENERATED ALWAYS AS (
+        CASE WHEN json_valid(metadata) THEN json_extract(metadata, '$.chunk_index') END
+    ) VIRTUAL
 );
 
--- Índice FTS5 para búsqueda rápida por palabras clave exactas
+-- Índice FTS5 contentless (ver fts_index.py): el texto vive en memories;
+-- chat_id/namespace se guardan sin indexar para filtrar dentro de FTS.
+-- remove_diacritics 2: "terapía" = "terapia", "cómo" = "como".
 CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
     content,
-    content='memories',
-    content_rowid='id'
+    chat_id UNINDEXED,
+    namespace UNINDEXED,
+    content='',
+    contentless_delete=1,
+    contentless_unindexed=1,
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
 );
 
+-- Frecuencia documental por término (consultas por IDF en keyword_search.py)
+CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts_vocab USING fts5vocab(memories_fts, 'row');
+
 -- Triggers para mantener FTS sincronizado automáticamente
 CREATE TRIGGER IF NOT EXISTS memories_ai AFTER INSERT ON memories BEGIN
-    INSERT INTO memories_fts(rowid, content) VALUES (new.id, new.content);
+    INSERT INTO memories_fts(rowid, content, chat_id, namespace)
+    VALUES (new.id, new.content, new.chat_id, new.namespace);
 END;
 
 CREATE TRIGGER IF NOT EXISTS memories_ad AFTER DELETE ON memories BEGIN
-    INSERT INTO memories_fts(memories_fts, rowid, content) VALUES('delete', old.id, old.content);
+    DELETE FROM memories_fts WHERE rowid = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS memories_au
+AFTER UPDATE OF content, chat_id, namespace ON memories BEGIN
+    DELETE FROM memories_fts WHERE rowid = old.id;
+    INSERT INTO memories_fts(rowid, content, chat_id, namespace)
+    VALUES (new.id, new.content, new.chat_id, new.namespace);
+END;
+
+-- Tabla vectorial particionada (sqlite-vec)
+-- Dimensión 768 para text-embedding-004 de Google. init_db la crea antes con
+-- EMBEDDING_DIMENSION (ver embedding_dimension.py); esta es la definición base.
+-- namespace es partition key y chat_id/memory_type/is_active son columnas de
+-- metadatos: el filtrado ocurre dentro del escaneo KNN, no después.
+CREATE VIRTUAL TABLE IF NOT EXISTS memory_embeddings USING vec0(
+    memory_id INTEGER PRIMARY KEY,   -- Coincide con memories.id
+    embedding FLOAT[768],
+    namespace TEXT PARTITION KEY,
+    chat_id TEXT,
+    memory_type TEXT,
+    is_active INTEGER
+);
+
+-- Mantener is_active sincronizado y limpiar el vector al borrar la memoria
+CREATE TRIGGER IF NOT EXISTS memory_embeddings_active
+AFTER UPDATE OF is_active ON memories BEGIN
+    UPDATE memory_embeddings SET is_active = new.is_active WHERE memory_id = new.id;
 END;
 
-CREATE TRIGGER IF NOT EXISTS memories_au AFTER UPDATE ON memories BEGIN
-    INSERT INTO memories_fts(memories_fts, rowid, content) VALUES('delete', old.id, old.content);
-    INSERT INTO memories_fts(rowid, content) VALUES (new.id, new.content);
+CREATE TRIGGER IF NOT EXISTS memory_embeddings_cleanup
+AFTER DELETE ON memories BEGIN
+    DELETE FROM memory_embeddings WHERE memory_id = old.id;
 END;
 
--- Tabla vectorial (sqlite-vec)
--- Dimensión 768 para text-embedding-004 de Google
+-- Layout legado (sin filtros en el KNN). Solo se lee mientras
+-- vector_migration.migrate_legacy_vectors lo vacía hacia memory_embeddings.
 CREATE VIRTUAL TABLE IF NOT EXISTS memory_vectors USING vec0(
     embedding FLOAT[768]
 );
 
--- Mapeo entre el vector (rowid) y la memoria (id)
+-- Mapeo legado entre el vector (rowid) y la memoria (id)
 CREATE TABLE IF NOT EXISTS vector_memory_map (
     vector_id INTEGER PRIMARY KEY, -- Coincide con el rowid de memory_vectors
     memory_id INTEGER NOT NULL REFERENCES memories(id) ON DELETE CASCADE
@@ -58,11 +109,28 @@ CREATE TABLE IF NOT EXISTS vector_memory_map (
 
 -- Cache de embeddings para optimizar costos de API
 CREATE TABLE IF NOT EXISTS embedding_cache (
-    content_hash TEXT PRIMARY KEY,
+    content_hash TEXT PRIMARY KEY,   -- sha256(modelo + tipo de tarea + texto)
+    model TEXT NOT NULL DEFAULT '',
     embedding BLOB NOT NULL,         -- Vector serializado
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE INDEX IF NOT EXISTS idx_embedding_cache_created
+    ON embedding_cache(created_at);
+
+-- Manifiesto de ingesta del conocimiento global (storage/knowledge).
+-- Un archivo cuya huella coincide se omite sin leerlo ni re-chunkearlo.
+CREATE TABLE IF NOT EXISTS knowledge_manifest (
+    filename TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,      -- SHA-256 del archivo completo
+    chunker_version TEXT NOT NULL,
+    embedding_model TEXT NOT NULL,
+    chunks INTEGER NOT NULL DEFAULT 0,
+    ingested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Tabla de Perfiles de Usuario (Local-First)
 CREATE TABLE IF NOT EXISTS profiles (
     chat_id TEXT PRIMARY KEY,
@@ -70,6 +138,41 @@ CREATE TABLE IF NOT EXISTS profiles (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Historial del perfil archivado fuera del documento (profile_history.py):
+-- entradas del timeline y preferencias aprendidas que salen de su ventana
+CREATE TABLE IF NOT EXISTS profile_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id TEXT NOT NULL,
+    kind TEXT NOT NULL,              -- 'timeline' | 'learned_preference'
+    data TEXT NOT NULL,              -- JSON de la entrada
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (chat_id, kind, data)
+);
+CREATE INDEX IF NOT EXISTS idx_profile_history_chat ON profile_history(chat_id, kind, id);
+
+-- Bóveda de conocimiento estructurado (knowledge_base.py), normalizada:
+-- un hecho por (chat_id, categoría, clave de identidad de fact_utils)
+CREATE TABLE IF NOT EXISTS knowledge_facts (
+    chat_id TEXT NOT NULL,
+    category TEXT NOT NULL,          -- 'entities', 'preferences', 'medical', ...
+    identity_key TEXT NOT NULL,      -- fact_utils.get_identity_key
+    position INTEGER NOT NULL,       -- Orden dentro de la categoría
+    data TEXT NOT NULL,              -- JSON del hecho
+    data_hash TEXT NOT NULL,         -- SHA-256 de data: detecta cambios
+    memory_id INTEGER REFERENCES memories(id) ON DELETE SET NULL, -- Memoria 'fact' embebida
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (chat_id, category, identity_key)
+);
+-- Comprobación ON DELETE SET NULL al borrar memorias
+CREATE INDEX IF NOT EXISTS idx_knowledge_facts_memory ON knowledge_facts(memory_id);
+
+-- Campos escalares de la bóveda (user_name, version, last_updated)
+CREATE TABLE IF NOT EXISTS knowledge_vaults (
+    chat_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,              -- JSON sin las categorías de hechos
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- State Management: Metas del usuario a largo plazo
 CREATE TABLE IF NOT EXISTS user_goals (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -1,8 +1,12 @@
 # src/memory/sqlite_store.py
 import asyncio
+import contextlib
 import logging
 import sys
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
 from pathlib import Path
+from typing import Any, TypeVar
 
 # Monkeypatch sqlite3 con sqlean para habilitar extensiones en macOS/Linux
 try:
@@ -12,60 +16,149 @@ try:
 except ImportError:
     pass
 
+import sqlite3
+
 import aiofiles
 import aiosqlite
 import sqlite_vec
 
+from src.core.config import settings
+from src.memory.embedding_dimension import embeddings_table_ddl, vector_dimension
+from src.memory.query_stats import log_slow_query, query_stats
+from src.memory.repositories.knowledge_repo import KnowledgeRepository
+from src.memory.repositories.manifest_repo import ManifestRepository
 from src.memory.repositories.memory_repo import MemoryRepository
 from src.memory.repositories.profile_repo import ProfileRepository
 from src.memory.repositories.state_repo import StateRepository
+from src.memory.write_queue import GroupCommitWriter, WriteResult
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+class TimedConnection(sqlite3.Connection):
+    """Conexión que mide cada sentencia en `query_stats` (ver query_stats.py)."""
+
+    def execute(self, sql: str, parameters: Any = (), /) -> sqlite3.Cursor:
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._record(sql, parameters, time.perf_counter() - start)
+
+    def executemany(self, sql: str, parameters: Any, /) -> sqlite3.Cursor:
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, parameters)
+        finally:
+            self._record(sql, None, time.perf_counter() - start)
+
+    def _record(self, sql: str, parameters: Any, seconds: float) -> None:
+        if query_stats.record(sql, seconds):
+            log_slow_query(sql, parameters, seconds, super().execute)
+
 
 class SQLiteStore:
     """
     Gestor de persistencia local basado en SQLite con soporte vectorial.
     Utiliza aiosqlite para operaciones asíncronas y sqlite-vec para búsqueda semántica.
+
+    Mantiene una conexión escritora dedicada y un pool de conexiones de solo
+    lectura en modo WAL, de modo que las búsquedas no se serializan detrás de
+    las escrituras. Todas las escrituras pasan por un escritor con group commit.
     """
 
-    def __init__(self, db_path: str) -> None:
+    def __init__(self, db_path: str, read_pool_size: int | None = None) -> None:
         self.db_path = db_path
         self._connection: aiosqlite.Connection | None = None
+        # Dimensión activa de memory_embeddings (init_db la lee de la base)
+        self.embedding_dim = settings.EMBEDDING_DIMENSION
         self._lock = asyncio.Lock()
+        self._writer = GroupCommitWriter(
+            self.get_writer,
+            window_ms=settings.SQLITE_GROUP_COMMIT_WINDOW_MS,
+            max_batch=settings.SQLITE_GROUP_COMMIT_MAX_BATCH,
+        )
+
+        pool_size = (
+            settings.SQLITE_READ_POOL_SIZE if read_pool_size is None else read_pool_size
+        )
+        # Una base en memoria no es compartible entre conexiones
+        self._read_pool_size = 0 if db_path == ":memory:" else max(0, pool_size)
+        self._readers: list[aiosqlite.Connection] = []
+        self._reader_pool: asyncio.Queue[aiosqlite.Connection] | None = None
 
         # Repositorios
         self._memory_repo = MemoryRepository(self)
         self._profile_repo = ProfileRepository(self)
         self.state_repo = StateRepository(self)
+        self.manifest_repo = ManifestRepository(self)
+        self.knowledge_repo = KnowledgeRepository(self, self._memory_repo)
 
         logger.info(f"SQLiteStore inicializado con ruta: {db_path}")
 
+    async def _open_connection(self, read_only: bool = False) -> aiosqlite.Connection:
+        """Abre una conexión con sqlite-vec cargado y los pragmas configurados."""
+        factory = (
+            TimedConnection
+            if settings.SQLITE_QUERY_STATS_ENABLED
+            else sqlite3.Connection
+        )
+        conn = await aiosqlite.connect(self.db_path, factory=factory)
+
+        # Cargar extensión sqlite-vec usando la ruta de la librería
+        await conn.enable_load_extension(True)
+        await conn.load_extension(sqlite_vec.loadable_path())
+
+        # Configurar row_factory para obtener diccionarios
+        conn.row_factory = aiosqlite.Row
+
+        await conn.execute(f"PRAGMA busy_timeout = {settings.SQLITE_BUSY_TIMEOUT_MS}")
+        await conn.execute(f"PRAGMA mmap_size = {settings.SQLITE_MMAP_SIZE}")
+        await conn.execute(f"PRAGMA cache_size = {settings.SQLITE_CACHE_SIZE}")
+        if read_only:
+            await conn.execute("PRAGMA query_only = ON")
+        else:
+            # Bases nuevas: páginas libres recuperables con incremental_vacuum.
+            # Debe preceder a journal_mode; sin efecto si la base ya existe.
+            await conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            await conn.execute(f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+            await conn.execute(f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}")
+            await conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
     async def connect(self) -> aiosqlite.Connection:
-        """Establece la conexión y carga las extensiones necesarias."""
+        """Establece las conexiones (escritor + lectores) y carga extensiones."""
         async with self._lock:
             if self._connection is None:
                 # Asegurar que el directorio existe
                 Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
 
-                # Conectar
-                self._connection = await aiosqlite.connect(self.db_path)
+                # El escritor se abre primero: fija el journal_mode (WAL) del archivo
+                self._connection = await self._open_connection()
 
-                # Cargar extensión sqlite-vec usando la ruta de la librería
-                await self._connection.enable_load_extension(True)
-                await self._connection.load_extension(sqlite_vec.loadable_path())
-
-                # Configurar row_factory para obtener diccionarios
-                self._connection.row_factory = aiosqlite.Row
+                self._reader_pool = asyncio.Queue()
+                for _ in range(self._read_pool_size):
+                    reader = await self._open_connection(read_only=True)
+                    self._readers.append(reader)
+                    self._reader_pool.put_nowait(reader)
 
                 logger.info(
-                    "Conexión a SQLite establecida y extensión vectorial cargada."
+                    "Conexión a SQLite establecida y extensión vectorial cargada "
+                    "(1 escritor, %d lectores).",
+                    len(self._readers),
                 )
 
         return self._connection
 
     async def disconnect(self) -> None:
-        """Cierra la conexión de forma segura."""
+        """Drena las escrituras pendientes y cierra todas las conexiones."""
+        await self._writer.stop()
+        for reader in self._readers:
+            await reader.close()
+        self._readers = []
+        self._reader_pool = None
         if self._connection:
             await self._connection.close()
             self._connection = None
@@ -83,9 +176,15 @@ class SQLiteStore:
             schema_sql = await f.read()
 
         try:
+            # La tabla vectorial se crea antes con la dimensión configurada;
+            # en una base existente conserva la suya hasta la conmutación.
+            await db.execute(
+                embeddings_table_ddl("memory_embeddings", settings.EMBEDDING_DIMENSION)
+            )
             # Ejecutar script de inicialización
             await db.executescript(schema_sql)
             await db.commit()
+            self.embedding_dim = await vector_dimension(db) or self.embedding_dim
             logger.info("Base de datos inicializada con el esquema proporcionado.")
         except Exception as e:
             logger.error(f"Error inicializando la base de datos: {e}")
@@ -93,9 +192,77 @@ class SQLiteStore:
             raise
 
     async def get_db(self) -> aiosqlite.Connection:
-        """Retorna la conexión activa, conectando si es necesario."""
+        """Retorna la conexión escritora, conectando si es necesario."""
+        return await self.connect()
+
+    async def get_writer(self) -> aiosqlite.Connection:
+        """Retorna la conexión dedicada a escrituras."""
         return await self.connect()
 
+    @contextlib.asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Presta una conexión de solo lectura del pool.
+
+        Si el pool está deshabilitado (tamaño 0 o base en memoria) se usa el
+        escritor, preservando el comportamiento de conexión única.
+        """
+        writer = await self.connect()
+        pool = self._reader_pool
+        if pool is None or not self._readers:
+            yield writer
+            return
+
+        conn = await pool.get()
+        try:
+            yield conn
+        finally:
+            pool.put_nowait(conn)
+
+    async def execute_write(self, sql: str, params: Sequence[Any] = ()) -> WriteResult:
+        """Encola una sentencia de escritura; retorna lastrowid/rowcount."""
+        return await self._writer.execute(sql, params)
+
+    async def execute_write_many(
+        self, sql: str, seq_of_params: Sequence[Sequence[Any]]
+    ) -> WriteResult:
+        """Encola una sentencia executemany en el escritor."""
+        return await self._writer.execute_many(sql, seq_of_params)
+
+    async def run_in_writer(
+        self, op: Callable[[aiosqlite.Connection], Awaitable[T]]
+    ) -> T:
+        """
+        Ejecuta varias sentencias de forma atómica dentro del escritor.
+
+        La operación recibe la conexión escritora y corre en su propio
+        SAVEPOINT; no debe llamar a commit() ni rollback().
+        """
+        return await self._writer.submit(op)
+
+    async def snapshot(self, target_path: str) -> None:
+        """
+        Crea una copia consistente con VACUUM INTO en una conexión efímera,
+        sin bloquear al escritor ni al pool de lectores.
+        """
+        await self.connect()
+        async with aiosqlite.connect(self.db_path) as conn:
+            await conn.execute("VACUUM INTO ?", (target_path,))
+
+    async def vacuum(self, auto_vacuum: str | None = None) -> None:
+        """
+        VACUUM completo en una conexión efímera (no puede correr dentro de la
+        transacción del escritor). `auto_vacuum` cambia el modo de la base.
+        """
+        await self.connect()
+        async with aiosqlite.connect(self.db_path) as conn:
+            await conn.execute(
+                f"PRAGMA busy_timeout = {settings.SQLITE_BUSY_TIMEOUT_MS}"
+            )
+            if auto_vacuum:
+                await conn.execute(f"PRAGMA auto_vacuum = {auto_vacuum}")
+            await conn.execute("VACUUM")
+
     # === Delegación a MemoryRepository ===
 
     async def insert_memory(
@@ -127,9 +294,41 @@ class SQLiteStore:
     async def insert_vector(self, memory_id: int, embedding: list[float]) -> int:
         return await self._memory_repo.insert_vector(memory_id, embedding)
 
+    async def insert_memories_batch(
+        self,
+        chat_id: str,
+        memory_type: str,
+        namespace: str,
+        records: list[dict[str, Any]],
+    ) -> list[int]:
+        return await self._memory_repo.insert_memories_batch(
+            chat_id, memory_type, namespace, records
+        )
+
+    async def file_chunk_hashes(
+        self, filename: str, namespace: str = "global"
+    ) -> dict[str, tuple[int, bool]]:
+        return await self._memory_repo.file_chunk_hashes(filename, namespace)
+
+    async def apply_file_diff(
+        self,
+        chat_id: str,
+        memory_type: str,
+        namespace: str,
+        records: list[dict[str, Any]],
+        activate_ids: list[int],
+        deactivate_ids: list[int],
+    ) -> list[int]:
+        return await self._memory_repo.apply_file_diff(
+            chat_id, memory_type, namespace, records, activate_ids, deactivate_ids
+        )
+
     async def hash_exists(self, content_hash: str) -> bool:
         return await self._memory_repo.hash_exists(content_hash)
 
+    async def existing_hashes(self, content_hashes: list[str]) -> set[str]:
+        return await self._memory_repo.existing_hashes(content_hashes)
+
     async def soft_delete_memories(self, memory_ids: list[int]) -> int:
         return await self._memory_repo.soft_delete_memories(memory_ids)
 
@@ -143,11 +342,18 @@ class SQLiteStore:
 
     # === Delegación a ProfileRepository ===
 
-    async def save_profile(self, chat_id: str, profile_data: dict) -> None:
-        await self._profile_repo.save_profile(chat_id, profile_data)
+    async def save_profile(
+        self, chat_id: str, profile_data: dict, archived: dict | None = None
+    ) -> None:
+        await self._profile_repo.save_profile(chat_id, profile_data, archived)
 
     async def load_profile(self, chat_id: str) -> dict | None:
         return await self._profile_repo.load_profile(chat_id)
 
+    async def load_profile_history(
+        self, chat_id: str, kind: str, limit: int = 50, before_id: int | None = None
+    ) -> list[dict]:
+        return await self._profile_repo.load_history(chat_id, kind, limit, before_id)
+
     async def list_all_chat_ids(self) -> list[str]:
         return await self._profile_repo.list_all_chat_ids()
@@ -3,9 +3,15 @@ from enum import Enum
 from typing import Any
 
 from src.core.config import settings
+from src.memory.embedding_dimension import backfill_dimension, switch_dimension
 from src.memory.hybrid_search import HybridSearch
-from src.memory.ingestion_pipeline import IngestionPipeline
+from src.memory.ingestion_pipeline import FileDiff, IngestionPipeline
 from src.memory.sqlite_store import SQLiteStore
+from src.memory.vector_quantization import (
+    QUANTIZATION_MODES,
+    backfill_quantized,
+    ensure_quantized_table,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +53,22 @@ class VectorMemoryManager:
             results = [r for r in results if r["memory_type"] == context_type.value]
         return results
 
+    async def retrieve_context_multi(
+        self, query: str, scopes: list[tuple[str, str, int]]
+    ) -> list[list[dict[str, Any]]]:
+        """
+        Recupera memorias de varios ámbitos (namespace, user_id, limit) con un
+        solo embedding de la consulta. Retorna resultados por ámbito, en orden.
+        """
+        import time
+
+        start = time.monotonic()
+        results = await self.hybrid_search.search_multi(query, list(scopes))
+        elapsed = (time.monotonic() - start) * 1000
+        for (namespace, user_id, _), scope_results in zip(scopes, results, strict=True):
+            self._log_trace(user_id, namespace, query, scope_results, elapsed)
+        return results
+
     def _log_trace(
         self, uid: str, ns: str, q: str, res: list[dict[str, Any]], ms: float
     ) -> None:
@@ -91,6 +113,24 @@ class VectorMemoryManager:
             metadata=metadata,
         )
 
+    async def update_file_knowledge(
+        self,
+        filename: str,
+        content: str,
+        metadata: dict[str, Any] | None = None,
+        namespace: str = "global",
+        user_id: str = "system",
+    ) -> FileDiff:
+        """Re-ingesta diferencial: solo embebe los chunks nuevos del archivo."""
+        return await self.pipeline.update_file(
+            chat_id=user_id,
+            text=content,
+            filename=filename,
+            memory_type=MemoryType.DOCUMENT.value,
+            namespace=namespace,
+            metadata=metadata,
+        )
+
     async def delete_file_knowledge(
         self, filename: str, namespace: str = "global"
     ) -> int:
@@ -100,6 +140,78 @@ class VectorMemoryManager:
             logger.info("Deactivated %d frags of %s", count, filename)
         return count
 
+    async def refresh_global_index(self, filename: str | None = None) -> None:
+        """Recarga el índice global completo o solo los vectores de un archivo."""
+        index = self.hybrid_search.global_index
+        if index is None:
+            return
+        try:
+            if filename is None or not index.ready:
+                await index.load()
+            else:
+                await index.refresh_file(filename)
+        except Exception as e:
+            logger.error("Global vector index refresh failed: %s", e)
+
+    async def migrate_embedding_dimension(self) -> bool:
+        """
+        Lleva `memory_embeddings` a `EMBEDDING_DIMENSION`: rellena el staging
+        mientras la tabla actual sirve y conmuta de forma atómica. Después
+        rellena las tablas cuantizadas y recarga los índices en memoria, que
+        dependen de la dimensión.
+        """
+        target = settings.EMBEDDING_DIMENSION
+        if self.store.embedding_dim == target:
+            return False
+        embedder = self.pipeline.embedding_service
+        try:
+            for _ in range(3):
+                await backfill_dimension(self.store, target, embedder)
+                # Sin búsqueda cuantizada hasta rellenar las tablas recreadas
+                self.hybrid_search.vector_search.quantization = None
+                if await switch_dimension(self.store, target):
+                    break
+            else:
+                logger.error("Embedding dimension switch to %d did not settle", target)
+                return False
+        except Exception as e:
+            logger.error("Embedding dimension migration failed: %s", e)
+            return False
+
+        # Las tablas cuantizadas se recrearon vacías: se rellenan a la nueva
+        # dimensión y se reactiva la búsqueda cuantizada
+        await self.enable_quantization()
+        await self.refresh_global_index()
+        for backend in self.hybrid_search.ann_backends.values():
+            if backend.index is not None:
+                await backend.build()
+        return True
+
+    async def enable_quantization(self) -> None:
+        """Completa el backfill cuantizado y activa la búsqueda int8/bit."""
+        mode = settings.VECTOR_QUANTIZATION
+        if mode not in QUANTIZATION_MODES:
+            return
+        try:
+            await self.store.run_in_writer(lambda db: ensure_quantized_table(db, mode))
+            await backfill_quantized(self.store, mode)
+            self.hybrid_search.vector_search.quantization = mode
+            logger.info("Quantized vector search enabled (%s)", mode)
+        except Exception as e:
+            logger.error("Quantized vector backfill failed: %s", e)
+
+    async def start_ann_backends(self) -> None:
+        """Carga/entrena los índices ANN configurados y arranca su sincronización."""
+        for backend in self.hybrid_search.ann_backends.values():
+            try:
+                await backend.start(settings.ANN_IVF_SYNC_SECONDS)
+            except Exception as e:
+                logger.error("ANN backend %s failed to start: %s", backend.namespace, e)
+
+    async def stop_ann_backends(self) -> None:
+        for backend in self.hybrid_search.ann_backends.values():
+            await backend.stop()
+
     async def get_memories_by_type(
         self,
         user_id: str,
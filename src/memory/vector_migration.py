@@ -0,0 +1,90 @@
+# src/memory/vector_migration.py
+"""
+Migración en segundo plano del layout vectorial legado.
+
+Mueve los vectores de `memory_vectors` + `vector_memory_map` a la tabla
+particionada `memory_embeddings` en lotes pequeños. Cada lote es una única
+intención del escritor: inserta en la tabla nueva y borra el mapeo legado
+(el trigger `cleanup_vector_on_map_delete` elimina el vector físico), de modo
+que una memoria nunca queda en ambos layouts tras el COMMIT.
+"""
+
+import asyncio
+import logging
+
+import aiosqlite
+
+from src.memory.embedding_dimension import DEFAULT_DIMENSION
+from src.memory.sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+_BATCH_SIZE = 500
+
+
+async def _migrate_batch(db: aiosqlite.Connection, batch_size: int, dim: int) -> int:
+    async with db.execute(
+        "SELECT memory_id FROM vector_memory_map ORDER BY memory_id LIMIT ?",
+        (batch_size,),
+    ) as cursor:
+        ids = [row[0] for row in await cursor.fetchall()]
+    if not ids:
+        return 0
+
+    marks = ",".join(["?"] * len(ids))
+    # El layout legado es de 768 dims: se trunca si la dimensión activa es menor
+    embedding = (
+        "v.embedding"
+        if dim == DEFAULT_DIMENSION
+        else f"vec_normalize(vec_slice(v.embedding, 0, {int(dim)}))"
+    )
+    await db.execute(
+        f"""
+        INSERT INTO memory_embeddings
+            (memory_id, embedding, namespace, chat_id, memory_type, is_active)
+        SELECT m.memory_id, {embedding}, mem.namespace, mem.chat_id,
+               mem.memory_type, mem.is_active
+        FROM vector_memory_map m
+        JOIN memory_vectors v ON v.rowid = m.vector_id
+        JOIN memories mem ON mem.id = m.memory_id
+        WHERE m.memory_id IN ({marks})
+          AND NOT EXISTS (
+              SELECT 1 FROM memory_embeddings e WHERE e.memory_id = m.memory_id
+          )
+        """,  # noqa: S608
+        ids,
+    )
+    await db.execute(
+        f"DELETE FROM vector_memory_map WHERE memory_id IN ({marks})",  # noqa: S608
+        ids,
+    )
+    return len(ids)
+
+
+async def migrate_legacy_vectors(
+    store: SQLiteStore, batch_size: int = _BATCH_SIZE
+) -> int:
+    """
+    Vacía el layout legado hacia `memory_embeddings`.
+
+    Idempotente: en una base nueva o ya migrada termina en la primera
+    consulta. Cede el loop entre lotes para no acaparar el escritor.
+    """
+    total = 0
+    while True:
+        try:
+            moved = await store.run_in_writer(
+                lambda db: _migrate_batch(db, batch_size, store.embedding_dim)
+            )
+        except Exception as e:
+            logger.error("Vector migration failed after %d rows: %s", total, e)
+            return total
+        if moved == 0:
+            break
+        total += moved
+        logger.debug("Vector migration: %d rows moved", total)
+        await asyncio.sleep(0)
+
+    if total:
+        logger.info("Vector migration complete: %d vectors partitioned", total)
+    return total
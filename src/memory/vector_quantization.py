@@ -0,0 +1,296 @@
+# src/memory/vector_quantization.py
+"""
+Almacenamiento vectorial cuantizado (int8 / binario) con rerank exacto.
+
+Modo opt-in (`VECTOR_QUANTIZATION`): una tabla vec0 paralela guarda los
+vectores como `INT8[d]` (4x menos bytes) o `BIT[d]` (32x menos) para la
+primera etapa KNN. Se sobre-recupera `limit * overfetch` candidatos y se
+reordenan con la distancia L2 exacta contra los float32 de
+`memory_embeddings`, que siguen siendo la fuente de verdad.
+
+Los embeddings de text-embedding-004 están normalizados, por lo que la
+cuantización int8 usa el rango 'unit' ([-1, 1]).
+"""
+
+import functools
+import logging
+import struct
+import time
+from typing import TYPE_CHECKING, Any
+
+import aiosqlite
+import numpy as np
+
+from src.memory.embedding_dimension import DEFAULT_DIMENSION, vector_dimension
+
+if TYPE_CHECKING:
+    from src.memory.sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_MODES = ("int8", "bit")
+
+_COLUMN_TYPES = {"int8": "INT8", "bit": "BIT"}
+_QUANTIZE_SQL = {
+    "int8": "vec_quantize_int8(?, 'unit')",
+    "bit": "vec_quantize_binary(?)",
+}
+
+_BATCH_SIZE = 500
+
+
+def quantized_table(mode: str) -> str:
+    """Nombre de la tabla vec0 para el modo de cuantización."""
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown vector quantization mode: {mode!r}")
+    return f"memory_embeddings_{mode}"
+
+
+def quantized_copy_sql(mode: str) -> str:
+    """
+    Copia un vector de `memory_embeddings` a la tabla cuantizada.
+    Parámetro: (memory_id,). Sin subconsultas: vec0 pierde el subtipo del
+    vector cuantizado si el planner materializa el SELECT.
+    """
+    table = quantized_table(mode)
+    return f"""
+        INSERT INTO {table}
+            (memory_id, embedding, namespace, chat_id, memory_type, is_active)
+        SELECT memory_id, {_QUANTIZE_SQL[mode].replace("?", "embedding")},
+               namespace, chat_id, memory_type, is_active
+        FROM memory_embeddings WHERE memory_id = ?
+    """  # noqa: S608
+
+
+async def ensure_quantized_table(db: aiosqlite.Connection, mode: str) -> None:
+    """
+    Crea la tabla cuantizada y sus triggers de sincronización (idempotente).
+    La dimensión se toma de `memory_embeddings`. No hace COMMIT.
+    """
+    table = quantized_table(mode)
+    dim = await vector_dimension(db) or DEFAULT_DIMENSION
+    statements = [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING vec0(
+            memory_id INTEGER PRIMARY KEY,
+            embedding {_COLUMN_TYPES[mode]}[{dim}],
+            namespace TEXT PARTITION KEY,
+            chat_id TEXT,
+            memory_type TEXT,
+            is_active INTEGER
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_active
+        AFTER UPDATE OF is_active ON memories BEGIN
+            UPDATE {table} SET is_active = new.is_active WHERE memory_id = new.id;
+        END
+        """,  # noqa: S608
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_cleanup
+        AFTER DELETE ON memories BEGIN
+            DELETE FROM {table} WHERE memory_id = old.id;
+        END
+        """,  # noqa: S608
+    ]
+    for sql in statements:
+        await db.execute(sql)
+
+
+async def rebuild_quantized_tables(db: aiosqlite.Connection) -> None:
+    """Recrea vacías las tablas cuantizadas existentes (cambio de dimensión)."""
+    for mode in QUANTIZATION_MODES:
+        table = quantized_table(mode)
+        async with db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ) as cursor:
+            if await cursor.fetchone() is None:
+                continue
+        for trigger in (f"{table}_active", f"{table}_cleanup"):
+            await db.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        await db.execute(f"DROP TABLE {table}")
+        await ensure_quantized_table(db, mode)
+
+
+async def backfill_quantized(
+    store: "SQLiteStore", mode: str, batch_size: int = _BATCH_SIZE
+) -> int:
+    """
+    Copia a la tabla cuantizada los vectores que aún no están en ella.
+
+    Recorre `memories` por id (índice primario) y hace lecturas puntuales en
+    `memory_embeddings`; cada lote es una intención del escritor.
+    """
+    sql = quantized_copy_sql(mode)
+    exists_sql = f"SELECT 1 FROM {quantized_table(mode)} WHERE memory_id = ?"  # noqa: S608
+
+    async def _batch(db: aiosqlite.Connection, after_id: int) -> tuple[int, int]:
+        async with db.execute(
+            "SELECT id FROM memories WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, batch_size),
+        ) as cursor:
+            ids = [int(r[0]) for r in await cursor.fetchall()]
+        if not ids:
+            return after_id, 0
+        missing = []
+        for mid in ids:
+            async with db.execute(exists_sql, (mid,)) as cursor:
+                if await cursor.fetchone() is None:
+                    missing.append((mid,))
+        cursor = await db.executemany(sql, missing)
+        return ids[-1], max(cursor.rowcount, 0)
+
+    total, cursor_id = 0, 0
+    while True:
+        last_id, copied = await store.run_in_writer(
+            functools.partial(_batch, after_id=cursor_id)
+        )
+        if last_id == cursor_id:
+            break
+        cursor_id = last_id
+        total += copied
+
+    if total:
+        logger.info("Quantized vectors backfilled (%s): %d", mode, total)
+    return total
+
+
+async def search_quantized(
+    db: aiosqlite.Connection,
+    mode: str,
+    query_embedding: list[float],
+    limit: int,
+    chat_id: str | None = None,
+    namespace: str | None = None,
+    overfetch: int = 4,
+) -> list[tuple[int, float]]:
+    """KNN cuantizado con sobre-recuperación y rerank L2 exacto."""
+    blob = struct.pack(f"{len(query_embedding)}f", *query_embedding)
+    query = f"""
+        SELECT memory_id FROM {quantized_table(mode)}
+        WHERE embedding MATCH {_QUANTIZE_SQL[mode]}
+        AND k = ?
+        AND is_active = 1
+    """  # noqa: S608
+    params: list[Any] = [blob, limit * max(1, overfetch)]
+    if namespace:
+        query += " AND namespace = ?"
+        params.append(namespace)
+    if chat_id:
+        query += " AND chat_id = ?"
+        params.append(chat_id)
+
+    async with db.execute(query, params) as cursor:
+        candidates = [int(r[0]) for r in await cursor.fetchall()]
+    if not candidates:
+        return []
+
+    # Lecturas puntuales: vec0 resuelve `memory_id = ?` sin escanear la tabla
+    ids, vectors = [], []
+    for mid in candidates:
+        async with db.execute(
+            "SELECT embedding FROM memory_embeddings WHERE memory_id = ?", (mid,)
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is not None:
+            ids.append(mid)
+            vectors.append(np.frombuffer(row[0], dtype=np.float32))
+    if not ids:
+        return []
+
+    diff = np.vstack(vectors) - np.asarray(query_embedding, dtype=np.float32)
+    dists = np.sqrt(np.einsum("ij,ij->i", diff, diff))
+    order = np.argsort(dists)[:limit]
+    return [(ids[i], float(dists[i])) for i in order]
+
+
+async def benchmark(
+    store: "SQLiteStore",
+    mode: str,
+    k: int = 10,
+    queries: int = 100,
+    overfetch: int = 4,
+    namespace: str | None = None,
+) -> dict[str, Any]:
+    """
+    Compara el layout float32 con el cuantizado: tamaño en disco,
+    latencia p50/p95 y recall@k, usando vectores almacenados como consultas.
+    """
+    table = quantized_table(mode)
+    async with store.reader() as db:
+        sizes = {
+            name: await _table_bytes(db, name) for name in ("memory_embeddings", table)
+        }
+        async with db.execute(
+            "SELECT id FROM memories WHERE is_active = 1 ORDER BY RANDOM() LIMIT ?",
+            (queries,),
+        ) as cursor:
+            sample = [int(r[0]) for r in await cursor.fetchall()]
+
+        exact_ms: list[float] = []
+        quant_ms: list[float] = []
+        recall: list[float] = []
+        for mid in sample:
+            async with db.execute(
+                "SELECT embedding FROM memory_embeddings WHERE memory_id = ?", (mid,)
+            ) as cursor:
+                row = await cursor.fetchone()
+            if row is None:
+                continue
+            vec = np.frombuffer(row[0], dtype=np.float32).tolist()
+
+            t0 = time.perf_counter()
+            exact = await _exact_search(db, row[0], k, namespace)
+            t1 = time.perf_counter()
+            approx = await search_quantized(
+                db, mode, vec, k, namespace=namespace, overfetch=overfetch
+            )
+            t2 = time.perf_counter()
+            exact_ms.append((t1 - t0) * 1000)
+            quant_ms.append((t2 - t1) * 1000)
+            if exact:
+                truth = set(exact)
+                recall.append(len(truth & {m for m, _ in approx}) / len(truth))
+
+    def _pct(values: list[float], q: float) -> float:
+        return round(float(np.percentile(values, q)), 3) if values else 0.0
+
+    return {
+        "mode": mode,
+        "k": k,
+        "overfetch": overfetch,
+        "queries": len(exact_ms),
+        "bytes_float32": sizes["memory_embeddings"],
+        f"bytes_{mode}": sizes[table],
+        "exact_p50_ms": _pct(exact_ms, 50),
+        "exact_p95_ms": _pct(exact_ms, 95),
+        f"{mode}_p50_ms": _pct(quant_ms, 50),
+        f"{mode}_p95_ms": _pct(quant_ms, 95),
+        "recall_at_k": round(float(np.mean(recall)), 4) if recall else 0.0,
+    }
+
+
+async def _table_bytes(db: aiosqlite.Connection, table: str) -> int:
+    """Bytes ocupados por una tabla vec0 y sus tablas sombra (vía dbstat)."""
+    async with db.execute(
+        "SELECT COALESCE(SUM(pgsize), 0) FROM dbstat "
+        "WHERE name = ? OR name LIKE ? ESCAPE '\\'",
+        (table, table.replace("_", "\\_") + "\\_%"),
+    ) as cursor:
+        row = await cursor.fetchone()
+        return int(row[0]) if row else 0
+
+
+async def _exact_search(
+    db: aiosqlite.Connection, blob: bytes, k: int, namespace: str | None
+) -> list[int]:
+    query = (
+        "SELECT memory_id FROM memory_embeddings "
+        "WHERE embedding MATCH ? AND k = ? AND is_active = 1"
+    )
+    params: list[Any] = [blob, k]
+    if namespace:
+        query += " AND namespace = ?"
+        params.append(namespace)
+    async with db.execute(query, params) as cursor:
+        return [int(r[0]) for r in await cursor.fetchall()]
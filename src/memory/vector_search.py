@@ -7,20 +7,44 @@ Implements K-Nearest Neighbors (KNN) search for semantic retrieval.
 
 import logging
 import struct
-from typing import Any
+from typing import Any, Protocol
 
+from src.core.config import settings
+from src.memory.embedding_dimension import fit_dimension
 from src.memory.sqlite_store import SQLiteStore
+from src.memory.vector_quantization import search_quantized
 
 logger = logging.getLogger(__name__)
 
 
+class VectorBackend(Protocol):
+    """Backend alternativo (exacto en memoria o ANN) para un namespace."""
+
+    @property
+    def ready(self) -> bool: ...
+
+    async def search(
+        self, query_embedding: list[float], limit: int, chat_id: str | None = None
+    ) -> list[tuple[int, float]]: ...
+
+
 class VectorSearch:
     """
     Gestor de búsqueda vectorial KNN.
+
+    Por defecto consulta sqlite-vec; un namespace puede delegarse a un
+    `VectorBackend` registrado, que se usa solo cuando está listo.
     """
 
-    def __init__(self, store: SQLiteStore):
+    def __init__(
+        self, store: SQLiteStore, backends: dict[str, VectorBackend] | None = None
+    ):
         self.store = store
+        self.backends: dict[str, VectorBackend] = dict(backends or {})
+        # Modo cuantizado ("int8" | "bit"); se activa cuando el backfill termina
+        self.quantization: str | None = None
+        # Hasta que la migración vacíe el layout legado también se consulta
+        self._legacy_pending = True
 
     async def search(
         self,
@@ -32,8 +56,12 @@ class VectorSearch:
         """
         Realiza una búsqueda KNN en la tabla de vectores.
 
+        Los filtros (namespace, chat_id, is_active) se aplican dentro del
+        escaneo KNN, por lo que los k resultados ya pertenecen al ámbito pedido.
+
         Args:
-            query_embedding: Vector de la consulta (768 dims)
+            query_embedding: Vector de la consulta; se trunca a la dimensión
+                activa de `memory_embeddings` si es más largo
             limit: Número máximo de resultados
             chat_id: Opcional, filtrar por chat
             namespace: Opcional, filtrar por namespace
@@ -41,38 +69,111 @@ class VectorSearch:
         Returns:
             Lista de tuplas (memory_id, distance)
         """
-        db = await self.store.get_db()
-        vector_blob = struct.pack(f"{len(query_embedding)}f", *query_embedding)
+        query_embedding = fit_dimension(query_embedding, self.store.embedding_dim)
+
+        backend = self.backends.get(namespace)
+        if backend is not None and backend.ready:
+            return await backend.search(query_embedding, limit, chat_id)
 
-        # SQL para búsqueda vectorial con sqlite-vec
-        # vec_distance_L2 o vec_distance_cosine
-        # Usamos rowid para unir con el mapa de memorias
+        if self.quantization:
+            return await self._search_quantized(
+                query_embedding, limit, chat_id, namespace
+            )
+
+        vector_blob = struct.pack(f"{len(query_embedding)}f", *query_embedding)
 
         query = """
-            SELECT
-                m.memory_id,
-                v.distance
-            FROM memory_vectors v
-            JOIN vector_memory_map m ON v.rowid = m.vector_id
-            JOIN memories mem ON m.memory_id = mem.id
-            WHERE v.embedding MATCH ?
+            SELECT memory_id, distance
+            FROM memory_embeddings
+            WHERE embedding MATCH ?
             AND k = ?
+            AND is_active = 1
         """
         params: list[Any] = [vector_blob, limit]
 
-        if chat_id:
-            query += " AND mem.chat_id = ?"
-            params.append(chat_id)
-
         if namespace:
-            query += " AND mem.namespace = ?"
+            query += " AND namespace = ?"
             params.append(namespace)
 
+        if chat_id:
+            query += " AND chat_id = ?"
+            params.append(chat_id)
+
         try:
-            async with db.execute(query, params) as cursor:
+            async with self.store.reader() as db, db.execute(query, params) as cursor:
                 rows = await cursor.fetchall()
                 # sqlite-vec devuelve la distancia en la columna 'distance'
-                return [(row[0], row[1]) for row in rows]
+                results = [(row[0], row[1]) for row in rows]
         except Exception as e:
             logger.error(f"Error in vector search: {e}")
             return []
+
+        if self._legacy_pending:
+            legacy = await self._search_legacy(vector_blob, limit, chat_id, namespace)
+            if legacy:
+                seen = {mid for mid, _ in results}
+                results.extend(r for r in legacy if r[0] not in seen)
+                results = sorted(results, key=lambda r: r[1])[:limit]
+        return results
+
+    async def _search_quantized(
+        self,
+        query_embedding: list[float],
+        limit: int,
+        chat_id: str | None,
+        namespace: str,
+    ) -> list[tuple[int, float]]:
+        """Primera etapa int8/bit con sobre-recuperación y rerank exacto."""
+        mode = self.quantization or ""
+        try:
+            async with self.store.reader() as db:
+                return await search_quantized(
+                    db,
+                    mode,
+                    query_embedding,
+                    limit,
+                    chat_id,
+                    namespace,
+                    settings.VECTOR_QUANTIZATION_OVERFETCH,
+                )
+        except Exception as e:
+            logger.error(f"Error in quantized vector search: {e}")
+            return []
+
+    async def _search_legacy(
+        self,
+        vector_blob: bytes,
+        limit: int,
+        chat_id: str | None,
+        namespace: str,
+    ) -> list[tuple[int, float]]:
+        """KNN sobre memory_vectors + vector_memory_map (filtrado posterior)."""
+        try:
+            async with self.store.reader() as db:
+                async with db.execute("SELECT 1 FROM vector_memory_map LIMIT 1") as c:
+                    if await c.fetchone() is None:
+                        self._legacy_pending = False
+                        return []
+
+                query = """
+                    SELECT m.memory_id, v.distance
+                    FROM memory_vectors v
+                    JOIN vector_memory_map m ON v.rowid = m.vector_id
+                    JOIN memories mem ON m.memory_id = mem.id
+                    WHERE v.embedding MATCH ?
+                    AND k = ?
+                    AND mem.is_active = 1
+                """
+                params: list[Any] = [vector_blob, limit]
+                if chat_id:
+                    query += " AND mem.chat_id = ?"
+                    params.append(chat_id)
+                if namespace:
+                    query += " AND mem.namespace = ?"
+                    params.append(namespace)
+
+                async with db.execute(query, params) as cursor:
+                    return [(row[0], row[1]) for row in await cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Error in legacy vector search: {e}")
+            return []
@@ -0,0 +1,198 @@
+# src/memory/write_queue.py
+"""
+Group commit para las escrituras de SQLite.
+
+Un único coroutine escritor consume intenciones de escritura de una cola,
+agrupa todas las que llegan dentro de una ventana de pocos milisegundos y las
+confirma en una sola transacción. Cada intención corre dentro de su propio
+SAVEPOINT, de modo que un fallo aislado no revierte al resto del grupo.
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+WriteOp = Callable[[aiosqlite.Connection], Awaitable[Any]]
+
+
+@dataclass(frozen=True)
+class WriteResult:
+    """Resultado de una sentencia de escritura simple."""
+
+    lastrowid: int | None
+    rowcount: int
+
+
+@dataclass
+class _WriteIntent:
+    op: WriteOp
+    future: asyncio.Future[Any]
+
+
+class GroupCommitWriter:
+    """
+    Serializa todas las escrituras sobre la conexión escritora.
+
+    Los llamadores esperan un futuro que se resuelve tras el COMMIT del grupo,
+    por lo que cualquier lectura posterior (incluido el pool de lectores) ve
+    el dato confirmado.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Awaitable[aiosqlite.Connection]],
+        window_ms: float = 2.0,
+        max_batch: int = 128,
+    ) -> None:
+        self._connect = connect
+        self._window = window_ms / 1000
+        self._max_batch = max(1, max_batch)
+        self._queue: asyncio.Queue[_WriteIntent | None] | None = None
+        self._task: asyncio.Task | None = None
+
+        # Contadores para observabilidad/tests
+        self.groups_committed = 0
+        self.intents_committed = 0
+
+    def _ensure_started(self) -> asyncio.Queue[_WriteIntent | None]:
+        """Arranca el coroutine escritor en el loop actual si no existe."""
+        loop = asyncio.get_running_loop()
+        if (
+            self._task is None
+            or self._task.done()
+            or self._task.get_loop() is not loop
+            or self._queue is None
+        ):
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run(self._queue))
+        return self._queue
+
+    async def submit(self, op: Callable[[aiosqlite.Connection], Awaitable[T]]) -> T:
+        """Encola una operación y espera a que su grupo sea confirmado."""
+        queue = self._ensure_started()
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        queue.put_nowait(_WriteIntent(op, future))
+        result: T = await future
+        return result
+
+    async def execute(self, sql: str, params: Sequence[Any] = ()) -> WriteResult:
+        """Encola una sentencia simple."""
+
+        async def _op(db: aiosqlite.Connection) -> WriteResult:
+            cursor = await db.execute(sql, params)
+            return WriteResult(cursor.lastrowid, cursor.rowcount)
+
+        return await self.submit(_op)
+
+    async def execute_many(
+        self, sql: str, seq_of_params: Sequence[Sequence[Any]]
+    ) -> WriteResult:
+        """Encola una sentencia ejecutada con executemany."""
+
+        async def _op(db: aiosqlite.Connection) -> WriteResult:
+            cursor = await db.executemany(sql, seq_of_params)
+            return WriteResult(cursor.lastrowid, cursor.rowcount)
+
+        return await self.submit(_op)
+
+    async def stop(self) -> None:
+        """Drena la cola pendiente y detiene el escritor."""
+        if self._task is None or self._queue is None:
+            return
+        if not self._task.done():
+            self._queue.put_nowait(None)
+            await self._task
+        self._task = None
+        self._queue = None
+
+    async def _run(self, queue: asyncio.Queue[_WriteIntent | None]) -> None:
+        """Loop del escritor: recolecta un grupo y lo confirma."""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            first = await queue.get()
+            if first is None:
+                return
+
+            batch = [first]
+            stopping = False
+            deadline = loop.time() + self._window
+            while len(batch) < self._max_batch:
+                timeout = deadline - loop.time()
+                try:
+                    item = (
+                        queue.get_nowait()
+                        if timeout <= 0
+                        else await asyncio.wait_for(queue.get(), timeout)
+                    )
+                except (TimeoutError, asyncio.QueueEmpty):
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._commit_group(batch)
+            if stopping:
+                return
+
+    async def _commit_group(self, batch: list[_WriteIntent]) -> None:
+        """Ejecuta el grupo en una transacción y resuelve los futuros."""
+        try:
+            db = await self._connect()
+            outcomes = await self._execute_group(db, batch)
+            await db.commit()
+        except Exception as e:
+            logger.error("Group commit failed (%d intents): %s", len(batch), e)
+            await self._rollback()
+            for intent in batch:
+                if not intent.future.done():
+                    intent.future.set_exception(e)
+            return
+
+        self.groups_committed += 1
+        self.intents_committed += len(batch)
+        logger.debug("Group commit: %d intents", len(batch))
+
+        for intent, result, error in outcomes:
+            if intent.future.done():
+                continue
+            if error is not None:
+                intent.future.set_exception(error)
+            else:
+                intent.future.set_result(result)
+
+    async def _execute_group(
+        self, db: aiosqlite.Connection, batch: list[_WriteIntent]
+    ) -> list[tuple[_WriteIntent, Any, Exception | None]]:
+        """Corre cada intención en su propio SAVEPOINT dentro de la transacción."""
+        if not db.in_transaction:
+            await db.execute("BEGIN")
+
+        outcomes: list[tuple[_WriteIntent, Any, Exception | None]] = []
+        for intent in batch:
+            await db.execute("SAVEPOINT write_intent")
+            try:
+                result = await intent.op(db)
+                await db.execute("RELEASE write_intent")
+                outcomes.append((intent, result, None))
+            except Exception as e:
+                await db.execute("ROLLBACK TO write_intent")
+                await db.execute("RELEASE write_intent")
+                outcomes.append((intent, None, e))
+        return outcomes
+
+    async def _rollback(self) -> None:
+        try:
+            db = await self._connect()
+            await db.rollback()
+        except Exception as e:
+            logger.error("Rollback after group commit failure: %s", e)
@@ -7,8 +7,8 @@ from typing import Any
 import aiofiles
 import yaml
 
-from src.core.dependencies import get_sqlite_store
 from src.core.profiling_manager import profiling_manager
+from src.core.turn_context import turn_context_for
 from src.personality.manager import personality_manager
 from src.personality.prompt_renders import (
     render_dialect_rules,
@@ -243,12 +243,12 @@ Componente técnico especializado en datos estructurados.
         if kb := context.get("structured_knowledge"):
             section += f"\n## Bóveda de Conocimiento\n{kb}\n"
 
-        if chat_id:
+        # Los especialistas pueden traer los hitos ya consultados (context_fanout)
+        if chat_id or "milestones" in context:
             try:
-                store = get_sqlite_store()
-                milestones = await store.state_repo.get_recent_milestones(
-                    chat_id, limit=3
-                )
+                milestones = context.get("milestones")
+                if milestones is None and chat_id:
+                    milestones = await turn_context_for(chat_id).milestones(limit=3)
                 if milestones:
                     section += "\n## Hitos Recientes del Usuario\n"
                     for m in milestones:
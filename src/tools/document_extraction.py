@@ -0,0 +1,354 @@
+"""
+Extracción de texto de documentos en un pool de procesos.
+
+Los PDF se reparten por rangos de páginas y los XLSX por hojas entre
+procesos worker, de modo que PyMuPDF/pypdf/openpyxl no bloquean el event
+loop ni compiten por el GIL. Los textos vuelven en orden mediante un
+generador asíncrono con una ventana acotada de tareas en vuelo.
+
+Cada documento tiene un tiempo máximo: al excederlo se cancelan sus tareas
+pendientes. Si alguna ya corre en un worker (un parser atascado no se puede
+cancelar), los documentos nuevos pasan a otro pool y el viejo se termina
+cuando acaban las tareas de los demás. Cada worker corre con un límite de
+memoria (RLIMIT_AS).
+
+Los workers importan este módulo: solo dependencias de la stdlib a nivel
+de módulo; los parsers y la configuración se importan de forma perezosa.
+"""
+
+import asyncio
+import collections
+import itertools
+import logging
+import multiprocessing
+import os
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import TypeVar
+
+from src.core.exceptions import DocumentExtractionError, TransientExtractionError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_KINDS = {".pdf": "pdf", ".xlsx": "xlsx"}
+_SEPARATORS = {"pdf": "\n\n", "xlsx": "\n"}
+# Páginas por tarea: amortiza abrir el PDF en cada worker
+_PAGES_PER_TASK = 8
+# Tareas en vuelo por worker (acota la memoria del proceso principal)
+_WINDOW_PER_WORKER = 2
+
+
+def extraction_kind(path: Path) -> str | None:
+    """'pdf' | 'xlsx' si el formato se extrae en el pool; None si no."""
+    return _KINDS.get(path.suffix.lower())
+
+
+# === Funciones de los workers ===
+
+
+def _limit_memory(max_mb: int) -> None:
+    """Inicializador del worker: límite de espacio de direcciones."""
+    if max_mb <= 0:
+        return
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - no POSIX
+        return
+    limit = max_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _count_units(path: str, kind: str) -> int:
+    """Número de páginas (PDF) u hojas (XLSX)."""
+    if kind == "pdf":
+        try:
+            import pymupdf
+        except ImportError:
+            import pypdf
+
+            return len(pypdf.PdfReader(path).pages)
+        with pymupdf.open(path) as doc:
+            return int(doc.page_count)
+
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    try:
+        return len(workbook.worksheets)
+    finally:
+        workbook.close()
+
+
+def _extract_units(path: str, kind: str, start: int, stop: int) -> list[str]:
+    """Texto de las páginas u hojas [start, stop)."""
+    if kind == "pdf":
+        return _pdf_pages(path, start, stop)
+    return _xlsx_sheets(path, start, stop)
+
+
+def _pdf_pages(path: str, start: int, stop: int) -> list[str]:
+    try:
+        import pymupdf
+    except ImportError:
+        import pypdf
+
+        reader = pypdf.PdfReader(path)
+        return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+    with pymupdf.open(path) as doc:
+        return [str(doc[i].get_text()) for i in range(start, stop)]
+
+
+def _xlsx_sheets(path: str, start: int, stop: int) -> list[str]:
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    try:
+        texts = []
+        for sheet in workbook.worksheets[start:stop]:
+            rows = []
+            for row in sheet.iter_rows(values_only=True):
+                cells = [str(value) for value in row if value is not None]
+                if cells:
+                    rows.append(", ".join(cells))
+            texts.append("\n".join(rows))
+        return texts
+    finally:
+        workbook.close()
+
+
+# === Servicio ===
+
+
+def _failed_with(future: Future, error: type[BaseException]) -> bool:
+    return (
+        future.done()
+        and not future.cancelled()
+        and isinstance(future.exception(), error)
+    )
+
+
+def _terminate(pool: ProcessPoolExecutor) -> None:
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    # Un worker atascado en un parser no atiende la cancelación
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+
+class DocumentExtractor:
+    """Pool de procesos acotado para extraer texto de PDF y XLSX."""
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        timeout_seconds: float | None = None,
+        memory_mb: int | None = None,
+    ) -> None:
+        from src.core.config import settings
+
+        self.max_workers = (
+            max_workers or settings.DOCUMENT_EXTRACTION_WORKERS or os.cpu_count() or 1
+        )
+        self.timeout_seconds = (
+            timeout_seconds or settings.DOCUMENT_EXTRACTION_TIMEOUT_SECONDS
+        )
+        self.memory_mb = (
+            settings.DOCUMENT_EXTRACTION_MEMORY_MB if memory_mb is None else memory_mb
+        )
+        self._pool: ProcessPoolExecutor | None = None
+        # Tareas en curso por pool, para retirar uno sin cortar a los demás
+        self._inflight: dict[ProcessPoolExecutor, set[Future]] = {}
+        self._retired: set[ProcessPoolExecutor] = set()
+        self._reapers: set[asyncio.Task[None]] = set()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Sin fork: el proceso principal tiene hilos (aiosqlite, executors)
+            methods = multiprocessing.get_all_start_methods()
+            method = "forkserver" if "forkserver" in methods else "spawn"
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(method),
+                initializer=_limit_memory,
+                initargs=(self.memory_mb,),
+            )
+        return self._pool
+
+    def shutdown(self) -> None:
+        """Termina los workers y descarta el pool (se recrea bajo demanda)."""
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            self._inflight.pop(pool, None)
+            _terminate(pool)
+        for retired in list(self._retired):
+            _terminate(retired)
+        self._retired.clear()
+
+    def _submit(
+        self, fn: Callable[..., T], *args: object
+    ) -> tuple[ProcessPoolExecutor, Future[T]]:
+        pool = self._get_pool()
+        try:
+            future = pool.submit(fn, *args)
+        except BrokenProcessPool:
+            self._discard_broken(pool)
+            raise
+        inflight = self._inflight.setdefault(pool, set())
+        inflight.add(future)
+        future.add_done_callback(inflight.discard)
+        return pool, future
+
+    def _retire(self, pool: ProcessPoolExecutor, stuck: set[Future]) -> None:
+        """
+        Un worker sigue ocupado con un documento abandonado: los documentos
+        nuevos van a otro pool y este se termina cuando acaban las tareas de
+        los demás documentos (como mucho, tras otro tiempo máximo).
+        """
+        if self._pool is pool:
+            self._pool = None
+        others = self._inflight.pop(pool, set()) - stuck
+        pool.shutdown(wait=False, cancel_futures=False)
+        self._retired.add(pool)
+
+        async def _reap() -> None:
+            try:
+                if others:
+                    await asyncio.wait(
+                        [asyncio.wrap_future(f) for f in others],
+                        timeout=self.timeout_seconds,
+                    )
+            finally:
+                self._retired.discard(pool)
+                _terminate(pool)
+
+        task = asyncio.ensure_future(_reap())
+        self._reapers.add(task)
+        task.add_done_callback(self._reapers.discard)
+
+    def _abandon(self, submitted: list[tuple[ProcessPoolExecutor, Future]]) -> None:
+        """Cancela las tareas de un documento; retira los pools atascados."""
+        stuck: dict[ProcessPoolExecutor, set[Future]] = {}
+        for pool, future in submitted:
+            # Un parser en curso no se puede cancelar
+            if not future.cancel() and not future.done():
+                stuck.setdefault(pool, set()).add(future)
+        for pool, futures in stuck.items():
+            self._retire(pool, futures)
+
+    def _discard_broken(self, pool: ProcessPoolExecutor) -> None:
+        if self._pool is pool:
+            self._pool = None
+        self._inflight.pop(pool, None)
+        _terminate(pool)
+
+    async def _stream(
+        self,
+        path: Path,
+        kind: str,
+        submitted: list[tuple[ProcessPoolExecutor, Future]],
+    ) -> AsyncIterator[str]:
+        """Extracción con ventana acotada; registra en `submitted` cada tarea."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout_seconds
+        step = _PAGES_PER_TASK if kind == "pdf" else 1
+        pending: collections.deque[Future[list[str]]] = collections.deque()
+
+        async def _bounded(future: Future[T]) -> T:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future), timeout=max(0.0, deadline - loop.time())
+            )
+
+        def _run(fn: Callable[..., T], *args: object) -> Future[T]:
+            pool, future = self._submit(fn, *args)
+            submitted.append((pool, future))
+            return future
+
+        total = await _bounded(_run(_count_units, str(path), kind))
+        starts = iter(range(0, total, step))
+
+        def _submit(count: int) -> None:
+            for start in itertools.islice(starts, count):
+                stop = min(start + step, total)
+                pending.append(_run(_extract_units, str(path), kind, start, stop))
+
+        _submit(self.max_workers * _WINDOW_PER_WORKER)
+        while pending:
+            texts = await _bounded(pending.popleft())
+            _submit(1)
+            for text in texts:
+                yield text
+
+    async def iter_units(
+        self, path: Path, kind: str | None = None
+    ) -> AsyncIterator[str]:
+        """
+        Textos de las páginas (PDF) u hojas (XLSX) en orden, a medida que los
+        workers los completan. `kind` fuerza el formato si la ruta no tiene
+        la extensión (p. ej. un temporal).
+
+        Un fallo solo cancela las tareas de este documento; el pool se
+        descarta si está roto o si un worker quedó atascado en él.
+
+        Raises:
+            DocumentExtractionError: formato no soportado.
+            TransientExtractionError: tiempo máximo excedido o worker caído
+                (p. ej. por el límite de memoria); conviene reintentar.
+        """
+        kind = kind or extraction_kind(path)
+        if kind not in _SEPARATORS:
+            raise DocumentExtractionError(f"Unsupported document type: {path.suffix}")
+
+        submitted: list[tuple[ProcessPoolExecutor, Future]] = []
+        try:
+            async for text in self._stream(path, kind, submitted):
+                yield text
+        except TimeoutError as e:
+            self._abandon(submitted)
+            raise TransientExtractionError(
+                f"Extraction of {path.name} exceeded {self.timeout_seconds}s"
+            ) from e
+        except BrokenProcessPool as e:
+            # Todas las tareas de un pool roto fallan así: se descarta solo ese
+            for pool, future in submitted:
+                if _failed_with(future, BrokenProcessPool):
+                    self._discard_broken(pool)
+            raise TransientExtractionError(
+                f"Extraction worker died on {path.name} "
+                f"(memory cap {self.memory_mb} MB): {e!r}"
+            ) from e
+        except MemoryError as e:
+            raise TransientExtractionError(
+                f"Extraction of {path.name} hit the memory cap "
+                f"({self.memory_mb} MB): {e!r}"
+            ) from e
+        finally:
+            for _, future in submitted:
+                future.cancel()
+
+    async def extract_text(self, path: Path, kind: str | None = None) -> str:
+        """Texto completo del documento (unidades no vacías, en orden)."""
+        kind = kind or extraction_kind(path)
+        separator = _SEPARATORS.get(kind or "", "\n")
+        units = self.iter_units(path, kind)
+        return separator.join([text async for text in units if text])
+
+
+_extractor: DocumentExtractor | None = None
+
+
+def get_document_extractor() -> DocumentExtractor:
+    """Instancia compartida; el pool se crea en el primer documento."""
+    global _extractor
+    if _extractor is None:
+        _extractor = DocumentExtractor()
+    return _extractor
+
+
+def shutdown_document_extractor() -> None:
+    if _extractor is not None:
+        _extractor.shutdown()
@@ -9,6 +9,8 @@ import openpyxl
 import pypdf
 from langchain_core.tools import tool
 
+from src.tools.document_extraction import extraction_kind, get_document_extractor
+
 logger = logging.getLogger(__name__)
 
 # --- Registry for Document Readers ---
@@ -95,9 +97,16 @@ async def process_document(file_path: str, file_name: str) -> dict[str, Any]:
         return {"error": error_message}
 
     try:
-        logger.info(f"Using reader for '{file_extension}'")
-        # Ejecuta la función de lectura (que es I/O-bound) en un hilo separado
-        content = await asyncio.to_thread(reader_func, file_path)
+        kind = extraction_kind(Path(file_name))
+        if kind:
+            # PDF/XLSX: por páginas u hojas en el pool de procesos (sin GIL)
+            logger.info(f"Using process pool extraction for '{file_extension}'")
+            extractor = get_document_extractor()
+            content = await extractor.extract_text(Path(file_path), kind)
+        else:
+            logger.info(f"Using reader for '{file_extension}'")
+            # Ejecuta la función de lectura (que es I/O-bound) en un hilo separado
+            content = await asyncio.to_thread(reader_func, file_path)
         logger.info(f"Successfully processed document: {file_name}")
         return {"content": content}
     except Exception as e:
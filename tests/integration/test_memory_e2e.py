@@ -91,9 +91,10 @@ async def test_full_memory_cycle(memory_system):
     print("✅ Gestión de perfiles verificada")
 
     # 5. Deduplicación
-    # Intentar ingerir exactamente lo mismo
-    dup_chunks = await manager.store_context(
-        user_id=chat_id, content=long_text, context_type=MemoryType.DOCUMENT
-    )
+    # Intentar ingerir exactamente lo mismo, con la misma configuración
+    with patch.object(manager.pipeline.chunker, "chunk_size", 20):
+        dup_chunks = await manager.store_context(
+            user_id=chat_id, content=long_text, context_type=MemoryType.DOCUMENT
+        )
     assert dup_chunks == 0
     print("✅ Deduplicación SHA-256 verificada")
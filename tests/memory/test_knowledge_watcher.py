@@ -1,35 +1,56 @@
 # tests/memory/test_knowledge_watcher.py
 import asyncio
 import os
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from src.core.config import settings
+from src.core.exceptions import DocumentExtractionError, TransientExtractionError
 from src.memory.global_knowledge_loader import GlobalKnowledgeLoader
+from src.memory.ingestion_pipeline import FileDiff
 from src.memory.knowledge_watcher import KnowledgeWatcher
+from src.memory.sqlite_store import SQLiteStore
+
+
+@pytest.fixture
+async def manifest_store():
+    db_path = "storage/test_knowledge_manifest.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    store = SQLiteStore(db_path)
+    await store.init_db(settings.SQLITE_SCHEMA_PATH)
+    yield store
+    await store.disconnect()
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+
+def _make_loader(knowledge_dir, store) -> GlobalKnowledgeLoader:
+    """Loader real con manager simulado y manifiesto en SQLite."""
+    loader = GlobalKnowledgeLoader(str(knowledge_dir))
+    manager = MagicMock()
+    manager.store = store
+    manager.pipeline.chunker.version = "2:400/80:cl100k_base"
+    manager.pipeline.embedding_service.model_name = "models/text-embedding-004"
+    manager.update_file_knowledge = AsyncMock(return_value=FileDiff(inserted=3))
+    manager.delete_file_knowledge = AsyncMock(return_value=3)
+    manager.refresh_global_index = AsyncMock()
+    loader._manager = manager
+    return loader
 
 
 @pytest.mark.asyncio
-async def test_knowledge_watcher_detection(tmp_path):
+async def test_knowledge_watcher_detection(tmp_path, manifest_store):
     """Prueba la detección de cambios (nuevo, modificado, eliminado)."""
-    # Setup
     knowledge_dir = tmp_path / "knowledge"
     knowledge_dir.mkdir()
+    loader = _make_loader(knowledge_dir, manifest_store)
+    manager = loader.manager
 
-    # Mock loader
-    loader = MagicMock(spec=GlobalKnowledgeLoader)
-    loader.knowledge_path = knowledge_dir
-    loader.ingest_file = AsyncMock(return_value=1)
-    loader.manager = MagicMock()
-    loader.manager.delete_file_knowledge = AsyncMock(return_value=1)
-    loader._should_process_file = MagicMock(return_value=(True, "accepted"))
-
-    # Intervalo corto para el test
-    watcher = KnowledgeWatcher(loader, interval=0.1)
-
-    # Iniciar (sin archivos)
+    # Polling con intervalo largo: las comprobaciones se fuerzan a mano
+    watcher = KnowledgeWatcher(loader, interval=60, use_events=False)
     await watcher.start()
-    assert len(watcher._file_snapshots) == 0
 
     # 1. Prueba: Archivo Nuevo
     test_file = knowledge_dir / "test.txt"
@@ -38,37 +59,160 @@ async def test_knowledge_watcher_detection(tmp_path):
     # Forzamos la comprobación manual para evitar sleeps largos
     await watcher._check_for_changes()
 
-    loader.ingest_file.assert_awaited_once_with(test_file)
-    assert "test.txt" in watcher._file_snapshots
+    manager.update_file_knowledge.assert_awaited_once()
+    manager.delete_file_knowledge.assert_not_awaited()
+    manager.refresh_global_index.assert_awaited_once_with("test.txt")
+    manifest = await manifest_store.manifest_repo.get_all()
+    assert manifest["test.txt"]["chunks"] == 3
 
-    # 2. Prueba: Archivo Modificado
-    loader.ingest_file.reset_mock()
-    loader.manager.delete_file_knowledge.reset_mock()
+    # Sin cambios: no se re-ingesta
+    manager.update_file_knowledge.reset_mock()
+    await watcher._check_for_changes()
+    manager.update_file_knowledge.assert_not_awaited()
 
-    # Aseguramos que el mtime cambie (algunos sistemas tienen baja resolución)
-    # En lugar de sleep, podemos forzar el mtime si fuera necesario,
-    # pero write_text suele bastar en OS modernos.
-    await asyncio.sleep(0.1)
+    # 2. Prueba: Archivo Modificado
+    await asyncio.sleep(0.01)
     test_file.write_text("updated content")
 
     await watcher._check_for_changes()
 
-    loader.manager.delete_file_knowledge.assert_awaited_with(
-        "test.txt", namespace="global"
-    )
-    loader.ingest_file.assert_awaited_once_with(test_file)
+    # Re-ingesta diferencial, sin borrar el archivo completo
+    manager.delete_file_knowledge.assert_not_awaited()
+    manager.update_file_knowledge.assert_awaited_once()
 
     # 3. Prueba: Archivo Eliminado
-    loader.ingest_file.reset_mock()
-    loader.manager.delete_file_knowledge.reset_mock()
+    manager.update_file_knowledge.reset_mock()
+    manager.delete_file_knowledge.reset_mock()
 
     os.remove(test_file)
     await watcher._check_for_changes()
 
-    loader.manager.delete_file_knowledge.assert_awaited_once_with(
+    manager.delete_file_knowledge.assert_awaited_once_with(
         "test.txt", namespace="global"
     )
-    assert "test.txt" not in watcher._file_snapshots
+    assert "test.txt" not in await manifest_store.manifest_repo.get_all()
 
-    # Cleanup
     await watcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_restart_skips_unchanged_files(tmp_path, manifest_store):
+    """Un reinicio con el manifiesto persistido no re-ingesta nada."""
+    knowledge_dir = tmp_path / "knowledge"
+    knowledge_dir.mkdir()
+    (knowledge_dir / "guia.md").write_text("# Guía\n\ncontenido")
+    (knowledge_dir / "notas.txt").write_text("notas")
+
+    first = _make_loader(knowledge_dir, manifest_store)
+    assert await first.sync_knowledge() == ["guia.md", "notas.txt"]
+    assert first.manager.update_file_knowledge.await_count == 2
+
+    second = _make_loader(knowledge_dir, manifest_store)
+    assert await second.sync_knowledge() == []
+    second.manager.update_file_knowledge.assert_not_awaited()
+
+    # Solo cambia el mtime: el hash confirma el contenido y no se re-ingesta
+    os.utime(knowledge_dir / "notas.txt", ns=(1, 1))
+    assert await second.sync_knowledge() == []
+    second.manager.update_file_knowledge.assert_not_awaited()
+
+    # Otra versión del chunker invalida todas las entradas
+    second.manager.pipeline.chunker.version = "3:400/80:cl100k_base"
+    assert await second.sync_knowledge() == ["guia.md", "notas.txt"]
+    assert second.manager.update_file_knowledge.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_ingestion_is_retried(tmp_path, manifest_store):
+    """Sin entrada en el manifiesto si la ingesta falla."""
+    knowledge_dir = tmp_path / "knowledge"
+    knowledge_dir.mkdir()
+    (knowledge_dir / "guia.md").write_text("contenido")
+
+    loader = _make_loader(knowledge_dir, manifest_store)
+    loader.manager.update_file_knowledge.side_effect = RuntimeError("quota")
+    assert await loader.sync_knowledge() == []
+    assert await manifest_store.manifest_repo.get_all() == {}
+
+    loader.manager.update_file_knowledge.side_effect = None
+    assert await loader.sync_knowledge() == ["guia.md"]
+
+
+@pytest.mark.asyncio
+async def test_transient_extraction_failure_keeps_knowledge(tmp_path, manifest_store):
+    """Un timeout o worker caído no vacía el archivo: se reintenta."""
+    knowledge_dir = tmp_path / "knowledge"
+    knowledge_dir.mkdir()
+    (knowledge_dir / "guia.pdf").write_bytes(b"%PDF-1.4")
+
+    loader = _make_loader(knowledge_dir, manifest_store)
+    extractor = MagicMock()
+    extractor.extract_text = AsyncMock(side_effect=TransientExtractionError("lento"))
+    with patch(
+        "src.memory.global_knowledge_loader.get_document_extractor",
+        return_value=extractor,
+    ):
+        assert await loader.sync_knowledge() == []
+        loader.manager.update_file_knowledge.assert_not_awaited()
+        assert await manifest_store.manifest_repo.get_all() == {}
+
+        # Un PDF corrupto sí se registra vacío y no se reintenta
+        extractor.extract_text.side_effect = DocumentExtractionError("corrupto")
+        assert await loader.sync_knowledge() == ["guia.pdf"]
+        call = loader.manager.update_file_knowledge.await_args
+        assert call.kwargs["content"] == ""
+        assert "guia.pdf" in await manifest_store.manifest_repo.get_all()
+
+
+def _refresh_event(loader) -> asyncio.Event:
+    """Evento que se activa cuando el watcher refresca el índice global."""
+    refreshed = asyncio.Event()
+    loader.manager.refresh_global_index.side_effect = lambda _name: refreshed.set()
+    return refreshed
+
+
+@pytest.mark.asyncio
+async def test_events_sync_after_atomic_rename(tmp_path, manifest_store):
+    """Un guardado atómico (temporal + rename) se sincroniza en segundos."""
+    knowledge_dir = tmp_path / "knowledge"
+    knowledge_dir.mkdir()
+    loader = _make_loader(knowledge_dir, manifest_store)
+    manager = loader.manager
+    refreshed = _refresh_event(loader)
+
+    watcher = KnowledgeWatcher(loader, use_events=True, debounce_ms=200)
+    await watcher.start()
+    await asyncio.sleep(0.2)  # inotify registrado
+    try:
+        tmp = knowledge_dir / ".guia.md.swp"
+        tmp.write_text("contenido nuevo")
+        os.replace(tmp, knowledge_dir / "guia.md")
+
+        await asyncio.wait_for(refreshed.wait(), timeout=5)
+        assert watcher.mode == "events"
+        manager.refresh_global_index.assert_awaited_with("guia.md")
+        manager.update_file_knowledge.assert_awaited_once()
+    finally:
+        await watcher.stop()
+
+
+@pytest.mark.asyncio
+async def test_events_failure_falls_back_to_polling(tmp_path, manifest_store):
+    knowledge_dir = tmp_path / "knowledge"
+    knowledge_dir.mkdir()
+    loader = _make_loader(knowledge_dir, manifest_store)
+    refreshed = _refresh_event(loader)
+
+    async def _broken(*args, **kwargs):
+        raise OSError("OS file watch limit reached")
+        yield
+
+    with patch("watchfiles.awatch", _broken):
+        watcher = KnowledgeWatcher(loader, interval=0.05, use_events=True)
+        await watcher.start()
+        (knowledge_dir / "guia.md").write_text("contenido")
+        try:
+            await asyncio.wait_for(refreshed.wait(), timeout=5)
+            assert watcher.mode == "poll"
+        finally:
+            await watcher.stop()
@@ -0,0 +1,38 @@
+# tests/performance/test_chunker_performance.py
+"""
+Benchmark del chunker: una sola tokenización por documento, por lo que el
+tiempo debe escalar linealmente con el tamaño del texto.
+"""
+
+import time
+
+from src.memory.chunker import RecursiveChunker
+
+_PARAGRAPH = (
+    "La terapia cognitivo-conductual identifica pensamientos automáticos, "
+    "los pone a prueba con evidencia y propone alternativas más realistas. "
+    "Cada sesión termina con una tarea concreta para la semana.\n\n"
+)
+
+
+def _measure(chunker: RecursiveChunker, repeats: int) -> tuple[float, int]:
+    text = _PARAGRAPH * repeats
+    start = time.perf_counter()
+    count = sum(1 for _ in chunker.iter_chunks(text))
+    return time.perf_counter() - start, count
+
+
+def test_chunker_scales_linearly():
+    chunker = RecursiveChunker()
+    _measure(chunker, 50)  # Calentamiento (carga del BPE)
+
+    small_s, small_chunks = _measure(chunker, 2_000)
+    large_s, large_chunks = _measure(chunker, 8_000)
+
+    print("\n📊 CHUNKER SCALING")
+    print(f"   2k párrafos: {small_s * 1000:.0f}ms ({small_chunks} chunks)")
+    print(f"   8k párrafos: {large_s * 1000:.0f}ms ({large_chunks} chunks)")
+
+    assert large_chunks >= 3.5 * small_chunks
+    # 4x el texto: lineal ~4x; el algoritmo anterior era cuadrático
+    assert large_s < 6 * small_s
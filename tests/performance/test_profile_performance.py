@@ -0,0 +1,79 @@
+# tests/performance/test_profile_performance.py
+"""
+Benchmark del perfil acotado: el historial sale del documento a
+`profile_history`, por lo que cargar, validar y guardar el perfil cuesta lo
+mismo para un usuario nuevo que para uno con años de antigüedad.
+"""
+
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.core.config import settings
+from src.core.profile_manager import UserProfileManager
+from src.core.profile_seeder import get_default_profile
+from src.memory.sqlite_store import SQLiteStore
+
+_CYCLES = 40
+
+
+def _tenured_profile(entries: int) -> dict:
+    profile = get_default_profile()
+    profile["timeline"] = [
+        {
+            "date": f"2026-01-01T{i:06d}",
+            "event": f"Sesión {i}: avance",
+            "type": "milestone",
+        }
+        for i in range(entries)
+    ]
+    profile["evolution"]["path_traveled"] = list(profile["timeline"])
+    profile["personality_adaptation"]["learned_preferences"] = [
+        f"Preferencia aprendida {i}" for i in range(entries // 4)
+    ]
+    return profile
+
+
+async def _measure(manager: UserProfileManager, chat_id: str, entries: int) -> float:
+    # Antigüedad simulada: el primer guardado archiva todo lo que excede las ventanas
+    await manager.save_profile(chat_id, _tenured_profile(entries), immediate=True)
+    start = time.perf_counter()
+    for i in range(_CYCLES):
+        # Sin L1: cada ciclo lee y valida desde SQLite
+        manager.cache.clear()
+        profile = await manager.load_profile(chat_id)
+        profile["timeline"].append({"date": "now", "event": f"turno {i}"})
+        await manager.save_profile(chat_id, profile, immediate=True)
+    return (time.perf_counter() - start) / _CYCLES
+
+
+@pytest.mark.asyncio
+async def test_profile_cycle_is_constant_with_tenure(tmp_path):
+    store = SQLiteStore(str(tmp_path / "profiles.db"))
+    await store.init_db(settings.SQLITE_SCHEMA_PATH)
+    manager = UserProfileManager()
+    try:
+        with (
+            patch("src.core.profile_manager.get_sqlite_store", return_value=store),
+            patch("src.core.dependencies.redis_connection", None),
+        ):
+            await _measure(manager, "warmup", 10)
+            new_s = await _measure(manager, "nuevo", 10)
+            old_s = await _measure(manager, "veterano", 20_000)
+            stored = await store.load_profile("veterano")
+            history = await store.load_profile_history("veterano", "timeline", limit=1)
+    finally:
+        await store.disconnect()
+
+    print("\n📊 PROFILE LOAD/VALIDATE/SAVE")
+    print(f"   10 entradas:     {new_s * 1000:.2f}ms por ciclo")
+    print(f"   20k entradas:    {old_s * 1000:.2f}ms por ciclo")
+
+    assert history
+    assert len(json.dumps(stored, ensure_ascii=False).encode()) <= (
+        settings.PROFILE_MAX_BYTES
+    )
+    # Sin acotar, 20k entradas cuestan dos órdenes de magnitud más
+    assert old_s < 3 * new_s
@@ -51,3 +51,28 @@ class TestKnowledgeDiagnostics:
             response = await async_client.get("/system/diagnostics/knowledge")
             data = response.json()
             assert data["status"] == "empty"
+
+
+class TestSQLiteDiagnostics:
+    """Verifica el endpoint de tiempos por sentencia SQLite."""
+
+    @pytest.mark.asyncio
+    async def test_sqlite_stats_lists_top_statements(self, async_client):
+        from src.memory.query_stats import QueryStats
+
+        stats = QueryStats(slow_ms=50)
+        stats.record("SELECT * FROM memories WHERE id IN (?, ?)", 0.002)
+        stats.record("SELECT * FROM memories WHERE id IN (?, ?, ?)", 0.004)
+        stats.record("UPDATE profiles SET data = ? WHERE chat_id = ?", 0.1)
+
+        with patch("src.api.routers.diagnostics.query_stats", stats):
+            response = await async_client.get("/system/diagnostics/sqlite?limit=5")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["slow_query_ms"] == 50
+        top, second = data["statements"]
+        assert top["statement"].startswith("UPDATE profiles")
+        assert top["slow_calls"] == 1
+        assert second["calls"] == 2
+        assert second["mean_ms"] == pytest.approx(3.0)
@@ -0,0 +1,33 @@
+# tests/unit/api/test_event_processor.py
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.api.services import event_processor
+from src.core.schemas import CanonicalEventV1
+
+
+@pytest.mark.asyncio
+async def test_profile_is_flushed_when_the_turn_fails():
+    event = CanonicalEventV1(
+        event_type="text", source="test", chat_id="c1", content="hola"
+    )
+    flush = AsyncMock()
+    with (
+        patch.object(event_processor, "_update_user_context", AsyncMock()),
+        patch.object(
+            event_processor, "_load_session_context", AsyncMock(return_value=({}, []))
+        ),
+        patch.object(event_processor, "_run_orchestration", AsyncMock(return_value={})),
+        patch.object(event_processor, "_send_response", AsyncMock(return_value="ok")),
+        patch.object(
+            event_processor.session_manager,
+            "save_session",
+            AsyncMock(side_effect=RuntimeError("redis caído")),
+        ),
+        patch.object(event_processor.user_profile_manager, "flush", flush),
+        pytest.raises(RuntimeError),
+    ):
+        await event_processor.process_event_task(event)
+
+    flush.assert_awaited_once_with("c1")
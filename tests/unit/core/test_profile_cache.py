@@ -0,0 +1,146 @@
+# tests/unit/core/test_profile_cache.py
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.core.profile_cache import INVALIDATION_CHANNEL, ProfileCache
+from src.core.profile_manager import UserProfileManager
+from src.core.profile_seeder import get_default_profile
+
+
+def _fake_redis(version: int = 1) -> MagicMock:
+    redis = MagicMock()
+    redis.mget = AsyncMock(return_value=[None, None])
+    redis.set = AsyncMock()
+    redis.publish = AsyncMock()
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=[True, version])
+    redis.pipeline.return_value.__aenter__ = AsyncMock(return_value=pipe)
+    redis.pipeline.return_value.__aexit__ = AsyncMock(return_value=False)
+    redis.pipe = pipe
+    return redis
+
+
+@pytest.fixture
+def store():
+    store = MagicMock()
+    profile = get_default_profile()
+    profile["identity"]["name"] = "Ana"
+    store.load_profile = AsyncMock(return_value=profile)
+    store.save_profile = AsyncMock()
+    return store
+
+
+@pytest.fixture
+def manager(store):
+    with (
+        patch("src.core.profile_manager.get_sqlite_store", return_value=store),
+        patch("src.core.dependencies.redis_connection", None),
+    ):
+        yield UserProfileManager()
+
+
+@pytest.mark.asyncio
+async def test_l1_serves_validated_copies(manager, store):
+    with patch(
+        "src.core.profile_manager.ensure_profile_complete",
+        side_effect=lambda raw: raw,
+    ) as validate:
+        first = await manager.load_profile("c1")
+        first["identity"]["name"] = "Mutado sin guardar"
+        second = await manager.load_profile("c1")
+
+    assert second["identity"]["name"] == "Ana"
+    store.load_profile.assert_awaited_once()
+    validate.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_saves_are_coalesced_until_flush(manager, store):
+    for name in ("Uno", "Dos", "Tres"):
+        profile = await manager.load_profile("c1")
+        profile["identity"]["name"] = name
+        await manager.save_profile("c1", profile)
+
+    store.save_profile.assert_not_awaited()
+    assert (await manager.load_profile("c1"))["identity"]["name"] == "Tres"
+
+    assert await manager.flush("c1")
+    assert not await manager.flush("c1")
+    store.save_profile.assert_awaited_once()
+    assert store.save_profile.await_args.args[1]["identity"]["name"] == "Tres"
+
+
+@pytest.mark.asyncio
+async def test_flush_bumps_version_and_publishes(manager, store):
+    redis = _fake_redis(version=7)
+    with patch("src.core.dependencies.redis_connection", redis):
+        profile = await manager.load_profile("c1")
+        await manager.save_profile("c1", profile, immediate=True)
+
+    redis.pipe.incr.assert_called_once_with("profile:c1:version")
+    channel, data = redis.publish.await_args.args
+    assert channel == INVALIDATION_CHANNEL
+    assert json.loads(data)["version"] == 7
+    assert manager.cache._entries["c1"].version == 7
+
+
+@pytest.mark.asyncio
+async def test_failed_store_write_keeps_profile_dirty(manager, store):
+    store.save_profile.side_effect = [RuntimeError("locked"), None]
+    profile = await manager.load_profile("c1")
+    profile["timeline"] = [{"date": str(i), "event": str(i)} for i in range(30)]
+    await manager.save_profile("c1", profile)
+
+    await manager.flush("c1")
+    assert manager.cache.dirty_ids() == ["c1"]
+    await manager.flush_all()
+    assert manager.cache.dirty_ids() == []
+    # El historial archivado sobrevive al reintento
+    assert len(store.save_profile.await_args.args[2]["timeline"]) == 10
+
+
+@pytest.mark.asyncio
+async def test_failed_redis_write_keeps_profile_dirty(manager, store):
+    redis = _fake_redis(version=3)
+    redis.pipe.execute.side_effect = [ConnectionError("redis caído"), [True, 3]]
+    with patch("src.core.dependencies.redis_connection", redis):
+        profile = await manager.load_profile("c1")
+        await manager.save_profile("c1", profile, immediate=True)
+
+        store.save_profile.assert_awaited_once()
+        redis.publish.assert_not_awaited()
+        assert manager.cache.dirty_ids() == ["c1"]
+
+        # Redis vuelve: se escribe, se versiona y se publica la invalidación
+        await manager.flush_all()
+    redis.publish.assert_awaited_once()
+    assert manager.cache.dirty_ids() == []
+    assert manager.cache._entries["c1"].version == 3
+
+
+def test_invalidation_from_other_replicas_only():
+    cache = ProfileCache()
+    cache.put("c1", {"v": 1}, version=3)
+
+    own = {"chat_id": "c1", "version": 9, "replica": cache.replica_id}
+    cache.handle_message(json.dumps(own))
+    stale = {"chat_id": "c1", "version": 3, "replica": "other"}
+    cache.handle_message(json.dumps(stale))
+    assert cache.get("c1") == {"v": 1}
+
+    newer = {"chat_id": "c1", "version": 4, "replica": "other"}
+    cache.handle_message(json.dumps(newer).encode())
+    assert cache.get("c1") is None
+
+
+def test_dirty_entries_survive_invalidation_and_eviction():
+    cache = ProfileCache(max_entries=2)
+    cache.stage("dirty", {"v": 1}, {})
+    cache.put("a", {"v": 1}, version=1)
+    cache.put("b", {"v": 1}, version=1)
+
+    assert cache.get("dirty") == {"v": 1}
+    assert cache.get("a") is None
+    assert not cache.invalidate("dirty", version=99)
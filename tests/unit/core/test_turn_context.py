@@ -0,0 +1,185 @@
+# tests/unit/core/test_turn_context.py
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langgraph.graph import END, StateGraph
+
+from src.agents.specialists.cbt.cbt_tool import _gather_cbt_context
+from src.agents.specialists.chat.chat_tool import _gather_chat_context
+from src.core.profile_manager import UserProfileManager
+from src.core.schemas import CanonicalEventV1, GraphStateV2
+from src.core.turn_context import (
+    TurnContext,
+    current_turn_context,
+    turn_context_for,
+    turn_scope,
+)
+from src.personality.prompt_builder import SystemPromptBuilder
+
+
+def _hit(content: str) -> dict:
+    return {"id": 1, "content": content, "metadata": {"filename": "guia.md"}}
+
+
+@pytest.fixture
+def backends():
+    """Dobles de cada fuente que un turno consulta, con sus contadores."""
+    profile_manager = MagicMock()
+    profile_manager.load_profile = AsyncMock(return_value={"identity": {}})
+    knowledge = MagicMock()
+    knowledge.load_knowledge = AsyncMock(return_value={"entities": []})
+    memory = MagicMock()
+    memory.get_summary = AsyncMock(return_value=SimpleNamespace(summary="Resumen"))
+    vectors = MagicMock()
+    vectors.retrieve_context_multi = AsyncMock(
+        side_effect=lambda query, scopes: [
+            [_hit(f"{ns}-{i}") for i in range(k)] for ns, _, k in scopes
+        ]
+    )
+    store = MagicMock()
+    store.state_repo.get_recent_milestones = AsyncMock(return_value=[])
+    with (
+        patch("src.core.profile_manager.user_profile_manager", profile_manager),
+        patch("src.memory.knowledge_base.knowledge_base_manager", knowledge),
+        patch("src.memory.long_term_memory.long_term_memory", memory),
+        patch("src.core.dependencies.get_vector_memory_manager", return_value=vectors),
+        patch("src.core.dependencies.get_sqlite_store", return_value=store),
+    ):
+        yield SimpleNamespace(
+            profile=profile_manager.load_profile,
+            knowledge=knowledge.load_knowledge,
+            summary=memory.get_summary,
+            retrieve=vectors.retrieve_context_multi,
+            milestones=store.state_repo.get_recent_milestones,
+        )
+
+
+async def _chained_turn(chat_id: str, message: str) -> tuple[str, str]:
+    """Lo que consultan cbt_specialist y luego chat_specialist en un turno."""
+    ctx = turn_context_for(chat_id)
+    await ctx.profile()
+    cbt = await _gather_cbt_context(chat_id, message)
+
+    await turn_context_for(chat_id).profile()
+    chat = await _gather_chat_context(chat_id, message)
+    await SystemPromptBuilder()._build_runtime_section({}, chat_id=chat_id)
+    return cbt["rag"], chat["rag"]
+
+
+@pytest.mark.asyncio
+async def test_chained_specialists_fetch_each_item_once(backends):
+    with turn_scope(TurnContext("c1")):
+        cbt_rag, chat_rag = await _chained_turn("c1", "me siento bloqueado")
+
+    for fetch in (
+        backends.profile,
+        backends.knowledge,
+        backends.summary,
+        backends.retrieve,
+        backends.milestones,
+    ):
+        fetch.assert_awaited_once()
+    # CBT pide 3 globales; chat reutiliza los 2 primeros sin otra búsqueda
+    assert cbt_rag.count("global-") == 3
+    assert chat_rag.count("global-") == 2
+
+
+@pytest.mark.asyncio
+async def test_chained_turn_redis_round_trips(backends):
+    from src.memory.knowledge_base import KnowledgeBaseManager
+    from src.memory.long_term_memory import LongTermMemoryManager
+
+    redis = MagicMock()
+    redis.mget = AsyncMock(return_value=[b'{"identity": {"name": "Ana"}}', b"1"])
+    redis.get = AsyncMock(
+        side_effect=lambda key: (
+            b'{"entities": []}' if key.startswith("knowledge:") else b'{"summary": "R"}'
+        )
+    )
+    redis.lrange = AsyncMock(return_value=[])
+    with (
+        patch("src.core.dependencies.redis_connection", redis),
+        patch("src.core.profile_manager.user_profile_manager", UserProfileManager()),
+        patch(
+            "src.memory.knowledge_base.knowledge_base_manager", KnowledgeBaseManager()
+        ),
+        patch("src.memory.long_term_memory.long_term_memory", LongTermMemoryManager()),
+        turn_scope(TurnContext("c1")),
+    ):
+        await _chained_turn("c1", "me siento bloqueado")
+
+    # Perfil (perfil + versión en un MGET), bóveda, resumen y su buffer
+    assert redis.mget.await_count == 1
+    assert redis.get.await_count == 2
+    assert redis.lrange.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_without_turn_scope_nothing_is_shared(backends):
+    await _chained_turn("c1", "hola")
+    assert backends.profile.await_count == 4
+    assert backends.retrieve.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_retrieval_is_keyed_by_query_and_widens_missing_scopes(backends):
+    ctx = TurnContext("c1")
+    await ctx.retrieve("a", [("global", "system", 2)])
+    await ctx.retrieve("a", [("global", "system", 1), ("user", "c1", 2)])
+    await ctx.retrieve("b", [("global", "system", 2)])
+
+    scopes = [call.args for call in backends.retrieve.await_args_list]
+    assert scopes == [
+        ("a", [("global", "system", 2)]),
+        ("a", [("user", "c1", 2)]),
+        ("b", [("global", "system", 2)]),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_profile_save_refreshes_memoised_profile():
+    store = MagicMock()
+    store.load_profile = AsyncMock(return_value={"identity": {"name": "Ana"}})
+    manager = UserProfileManager()
+    with (
+        patch("src.core.profile_manager.user_profile_manager", manager),
+        patch("src.core.profile_manager.get_sqlite_store", return_value=store),
+        patch("src.core.dependencies.redis_connection", None),
+        turn_scope(TurnContext("c1")) as ctx,
+    ):
+        assert ctx is not None
+        profile = await manager.load_profile("c1")
+        assert (await ctx.profile())["identity"]["name"] == "Ana"
+        profile["identity"]["name"] = "Eva"
+        await manager.save_profile("c1", profile)
+        assert (await ctx.profile())["identity"]["name"] == "Eva"
+    store.load_profile.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_graph_nodes_see_context_from_state():
+    seen = []
+
+    async def node(state: GraphStateV2) -> GraphStateV2:
+        with turn_scope(state.get("turn_context")):
+            seen.append(current_turn_context())
+        return state
+
+    builder = StateGraph(GraphStateV2)
+    builder.add_node("n", node)
+    builder.set_entry_point("n")
+    builder.add_edge("n", END)
+
+    ctx = TurnContext("c1")
+    await builder.compile().ainvoke(
+        GraphStateV2(
+            event=CanonicalEventV1(event_type="text", source="test", chat_id="c1"),
+            payload={},
+            error_message=None,
+            conversation_history=[],
+            session_id="c1",
+            turn_context=ctx,
+        )
+    )
+    assert seen == [ctx]
@@ -46,3 +46,55 @@ def test_chunker_large_paragraph():
         # Algunos chunks pueden exceder ligeramente si no hay separadores,
         # pero con espacios debería poder dividir casi siempre
         assert chunker.count_tokens(chunk.content) <= 15  # Margen pequeño
+
+
+def test_chunker_offsets_map_back_to_source():
+    chunker = RecursiveChunker(chunk_size=30, chunk_overlap=8)
+    text = "Primer párrafo con acentos: canción, niño.\n\nSegundo párrafo. " * 6
+    chunks = chunker.chunk(text, {"filename": "a.md"})
+
+    assert len(chunks) > 1
+    assert chunks[0].start_index == 0
+    assert chunks[-1].end_index == len(text)
+    for prev, chunk in zip(chunks, chunks[1:], strict=False):
+        # Avanza siempre y el overlap nunca deja huecos
+        assert prev.start_index < chunk.start_index <= prev.end_index
+    for chunk in chunks:
+        assert text[chunk.start_index : chunk.end_index] == chunk.content
+        assert chunk.metadata["start_index"] == chunk.start_index
+        assert chunk.metadata["end_index"] == chunk.end_index
+        assert chunk.metadata["filename"] == "a.md"
+        assert chunk.metadata["tokens"] <= 30
+
+
+def test_chunker_prefers_paragraph_boundaries():
+    chunker = RecursiveChunker(chunk_overlap=0)
+    paragraph = "Una oración corta. " * 4 + "\n\n"
+    # Cabe un párrafo y medio: hay cortes de oración más tardíos en la ventana
+    chunker.chunk_size = chunker.count_tokens(paragraph) * 3 // 2
+    chunks = chunker.chunk(paragraph * 4)
+
+    assert len(chunks) == 4
+
+    assert all(c.content.endswith("\n\n") for c in chunks[:-1])
+
+
+def test_chunker_streams_lazily():
+    chunker = RecursiveChunker(chunk_size=20, chunk_overlap=5)
+    stream = chunker.iter_chunks("palabra " * 500)
+
+    first = next(stream)
+    assert first.start_index == 0
+    assert sum(1 for _ in stream) > 10
+
+
+def test_chunker_overlap_is_clamped_below_chunk_size():
+    chunker = RecursiveChunker(chunk_size=20, chunk_overlap=80)
+    text = "palabra " * 200
+    chunks = chunker.chunk(text)
+
+    # Cada paso avanza al menos media ventana, no una palabra
+    assert len(chunks) <= 2 * chunker.count_tokens(text) // 10 + 1
+    for prev, chunk in zip(chunks, chunks[1:], strict=False):
+        shared = text[chunk.start_index : prev.end_index]
+        assert chunker.count_tokens(shared) <= prev.metadata["tokens"] // 2
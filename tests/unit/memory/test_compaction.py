@@ -0,0 +1,100 @@
+# tests/unit/memory/test_compaction.py
+import os
+import sqlite3
+
+import numpy as np
+import pytest
+
+from src.core.config import settings
+from src.memory.compaction import MemoryCompactor
+from src.memory.sqlite_store import SQLiteStore
+
+DB_PATH = "storage/test_compaction.db"
+
+
+def _remove_db() -> None:
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
+
+
+@pytest.fixture
+async def compaction_db():
+    _remove_db()
+    store = SQLiteStore(DB_PATH)
+    await store.init_db(settings.SQLITE_SCHEMA_PATH)
+    yield store
+    await store.disconnect()
+    _remove_db()
+
+
+async def _seed(store, n: int) -> list[int]:
+    rng = np.random.default_rng(0)
+    records = [
+        {
+            "content": f"memoria {i} " + "texto " * 200,
+            "content_hash": f"h{i}",
+            "embedding": rng.standard_normal(768).tolist(),
+        }
+        for i in range(n)
+    ]
+    return await store.insert_memories_batch("me", "fact", "user", records)
+
+
+@pytest.mark.asyncio
+async def test_compaction_hard_deletes_inactive_rows(compaction_db):
+    ids = await _seed(compaction_db, 120)
+    await compaction_db.soft_delete_memories(ids[::2])
+    # Vector huérfano: su memoria ya no existe
+    db = await compaction_db.get_db()
+    await db.execute(
+        "INSERT INTO memory_embeddings (memory_id, embedding, namespace, chat_id, "
+        "memory_type, is_active) VALUES (9999, ?, 'user', 'me', 'fact', 1)",
+        (np.zeros(768, dtype=np.float32).tobytes(),),
+    )
+    await db.commit()
+
+    compactor = MemoryCompactor(compaction_db, batch_size=25, vacuum_seconds=5)
+    report = await compactor.run_once()
+
+    before, after = report["before"], report["after"]
+    assert before["inactive_memories"] == 60
+    assert report["deleted_memories"] == 60
+    assert report["deleted_orphans"] == 1
+    assert (after["memories"], after["inactive_memories"]) == (60, 0)
+    assert after["vectors"] == 60
+    assert after["fts_rows"] == 60
+    assert after["auto_vacuum"] == "incremental"
+    assert report["vacuumed_pages"] > 0
+    assert after["page_count"] < before["page_count"]
+    assert compactor.last_report is report
+
+    # Idempotente: sin inactivas no hay nada que borrar
+    again = await compactor.run_once()
+    assert again["deleted_memories"] == again["deleted_orphans"] == 0
+
+
+@pytest.mark.asyncio
+async def test_legacy_database_is_converted_to_incremental_vacuum():
+    _remove_db()
+    os.makedirs("storage", exist_ok=True)
+    # Base previa sin auto_vacuum: init_db ya no puede cambiar el modo
+    with sqlite3.connect(DB_PATH) as conn:
+        conn.execute("CREATE TABLE legacy (x)")
+    store = SQLiteStore(DB_PATH)
+    try:
+        await store.init_db(settings.SQLITE_SCHEMA_PATH)
+        ids = await _seed(store, 40)
+        await store.soft_delete_memories(ids)
+
+        compactor = MemoryCompactor(store)
+        assert (await compactor.stats())["auto_vacuum"] == "none"
+        report = await compactor.run_once()
+        assert report["deleted_memories"] == 40
+        assert report["after"]["auto_vacuum"] == "incremental"
+        assert report["after"]["freelist_count"] == 0
+        with sqlite3.connect(DB_PATH) as conn:
+            assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    finally:
+        await store.disconnect()
+        _remove_db()
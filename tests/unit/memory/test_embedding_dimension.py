@@ -0,0 +1,160 @@
+# tests/unit/memory/test_embedding_dimension.py
+import math
+import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from src.core.config import settings
+from src.memory.embedding_dimension import (
+    STAGING_TABLE,
+    backfill_dimension,
+    fit_dimension,
+    switch_dimension,
+    vector_dimension,
+)
+from src.memory.sqlite_store import SQLiteStore
+from src.memory.vector_search import VectorSearch
+
+DB_PATH = "storage/test_embedding_dimension.db"
+
+
+@pytest.fixture
+async def dim_db():
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    store = SQLiteStore(DB_PATH)
+    await store.init_db(settings.SQLITE_SCHEMA_PATH)
+    yield store
+    await store.disconnect()
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+
+
+def _vectors(n: int) -> np.ndarray:
+    x = np.random.default_rng(0).standard_normal((n, 768)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+async def _seed(store, vectors, start=0):
+    ids = []
+    for i, vec in enumerate(vectors, start):
+        mid = await store.insert_memory("me", f"m{i}", f"h{i}", "fact", "user")
+        await store.insert_vector(mid, vec.tolist())
+        ids.append(mid)
+    return ids
+
+
+def test_fit_dimension_truncates_and_renormalizes():
+    fitted = fit_dimension([3.0, 4.0, 12.0], 2)
+    assert fitted == pytest.approx([0.6, 0.8])
+    assert math.isclose(sum(v * v for v in fitted), 1.0)
+    assert fit_dimension([1.0, 2.0], 4) == [1.0, 2.0]
+
+
+@pytest.mark.asyncio
+async def test_new_database_uses_configured_dimension(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_DIMENSION", 256)
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    store = SQLiteStore(DB_PATH)
+    try:
+        await store.init_db(settings.SQLITE_SCHEMA_PATH)
+        assert await vector_dimension(await store.get_db()) == 256
+        assert store.embedding_dim == 256
+
+        # Los vectores completos se truncan al escribir y al consultar
+        vectors = _vectors(5)
+        ids = await _seed(store, vectors)
+        results = await VectorSearch(store).search(vectors[2].tolist(), 1, "me")
+        assert results[0][0] == ids[2]
+        assert results[0][1] == pytest.approx(0.0, abs=1e-5)
+    finally:
+        await store.disconnect()
+        os.remove(DB_PATH)
+
+
+@pytest.mark.asyncio
+async def test_backfill_then_atomic_switch(dim_db):
+    vectors = _vectors(30)
+    ids = await _seed(dim_db, vectors[:25])
+
+    assert await backfill_dimension(dim_db, 256, batch_size=10) == 25
+    # La tabla activa sigue sirviendo a 768 durante el relleno
+    assert await vector_dimension(await dim_db.get_db()) == 768
+    ids += await _seed(dim_db, vectors[25:], start=25)
+    await dim_db.soft_delete_memories([ids[0]])
+
+    assert await switch_dimension(dim_db, 256)
+    db = await dim_db.get_db()
+    assert await vector_dimension(db) == 256
+    assert await vector_dimension(db, STAGING_TABLE) is None
+    assert dim_db.embedding_dim == 256
+    async with db.execute("SELECT COUNT(*) FROM memory_embeddings") as cursor:
+        assert (await cursor.fetchone())[0] == 30
+
+    search = VectorSearch(dim_db)
+    hits = await search.search(vectors[27].tolist(), 3, "me")
+    assert hits[0][0] == ids[27]
+    hits = await search.search(vectors[0].tolist(), 30, "me")
+    assert ids[0] not in {mid for mid, _ in hits}
+
+    # Los triggers siguen operando sobre la tabla reconstruida
+    await dim_db.soft_delete_memories([ids[27]])
+    hits = await search.search(vectors[27].tolist(), 1, "me")
+    assert hits[0][0] != ids[27]
+
+
+@pytest.mark.asyncio
+async def test_switch_requires_backfilled_staging(dim_db):
+    await _seed(dim_db, _vectors(3))
+    assert not await switch_dimension(dim_db, 256)
+    assert await vector_dimension(await dim_db.get_db()) == 768
+
+
+@pytest.mark.asyncio
+async def test_switch_recreates_quantized_tables(dim_db):
+    from src.memory.vector_quantization import ensure_quantized_table
+
+    await _seed(dim_db, _vectors(4))
+    db = await dim_db.get_db()
+    await ensure_quantized_table(db, "int8")
+    await db.commit()
+
+    await backfill_dimension(dim_db, 128)
+    assert await switch_dimension(dim_db, 128)
+
+    async with db.execute(
+        "SELECT sql FROM sqlite_master WHERE name = 'memory_embeddings_int8'"
+    ) as cursor:
+        assert "INT8[128]" in (await cursor.fetchone())[0]
+
+
+@pytest.mark.asyncio
+async def test_manager_migration_restores_quantized_search(dim_db, monkeypatch):
+    from src.memory.vector_memory_manager import VectorMemoryManager
+
+    vectors = _vectors(6)
+    ids = await _seed(dim_db, vectors)
+    monkeypatch.setattr(settings, "EMBEDDING_DIMENSION", 128)
+    monkeypatch.setattr(settings, "VECTOR_QUANTIZATION", "int8")
+
+    search = VectorSearch(dim_db)
+    manager = VectorMemoryManager.__new__(VectorMemoryManager)
+    manager.store = dim_db
+    manager.pipeline = MagicMock()
+    manager.hybrid_search = SimpleNamespace(
+        vector_search=search, global_index=None, ann_backends={}
+    )
+    await manager.enable_quantization()
+    assert search.quantization == "int8"
+
+    assert await manager.migrate_embedding_dimension()
+    assert search.quantization == "int8"
+    db = await dim_db.get_db()
+    async with db.execute("SELECT COUNT(*) FROM memory_embeddings_int8") as cursor:
+        assert (await cursor.fetchone())[0] == 6
+    hits = await search.search(vectors[2].tolist(), 1, "me")
+    assert hits[0][0] == ids[2]
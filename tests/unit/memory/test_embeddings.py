@@ -41,3 +41,103 @@ async def test_embed_query():
 
             assert len(embedding) == 768
             assert embedding[0] == 0.3
+
+
+@pytest.fixture
+def fake_key():
+    with patch("src.core.config.settings.GOOGLE_API_KEY") as mock_key:
+        mock_key.get_secret_value.return_value = "fake_key"
+        yield mock_key
+
+
+@pytest.fixture
+async def cache_store():
+    import os
+
+    from src.core.config import settings
+    from src.memory.sqlite_store import SQLiteStore
+
+    db_path = "storage/test_embedding_cache.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    store = SQLiteStore(db_path)
+    await store.init_db(settings.SQLITE_SCHEMA_PATH)
+    yield store
+    await store.disconnect()
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+
+@pytest.mark.asyncio
+async def test_embed_texts_only_sends_uncached_texts(fake_key):
+    with patch("src.memory.embeddings.GoogleGenerativeAIEmbeddings") as MockEmbedder:
+        mock_instance = MockEmbedder.return_value
+        mock_instance.aembed_documents = AsyncMock(
+            side_effect=lambda texts: [[float(len(t))] * 4 for t in texts]
+        )
+
+        service = EmbeddingService()
+        first = await service.embed_texts(["a", "bb", "a"])
+        second = await service.embed_texts(["bb", "ccc"])
+
+        assert first == [[1.0] * 4, [2.0] * 4, [1.0] * 4]
+        assert second == [[2.0] * 4, [3.0] * 4]
+        sent = [call.args[0] for call in mock_instance.aembed_documents.call_args_list]
+        assert sent == [["a", "bb"], ["ccc"]]
+        assert service.cache.stats == {"l1_hit": 1, "l2_hit": 0, "miss": 3}
+
+
+@pytest.mark.asyncio
+async def test_embed_query_uses_cache(fake_key):
+    with patch("src.memory.embeddings.GoogleGenerativeAIEmbeddings") as MockEmbedder:
+        mock_instance = MockEmbedder.return_value
+        mock_instance.aembed_query = AsyncMock(return_value=[0.5] * 4)
+
+        service = EmbeddingService()
+        assert await service.embed_query("hola") == [0.5] * 4
+        assert await service.embed_query("hola") == [0.5] * 4
+        mock_instance.aembed_query.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_cache_key_depends_on_model_and_task(fake_key):
+    with patch("src.memory.embeddings.GoogleGenerativeAIEmbeddings"):
+        a = EmbeddingService(model_name="models/a")
+        b = EmbeddingService(model_name="models/b")
+
+    assert a.cache.key("x", "RETRIEVAL_QUERY") != b.cache.key("x", "RETRIEVAL_QUERY")
+    assert a.cache.key("x", "RETRIEVAL_QUERY") != a.cache.key("x", "RETRIEVAL_DOCUMENT")
+
+
+@pytest.mark.asyncio
+async def test_sqlite_cache_survives_new_service(fake_key, cache_store):
+    with patch("src.memory.embeddings.GoogleGenerativeAIEmbeddings") as MockEmbedder:
+        mock_instance = MockEmbedder.return_value
+        mock_instance.aembed_documents = AsyncMock(return_value=[[0.25] * 8])
+
+        await EmbeddingService(store=cache_store).embed_texts(["persistente"])
+        fresh = EmbeddingService(store=cache_store)
+        result = await fresh.embed_texts(["persistente"])
+
+    assert result == [[0.25] * 8]
+    mock_instance.aembed_documents.assert_called_once()
+    assert fresh.cache.stats["l2_hit"] == 1
+
+
+@pytest.mark.asyncio
+async def test_sqlite_cache_evicts_oldest_rows(cache_store):
+    from src.memory.embedding_cache import EmbeddingCache
+
+    cache = EmbeddingCache("models/test", store=cache_store, max_rows=3)
+    for i in range(5):
+        await cache_store.execute_write(
+            "INSERT INTO embedding_cache (content_hash, model, embedding, created_at) "
+            "VALUES (?, 'models/test', x'00000000', ?)",
+            (f"k{i}", f"2024-01-0{i + 1}"),
+        )
+
+    assert await cache.evict() == 2
+    async with cache_store.reader() as db:
+        cursor = await db.execute("SELECT content_hash FROM embedding_cache")
+        remaining = {row[0] for row in await cursor.fetchall()}
+    assert remaining == {"k2", "k3", "k4"}
@@ -0,0 +1,97 @@
+# tests/unit/memory/test_file_diff.py
+import os
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.core.config import settings
+from src.memory.chunker import Chunk
+from src.memory.ingestion_pipeline import IngestionPipeline
+from src.memory.sqlite_store import SQLiteStore
+
+
+@pytest.fixture
+async def diff_db():
+    db_path = "storage/test_file_diff.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    store = SQLiteStore(db_path)
+    await store.init_db(settings.SQLITE_SCHEMA_PATH)
+    yield store
+    await store.disconnect()
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+
+def _paragraphs(text: str, metadata: dict | None = None):
+    """Chunker determinista: un chunk por párrafo."""
+    for i, part in enumerate(text.split("\n\n")):
+        yield Chunk(part, i, i + 1, {**(metadata or {}), "chunk_index": i})
+
+
+@pytest.fixture
+def pipeline(diff_db):
+    with (
+        patch("src.memory.ingestion_pipeline.RecursiveChunker") as chunker_cls,
+        patch("src.memory.ingestion_pipeline.EmbeddingService") as emb_cls,
+    ):
+        chunker_cls.return_value.iter_chunks.side_effect = _paragraphs
+        emb_cls.return_value.embed_texts = AsyncMock(
+            side_effect=lambda texts: [[0.1] * 768 for _ in texts]
+        )
+        yield IngestionPipeline(diff_db)
+
+
+async def _active_contents(store, filename):
+    db = await store.get_db()
+    async with db.execute(
+        "SELECT m.content FROM memories m JOIN memory_embeddings e "
+        "ON e.memory_id = m.id WHERE m.is_active = 1 AND e.is_active = 1 "
+        "AND json_extract(m.metadata, '$.filename') = ? ORDER BY m.id",
+        (filename,),
+    ) as cursor:
+        return [r[0] for r in await cursor.fetchall()]
+
+
+@pytest.mark.asyncio
+async def test_update_file_embeds_only_new_chunks(pipeline, diff_db):
+    embed = pipeline.embedding_service.embed_texts
+    v1 = "\n\n".join(f"Párrafo {i} de la guía." for i in range(10))
+    first = await pipeline.update_file("system", v1, "guia.md")
+    assert (first.reused, first.inserted, first.removed) == (0, 10, 0)
+
+    # Una línea editada: un chunk nuevo, uno desaparecido, nueve reutilizados
+    v2 = v1.replace("Párrafo 3 de la guía.", "Párrafo 3 corregido.")
+    second = await pipeline.update_file("system", v2, "guia.md")
+    assert (second.reused, second.inserted, second.removed) == (9, 1, 1)
+    assert embed.await_args.args[0] == ["Párrafo 3 corregido."]
+
+    contents = await _active_contents(diff_db, "guia.md")
+    assert len(contents) == 10
+    assert "Párrafo 3 corregido." in contents
+    assert "Párrafo 3 de la guía." not in contents
+
+
+@pytest.mark.asyncio
+async def test_update_file_reactivates_restored_chunks(pipeline, diff_db):
+    v1 = "Uno.\n\nDos.\n\nTres."
+    await pipeline.update_file("system", v1, "notas.txt")
+    await pipeline.update_file("system", "Uno.\n\nTres.", "notas.txt")
+    assert await _active_contents(diff_db, "notas.txt") == ["Uno.", "Tres."]
+
+    embed = pipeline.embedding_service.embed_texts
+    embed.reset_mock()
+    restored = await pipeline.update_file("system", v1, "notas.txt")
+    assert (restored.reused, restored.inserted, restored.removed) == (3, 0, 0)
+    assert embed.await_args.args[0] == []
+    assert await _active_contents(diff_db, "notas.txt") == ["Uno.", "Dos.", "Tres."]
+
+
+@pytest.mark.asyncio
+async def test_update_file_counts_chunks_owned_by_another_file(pipeline, diff_db):
+    await pipeline.update_file("system", "Común.\n\nSolo A.", "a.md")
+
+    diff = await pipeline.update_file("system", "Común.\n\nSolo B.", "b.md")
+    assert (diff.reused, diff.inserted, diff.shared, diff.removed) == (0, 1, 1, 0)
+    assert diff.chunks == 1
+    assert await _active_contents(diff_db, "b.md") == ["Solo B."]
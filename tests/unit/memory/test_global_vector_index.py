@@ -0,0 +1,140 @@
+# tests/unit/memory/test_global_vector_index.py
+import os
+
+import numpy as np
+import pytest
+
+from src.core.config import settings
+from src.memory.embedding_dimension import (
+    backfill_dimension,
+    fit_dimension,
+    switch_dimension,
+)
+from src.memory.global_vector_index import GlobalVectorIndex
+from src.memory.sqlite_store import SQLiteStore
+from src.memory.vector_search import VectorSearch
+
+
+@pytest.fixture
+async def index_db():
+    db_path = "storage/test_global_index.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    store = SQLiteStore(db_path)
+    await store.init_db(settings.SQLITE_SCHEMA_PATH)
+    yield store
+    await store.disconnect()
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+
+def _vec(i: int) -> list[float]:
+    return np.random.default_rng(i).random(768, dtype=np.float32).tolist()
+
+
+async def _add(store, h, i, filename="a.md", namespace="global"):
+    mid = await store.insert_memory(
+        "system", h, h, "document", namespace=namespace, metadata={"filename": filename}
+    )
+    await store.insert_vector(mid, _vec(i))
+    return mid
+
+
+@pytest.mark.asyncio
+async def test_index_matches_sqlite_knn(index_db):
+    for i in range(30):
+        await _add(index_db, f"g{i}", i, filename=f"f{i % 3}.md")
+    await _add(index_db, "u0", 0, namespace="user")
+
+    index = GlobalVectorIndex(index_db)
+    assert await index.load() == 30
+
+    query = _vec(4)
+    expected = await VectorSearch(index_db).search(query, 5, "system", "global")
+    got = await index.search(query, 5, "system")
+
+    assert [mid for mid, _ in got] == [mid for mid, _ in expected]
+    for (_, d1), (_, d2) in zip(got, expected, strict=True):
+        assert d1 == pytest.approx(d2, abs=1e-2)
+
+
+@pytest.mark.asyncio
+async def test_refresh_file_is_incremental(index_db):
+    a = await _add(index_db, "a", 1, filename="a.md")
+    await _add(index_db, "b", 2, filename="b.md")
+    index = GlobalVectorIndex(index_db)
+    await index.load()
+
+    await index_db.delete_memories_by_filename("a.md")
+    new = await _add(index_db, "a2", 3, filename="a.md")
+    await index.refresh_file("a.md")
+
+    ids = {mid for mid, _ in await index.search(_vec(1), 10)}
+    assert a not in ids
+    assert new in ids
+    assert len(index) == 2
+
+
+@pytest.mark.asyncio
+async def test_mmap_file_is_reused(index_db, tmp_path):
+    for i in range(5):
+        await _add(index_db, f"g{i}", i)
+    base = str(tmp_path / "global_index")
+
+    first = GlobalVectorIndex(index_db, mmap_path=base)
+    await first.load()
+    assert os.path.exists(base + ".current")
+
+    second = GlobalVectorIndex(index_db, mmap_path=base)
+    await second.load()
+    assert second._snap.matrix.filename is not None  # memory-mapped, no rebuild
+    assert await second.search(_vec(2), 1) == await first.search(_vec(2), 1)
+
+
+@pytest.mark.asyncio
+async def test_mmap_file_is_rebuilt_after_dimension_switch(index_db, tmp_path):
+    ids = [await _add(index_db, f"g{i}", i) for i in range(5)]
+    base = str(tmp_path / "global_index")
+    await GlobalVectorIndex(index_db, mmap_path=base).load()
+
+    await backfill_dimension(index_db, 128)
+    assert await switch_dimension(index_db, 128)
+
+    index = GlobalVectorIndex(index_db, mmap_path=base)
+    await index.load()
+    assert index._snap.matrix.shape[1] == 128
+    hits = await index.search(fit_dimension(_vec(2), 128), 1)
+    assert hits[0][0] == ids[2]
+
+
+@pytest.mark.asyncio
+async def test_signature_distinguishes_id_sets_with_equal_sums(index_db):
+    ids = [await _add(index_db, f"g{i}", i) for i in range(6)]
+    index = GlobalVectorIndex(index_db)
+
+    # Activos {1, 4, 6} y {2, 3, 6}: mismo conteo, máximo y suma
+    await index_db.soft_delete_memories([ids[i] for i in (1, 2, 4)])
+    first = await index._signature()
+    db = await index_db.get_db()
+    await db.execute(
+        "UPDATE memories SET is_active = 1 - is_active WHERE id IN (?, ?, ?, ?)",
+        [ids[0], ids[1], ids[2], ids[3]],
+    )
+    await db.commit()
+    assert await index._signature() != first
+
+
+@pytest.mark.asyncio
+async def test_inconsistent_mmap_version_is_rebuilt(index_db, tmp_path):
+    for i in range(4):
+        await _add(index_db, f"g{i}", i)
+    base = tmp_path / "global_index"
+    await GlobalVectorIndex(index_db, mmap_path=str(base)).load()
+
+    # Una versión con ids de otra longitud no se usa
+    name = (tmp_path / "global_index.current").read_text()
+    np.save(tmp_path / "global_index.versions" / name / "ids.npy", np.arange(2))
+
+    index = GlobalVectorIndex(index_db, mmap_path=str(base))
+    assert await index.load() == 4
+    assert index._snap.ids.shape[0] == 4
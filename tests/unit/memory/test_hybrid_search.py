@@ -23,6 +23,10 @@ async def test_rrf_logic():
     # Mock de la base de datos para hidratación
     db = MagicMock()  # Usamos MagicMock para poder configurar __aenter__
     store.get_db = AsyncMock(return_value=db)
+    reader_cm = MagicMock()
+    reader_cm.__aenter__ = AsyncMock(return_value=db)
+    reader_cm.__aexit__ = AsyncMock(return_value=None)
+    store.reader = MagicMock(return_value=reader_cm)
 
     cursor = AsyncMock()
     # Simular el comportamiento de context manager asíncrono para db.execute
@@ -66,3 +70,52 @@ async def test_rrf_logic():
     # ID 2 debería estar primero porque aparece en ambas búsquedas (mejor RRF score)
     assert results[0]["id"] == 2
     assert results[1]["id"] in [1, 3]
+
+
+@pytest.mark.asyncio
+async def test_search_multi_embeds_once_and_hydrates_once():
+    store = MagicMock()
+    hybrid = HybridSearch(store)
+
+    vector_by_ns = {"global": [(10, 0.1), (11, 0.2)], "user": [(20, 0.1)]}
+    keyword_by_ns = {"global": [(11, -2.0)], "user": [(21, -1.0)]}
+    hybrid.vector_search.search = AsyncMock(
+        side_effect=lambda emb, limit, chat_id, ns: vector_by_ns[ns]
+    )
+    hybrid.keyword_search.search = AsyncMock(
+        side_effect=lambda q, limit, chat_id, ns: keyword_by_ns[ns]
+    )
+    hybrid.embedding_service.embed_query = AsyncMock(return_value=[0.1] * 768)
+
+    db = MagicMock()
+    reader_cm = MagicMock()
+    reader_cm.__aenter__ = AsyncMock(return_value=db)
+    reader_cm.__aexit__ = AsyncMock(return_value=None)
+    store.reader = MagicMock(return_value=reader_cm)
+    cursor = AsyncMock()
+    execute_cm = MagicMock()
+    execute_cm.__aenter__ = AsyncMock(return_value=cursor)
+    execute_cm.__aexit__ = AsyncMock(return_value=None)
+    db.execute.return_value = execute_cm
+    cursor.fetchall.return_value = [
+        {
+            "id": mid,
+            "content": f"c{mid}",
+            "memory_type": "document",
+            "metadata": "{}",
+            "chat_id": "system" if mid < 20 else "u1",
+        }
+        for mid in (10, 11, 20, 21)
+    ]
+
+    global_res, user_res = await hybrid.search_multi(
+        "consulta", [("global", "system", 1), ("user", "u1", 2)]
+    )
+
+    hybrid.embedding_service.embed_query.assert_awaited_once_with("consulta")
+    assert db.execute.call_count == 1
+    assert sorted(db.execute.call_args.args[1]) == [11, 20, 21]
+    assert [r["id"] for r in global_res] == [11]
+    assert {r["id"] for r in user_res} == {20, 21}
+    assert hybrid.vector_search.search.await_count == 2
+    assert hybrid.keyword_search.search.await_count == 2
@@ -88,3 +88,33 @@ async def test_hybrid_search_excludes_inactive_memories(search_db):
         result_ids = {r["id"] for r in results}
         assert mid1 in result_ids
         assert mid2 not in result_ids
+
+
+@pytest.mark.asyncio
+async def test_hydration_returns_full_metadata(search_db):
+    """Hydration returns every metadata key, promoted columns included."""
+    hybrid = HybridSearch(search_db)
+    mid = await search_db.insert_memory(
+        "system",
+        "chunk de un documento",
+        "hash_meta_1",
+        "document",
+        namespace="global",
+        metadata={
+            "filename": "guia.pdf",
+            "page": 3,
+            "chunk_index": 7,
+            "tokens": 120,
+            "user_role": "admin",
+        },
+    )
+
+    rows = await hybrid._hydrate([mid])
+
+    assert rows[mid]["metadata"] == {
+        "filename": "guia.pdf",
+        "page": 3,
+        "chunk_index": 7,
+        "tokens": 120,
+        "user_role": "admin",
+    }
@@ -56,3 +56,36 @@ async def test_pipeline_passes_provenance_to_store(pipeline_db):
         assert row[1] == 0.7
         assert row[2] == "high"
         assert row[3] == "me siento ansioso por el trabajo"
+
+
+@pytest.mark.asyncio
+async def test_pipeline_batches_and_skips_known_hashes(pipeline_db):
+    """Los chunks ya ingeridos no se vuelven a embeber ni a insertar."""
+    from src.memory.chunker import Chunk
+
+    chunks = [Chunk(f"fragmento {i}", 0, 11, {"filename": "a.md"}) for i in range(5)]
+
+    with (
+        patch("src.memory.ingestion_pipeline.EmbeddingService") as mock_emb_class,
+        patch("src.memory.ingestion_pipeline.RecursiveChunker") as mock_chunker,
+    ):
+        mock_emb = mock_emb_class.return_value
+        mock_emb.embed_texts = AsyncMock(
+            side_effect=lambda texts: [[0.2] * 768 for _ in texts]
+        )
+        mock_chunker.return_value.iter_chunks.side_effect = lambda text, meta: (
+            Chunk(c.content, 0, len(c.content), dict(c.metadata)) for c in chunks
+        )
+
+        pipeline = IngestionPipeline(pipeline_db)
+        pipeline.batch_size = 2
+        assert await pipeline.process_text("c1", "texto", namespace="global") == 5
+
+        # Segunda pasada: todo es duplicado, no hay llamadas de embedding
+        mock_emb.embed_texts.reset_mock()
+        assert await pipeline.process_text("c1", "texto", namespace="global") == 0
+        mock_emb.embed_texts.assert_not_called()
+
+    db = await pipeline_db.get_db()
+    async with db.execute("SELECT COUNT(*) FROM memory_embeddings") as c:
+        assert (await c.fetchone())[0] == 5
@@ -0,0 +1,120 @@
+# tests/unit/memory/test_ivf_index.py
+import os
+
+import numpy as np
+import pytest
+
+from src.core.config import settings
+from src.memory.ann_backend import IVFBackend
+from src.memory.ivf_index import IVFIndex
+from src.memory.sqlite_store import SQLiteStore
+
+
+def _corpus(n: int, d: int = 32, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(8, d)) * 5
+    return (centers[rng.integers(0, 8, n)] + rng.normal(size=(n, d))).astype(np.float32)
+
+
+def _exact(x: np.ndarray, q: np.ndarray, k: int) -> set[int]:
+    return set(np.argsort(((x - q) ** 2).sum(axis=1))[:k].tolist())
+
+
+def test_ivf_recall_and_nprobe():
+    x = _corpus(2000)
+    ids = np.arange(2000)
+    index = IVFIndex(nlist=32)
+    index.train(ids, x, np.array(["u"] * 2000))
+
+    q = x[:20] + 0.01
+    recall = {
+        nprobe: np.mean([
+            len(_exact(x, qi, 10) & {m for m, _ in index.search(qi, 10, nprobe)}) / 10
+            for qi in q
+        ])
+        for nprobe in (1, 32)
+    }
+    assert recall[32] == pytest.approx(1.0)
+    assert recall[1] <= recall[32]
+
+
+def test_ivf_pq_incremental_add_remove_and_persist(tmp_path):
+    x = _corpus(600, d=32)
+    index = IVFIndex(nlist=8, pq_m=8)
+    index.train(np.arange(500), x[:500], np.array(["a", "b"] * 250))
+
+    index.add(np.arange(500, 600), x[500:], np.array(["a"] * 100))
+    assert len(index) == 600
+    assert index.payload.dtype == np.uint8 and index.payload.shape[1] == 8
+
+    top = index.search(x[550], 1, nprobe=8)
+    assert top[0][0] == 550
+
+    index.remove([550])
+    assert 550 not in {m for m, _ in index.search(x[550], 5, nprobe=8)}
+
+    path = tmp_path / "user.ivf.npz"
+    index.save(path)
+    loaded = IVFIndex.load(path)
+    assert len(loaded) == 599
+    assert loaded.search(x[10], 5, 8) == index.search(x[10], 5, 8)
+
+
+def test_ivf_chat_filter():
+    x = _corpus(400)
+    chats = np.array(["a", "b"] * 200)
+    index = IVFIndex(nlist=4)
+    index.train(np.arange(400), x, chats)
+
+    res = index.search(x[1], 10, nprobe=4, chat_id="b")
+    assert res and all(chats[m] == "b" for m, _ in res)
+
+
+@pytest.fixture
+async def ann_db():
+    db_path = "storage/test_ann_backend.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    store = SQLiteStore(db_path)
+    await store.init_db(settings.SQLITE_SCHEMA_PATH)
+    yield store
+    await store.disconnect()
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+
+@pytest.mark.asyncio
+async def test_backend_sync_retrain_and_recall(ann_db, tmp_path):
+    x = _corpus(120, d=768, seed=1)
+
+    async def add(i: int) -> int:
+        mid = await ann_db.insert_memory(f"c{i % 3}", f"m{i}", f"h{i}", "fact")
+        await ann_db.insert_vector(mid, x[i].tolist())
+        return mid
+
+    for i in range(60):
+        await add(i)
+
+    backend = IVFBackend(ann_db, "user", nlist=4, nprobe=4, index_dir=str(tmp_path))
+    await backend.load_or_build()
+    assert backend.ready and len(backend.index) == 60
+    assert (tmp_path / "user.ivf.npz").exists()
+
+    # Incremental: pocos vectores nuevos no disparan reentrenamiento
+    new_id = await add(60)
+    assert await backend.sync() == 1
+    assert backend.index.trained_size == 60
+    assert (await backend.search(x[60].tolist(), 1))[0][0] == new_id
+
+    # Crecimiento > retrain_ratio: reentrena sobre el corpus completo
+    for i in range(61, 120):
+        await add(i)
+    await backend.sync()
+    assert backend.index.trained_size == 120
+
+    report = await backend.measure_recall(k=5, samples=10)
+    assert report["recall_at_k"] == pytest.approx(1.0)  # nprobe == nlist
+
+    reloaded = IVFBackend(ann_db, "user", index_dir=str(tmp_path))
+    await reloaded.load_or_build()
+    assert len(reloaded.index) == 120
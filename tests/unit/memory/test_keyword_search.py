@@ -0,0 +1,87 @@
+# tests/unit/memory/test_keyword_search.py
+import pytest
+
+from src.core.config import settings
+from src.memory.keyword_search import KeywordSearch
+from src.memory.sqlite_store import SQLiteStore
+
+
+@pytest.fixture
+async def fts_db(tmp_path):
+    from src.memory.migration import apply_migrations
+
+    store = SQLiteStore(str(tmp_path / "fts.db"))
+    await store.init_db(settings.SQLITE_SCHEMA_PATH)
+    await apply_migrations(store)
+    yield store
+    await store.disconnect()
+
+
+async def _add(store, content, chat_id="u1", namespace="user"):
+    return await store.insert_memory(
+        chat_id, content, f"h-{chat_id}-{namespace}-{content}", "fact", namespace
+    )
+
+
+@pytest.mark.asyncio
+async def test_search_ignores_diacritics_and_matches_inflections(fts_db):
+    search = KeywordSearch(fts_db)
+    therapy = await _add(fts_db, "Empecé las terapias cognitivas en marzo")
+    how = await _add(fts_db, "No sé como dormir mejor")
+
+    assert [mid for mid, _ in await search.search("terapía", chat_id="u1")] == [therapy]
+    assert [mid for mid, _ in await search.search("¿Cómo?", chat_id="u1")] == [how]
+
+
+@pytest.mark.asyncio
+async def test_search_filters_chat_and_namespace_inside_fts(fts_db):
+    search = KeywordSearch(fts_db)
+    mine = await _add(fts_db, "ansiedad por el trabajo")
+    await _add(fts_db, "ansiedad por el trabajo", chat_id="u2")
+    await _add(fts_db, "ansiedad por el trabajo", chat_id="system", namespace="global")
+
+    results = await search.search("ansiedad", chat_id="u1", namespace="user")
+    assert [mid for mid, _ in results] == [mine]
+
+
+@pytest.mark.asyncio
+async def test_long_messages_keep_the_most_selective_terms(fts_db):
+    search = KeywordSearch(fts_db)
+    for i in range(20):
+        await _add(fts_db, f"hoy fue un día normal en casa {i}")
+    target = await _add(fts_db, "hoy tuve un episodio de insomnio")
+
+    async with fts_db.reader() as db:
+        terms = search._query_terms(
+            "Hoy fue un día raro en casa, otra vez con insomnio y casa hoy"
+        )
+        selected = await search._selective_terms(db, terms)
+    assert selected[0] == "insomnio"
+
+    results = await search.search("hoy otra vez insomnio en casa", chat_id="u1")
+    assert results[0][0] == target
+
+
+@pytest.mark.asyncio
+async def test_legacy_fts_index_is_rebuilt(fts_db):
+    from src.memory.fts_index import fts_is_current
+    from src.memory.migration import apply_migrations
+
+    mid = await _add(fts_db, "Cómo manejar la ansiedad")
+    db = await fts_db.get_db()
+    for trigger in ("memories_ai", "memories_ad", "memories_au"):
+        await db.execute(f"DROP TRIGGER {trigger}")
+    await db.execute("DROP TABLE memories_fts_vocab")
+    await db.execute("DROP TABLE memories_fts")
+    await db.execute(
+        "CREATE VIRTUAL TABLE memories_fts USING fts5("
+        "content, content='memories', content_rowid='id')"
+    )
+    await db.commit()
+    assert not await fts_is_current(db)
+
+    await apply_migrations(fts_db)
+
+    assert await fts_is_current(db)
+    results = await KeywordSearch(fts_db).search("como", chat_id="u1")
+    assert [r[0] for r in results] == [mid]
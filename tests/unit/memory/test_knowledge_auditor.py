@@ -16,6 +16,10 @@ class TestKnowledgeAuditor:
         mock_store = MagicMock()
         mock_db = AsyncMock()
         mock_store.get_db = AsyncMock(return_value=mock_db)
+        reader_ctx = MagicMock()
+        reader_ctx.__aenter__ = AsyncMock(return_value=mock_db)
+        reader_ctx.__aexit__ = AsyncMock(return_value=None)
+        mock_store.reader = MagicMock(return_value=reader_ctx)
         auditor._store = mock_store
 
         # Simular async context manager para db.execute
@@ -51,6 +55,10 @@ class TestKnowledgeAuditor:
         mock_store = MagicMock()
         mock_db = AsyncMock()
         mock_store.get_db = AsyncMock(return_value=mock_db)
+        reader_ctx = MagicMock()
+        reader_ctx.__aenter__ = AsyncMock(return_value=mock_db)
+        reader_ctx.__aexit__ = AsyncMock(return_value=None)
+        mock_store.reader = MagicMock(return_value=reader_ctx)
         auditor._store = mock_store
 
         mock_cursor = AsyncMock()
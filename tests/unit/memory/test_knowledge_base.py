@@ -0,0 +1,141 @@
+# tests/unit/memory/test_knowledge_base.py
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.core.config import settings
+from src.memory.knowledge_base import KnowledgeBaseManager
+from src.memory.sqlite_store import SQLiteStore
+
+
+@pytest.fixture
+async def kb_store(tmp_path):
+    store = SQLiteStore(str(tmp_path / "kb.db"))
+    await store.init_db(settings.SQLITE_SCHEMA_PATH)
+    yield store
+    await store.disconnect()
+
+
+@pytest.fixture
+def manager(kb_store):
+    embedder = AsyncMock()
+    embedder.embed_texts = AsyncMock(
+        side_effect=lambda texts: [[0.1] * kb_store.embedding_dim for _ in texts]
+    )
+    kb = KnowledgeBaseManager()
+    kb._embedding_service = embedder
+    with (
+        patch("src.memory.knowledge_base.get_sqlite_store", return_value=kb_store),
+        patch("src.core.dependencies.redis_connection", None),
+    ):
+        yield kb, embedder.embed_texts
+
+
+def _vault(**overrides):
+    vault = {
+        "user_name": "Ana",
+        "version": 1,
+        "entities": [{"name": "Luna", "type": "mascota"}],
+        "preferences": [
+            {"category": "comida", "value": "pasta", "evidence": "me encanta"},
+            {"category": "música", "value": "jazz"},
+        ],
+        "medical": [{"name": "ansiedad", "type": "diagnóstico"}],
+        "relationships": [],
+        "milestones": [],
+    }
+    return {**vault, **overrides}
+
+
+async def _active_facts(store, chat_id):
+    db = await store.get_db()
+    async with db.execute(
+        "SELECT content FROM memories WHERE chat_id = ? AND memory_type = 'fact' "
+        "AND is_active = 1 ORDER BY id",
+        (chat_id,),
+    ) as cursor:
+        return [r[0] for r in await cursor.fetchall()]
+
+
+@pytest.mark.asyncio
+async def test_save_embeds_only_changed_facts(manager, kb_store):
+    kb, embed = manager
+    await kb.save_knowledge("c1", _vault())
+    assert len(embed.await_args.args[0]) == 4
+
+    # Mismo contenido con otro orden: ningún embedding nuevo
+    vault = _vault()
+    vault["preferences"].reverse()
+    await kb.save_knowledge("c1", vault)
+    assert embed.await_args.args[0] == []
+
+    # Un hecho cambiado: solo ese se embebe y su memoria anterior se retira
+    vault["medical"] = [{"name": "ansiedad", "type": "diagnóstico", "severity": "leve"}]
+    await kb.save_knowledge("c1", vault)
+    (text,) = embed.await_args.args[0]
+    assert "severity: leve" in text
+
+    facts = await _active_facts(kb_store, "c1")
+    assert len(facts) == 4
+    assert text in facts
+
+
+@pytest.mark.asyncio
+async def test_load_round_trips_structured_vault(manager):
+    kb, _ = manager
+    vault = _vault()
+    vault["preferences"].reverse()
+    await kb.save_knowledge("c1", vault)
+
+    loaded = await kb.load_knowledge("c1")
+    assert loaded["user_name"] == "Ana"
+    assert loaded["preferences"] == vault["preferences"]
+    assert loaded["medical"] == vault["medical"]
+    assert loaded["relationships"] == []
+
+
+@pytest.mark.asyncio
+async def test_removed_fact_deactivates_memory(manager, kb_store):
+    kb, _ = manager
+    await kb.save_knowledge("c1", _vault())
+    await kb.save_knowledge("c1", _vault(entities=[]))
+
+    assert (await kb.load_knowledge("c1"))["entities"] == []
+    facts = await _active_facts(kb_store, "c1")
+    assert len(facts) == 3
+    assert not any("Luna" in f for f in facts)
+
+
+@pytest.mark.asyncio
+async def test_load_falls_back_to_legacy_blob(manager, kb_store):
+    kb, _ = manager
+    legacy = '{"user_name": "Ana", "entities": [{"name": "Luna"}]}'
+    await kb_store.insert_memory("c2", legacy, "legacy", "fact")
+
+    loaded = await kb.load_knowledge("c2")
+    assert loaded["entities"] == [{"name": "Luna"}]
+
+
+@pytest.mark.asyncio
+async def test_first_normalised_save_retires_legacy_blob(manager, kb_store):
+    from src.memory.hybrid_search import HybridSearch
+
+    kb, _ = manager
+    legacy = '{"user_name": "Ana", "entities": [{"name": "Luna"}]}'
+    await kb_store.insert_memory(
+        "c2",
+        legacy,
+        "legacy",
+        "fact",
+        metadata={"source": "knowledge_base", "type": "structured"},
+    )
+    other = await kb_store.insert_memory("c2", "Le gusta correr", "other", "fact")
+
+    await kb.save_knowledge("c2", _vault())
+
+    results = await HybridSearch(kb_store).search_by_type("fact", 20, chat_id="c2")
+    contents = {r["content"] for r in results}
+    assert legacy not in contents
+    assert "Le gusta correr" in contents
+    assert len(contents) == 5
+    assert other in {r["id"] for r in results}
@@ -91,3 +91,65 @@ async def test_migration_defaults_existing_rows(migration_db):
         assert row[0] == "explicit"  # source_type default
         assert row[1] == 1.0  # confidence default
         assert row[2] == 1  # is_active default
+
+
+@pytest.mark.asyncio
+async def test_migration_adds_embedding_cache_model(migration_db):
+    """Legacy embedding_cache tables gain the model column."""
+    from src.memory.migration import apply_migrations
+
+    db = await migration_db.get_db()
+    await db.execute("DROP TABLE embedding_cache")
+    await db.execute(
+        "CREATE TABLE embedding_cache (content_hash TEXT PRIMARY KEY, "
+        "embedding BLOB NOT NULL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+    )
+    await db.commit()
+
+    await apply_migrations(migration_db)
+
+    cursor = await db.execute("PRAGMA table_info(embedding_cache)")
+    assert "model" in {row[1] for row in await cursor.fetchall()}
+
+
+@pytest.mark.asyncio
+async def test_migration_adds_indexed_metadata_columns(tmp_path):
+    """Legacy memories tables gain generated, indexed metadata columns."""
+    import sqlite3
+
+    from src.memory.migration import apply_migrations
+
+    db_path = str(tmp_path / "legacy.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE memories (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "chat_id TEXT NOT NULL, namespace TEXT NOT NULL DEFAULT 'user', "
+            "content TEXT NOT NULL, content_hash TEXT NOT NULL UNIQUE, "
+            "memory_type TEXT NOT NULL, metadata TEXT DEFAULT '{}', "
+            "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+        )
+        conn.execute(
+            "INSERT INTO memories (chat_id, namespace, content, content_hash, "
+            "memory_type, metadata) VALUES ('system', 'global', 'x', 'h1', "
+            '\'document\', \'{"filename": "a.md", "chunk_index": 2}\')'
+        )
+    store = SQLiteStore(db_path)
+    try:
+        await store.init_db(settings.SQLITE_SCHEMA_PATH)
+        await apply_migrations(store)
+        await apply_migrations(store)
+
+        db = await store.get_db()
+        async with db.execute(
+            "SELECT filename, source, chunk_index FROM memories"
+        ) as cursor:
+            assert tuple(await cursor.fetchone()) == ("a.md", None, 2)
+        async with db.execute(
+            "EXPLAIN QUERY PLAN UPDATE memories SET is_active = 0 "
+            "WHERE namespace = ? AND filename = ?",
+            ("global", "a.md"),
+        ) as cursor:
+            plan = " ".join(row[3] for row in await cursor.fetchall())
+        assert "idx_memories_filename" in plan
+    finally:
+        await store.disconnect()
@@ -0,0 +1,133 @@
+# tests/unit/memory/test_query_plans.py
+"""
+Regresión de planes de consulta: ejecuta las consultas de los repositorios
+contra una base migrada, captura el SQL real (con parámetros expandidos) y
+falla si alguna recorre una tabla completa.
+"""
+
+import re
+from unittest.mock import patch
+
+import pytest
+
+from src.core.config import settings
+from src.memory.sqlite_store import SQLiteStore
+
+_DML = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+# "SCAN t" / "SCAN t USING COVERING INDEX i": recorrido completo de t
+_FULL_SCAN = re.compile(r"^SCAN (\w+)(?! VIRTUAL TABLE)")
+# Consultas que por diseño leen la tabla entera
+_FULL_SCAN_ALLOWED = {
+    "SELECT chat_id FROM profiles",
+    "SELECT * FROM knowledge_manifest",
+}
+
+
+@pytest.fixture
+async def traced_db(tmp_path):
+    from src.memory.migration import apply_migrations
+
+    store = SQLiteStore(str(tmp_path / "plans.db"), read_pool_size=0)
+    await store.init_db(settings.SQLITE_SCHEMA_PATH)
+    await apply_migrations(store)
+    statements: list[str] = []
+    db = await store.get_db()
+    await db.set_trace_callback(statements.append)
+    yield store, statements
+    await db.set_trace_callback(None)
+    await store.disconnect()
+
+
+async def _exercise_repositories(store: SQLiteStore) -> None:
+    from src.core.messaging.outbox import OutboxManager
+
+    vector = [0.1] * store.embedding_dim
+    mid = await store.insert_memory(
+        "u1", "hecho", "h1", "fact", metadata={"filename": "a.md"}
+    )
+    await store.insert_vector(mid, vector)
+    record = {"content": "chunk", "content_hash": "h2", "embedding": vector}
+    await store.insert_memories_batch("system", "document", "global", [record])
+    await store.apply_file_diff(
+        "system",
+        "document",
+        "global",
+        [{**record, "content_hash": "h3", "metadata": {"filename": "a.md"}}],
+        [],
+        [mid],
+    )
+    await store.file_chunk_hashes("a.md", "global")
+    await store.hash_exists("h1")
+    await store.existing_hashes(["h1", "h9"])
+    await store.get_memory_stats("u1")
+    await store.soft_delete_memories([mid])
+    await store.delete_memories_by_filename("a.md")
+
+    await store.save_profile("u1", {"name": "Ana"})
+    await store.save_profile("u1", {"name": "Ana"}, {"timeline": [{"event": "x"}]})
+    await store.load_profile("u1")
+    await store.load_profile_history("u1", "timeline")
+    await store.load_profile_history("u1", "timeline", before_id=10)
+    await store.list_all_chat_ids()
+
+    manifest = store.manifest_repo
+    await manifest.upsert("a.md", 1, 1, "hash", "v", "model", 1)
+    await manifest.get_all()
+    await manifest.delete("a.md")
+
+    state = store.state_repo
+    goal_id = await state.add_goal("u1", "fitness", "Correr")
+    await state.get_active_goals("u1")
+    await state.update_goal_status(goal_id, "completed")
+    await state.add_milestone("u1", "Correr", "Completado", goal_id=goal_id)
+    await state.get_recent_milestones("u1")
+    await state.get_recently_active_chat_ids()
+
+    knowledge = store.knowledge_repo
+    fact = {
+        "category": "entities",
+        "identity_key": "luna",
+        "position": 0,
+        "data": "{}",
+        "data_hash": "d1",
+        "content_hash": "k1",
+    }
+    await knowledge.apply_changes(
+        "u1", {"user_name": "Ana"}, [fact], [], [{**record, "content_hash": "k1"}], []
+    )
+    await knowledge.fact_hashes("u1")
+    await knowledge.load("u1")
+    await knowledge.apply_changes(
+        "u1", {}, [], [("entities", "luna")], [], [mid], retire_legacy=True
+    )
+
+    outbox = OutboxManager()
+    with patch("src.core.messaging.outbox.get_sqlite_store", return_value=store):
+        message_id = await outbox.schedule_message("u1", "seguimiento", 3600)
+        await outbox.get_pending_messages()
+        await outbox.mark_as_sent(message_id)
+        await outbox.get_and_clear_pending_intents("u1")
+
+
+@pytest.mark.asyncio
+async def test_repository_queries_use_indexes(traced_db):
+    store, statements = traced_db
+    await _exercise_repositories(store)
+
+    db = await store.get_db()
+    await db.set_trace_callback(None)
+    queries = {
+        " ".join(sql.split())
+        for sql in statements
+        if _DML.match(sql) and not sql.startswith("--")
+    }
+    assert len(queries) > 20
+
+    scans = {}
+    for sql in queries - _FULL_SCAN_ALLOWED:
+        async with db.execute(f"EXPLAIN QUERY PLAN {sql}") as cursor:
+            plan = [row[3] for row in await cursor.fetchall()]
+        tables = [m.group(1) for d in plan if (m := _FULL_SCAN.match(d))]
+        if [t for t in tables if t != "sqlite_master"]:
+            scans[sql] = plan
+    assert not scans, f"Full table scans: {scans}"
@@ -0,0 +1,46 @@
+# tests/unit/memory/test_query_stats.py
+import logging
+
+import pytest
+
+from src.core.config import settings
+from src.memory.query_stats import normalize_sql, query_stats
+from src.memory.sqlite_store import SQLiteStore
+
+
+def test_normalize_sql_collapses_literals_and_in_lists():
+    sql = """
+        SELECT id FROM memories
+        WHERE id IN (?, ?, ?) AND namespace = 'global' LIMIT 10
+    """
+    assert normalize_sql(sql) == (
+        "SELECT id FROM memories WHERE id IN (?, ...) AND namespace = ? LIMIT ?"
+    )
+    assert normalize_sql("SELECT 1 FROM memory_embeddings_int8") == (
+        "SELECT ? FROM memory_embeddings_int8"
+    )
+
+
+@pytest.mark.asyncio
+async def test_store_statements_are_timed_and_slow_ones_logged(
+    tmp_path, monkeypatch, caplog
+):
+    store = SQLiteStore(str(tmp_path / "stats.db"), read_pool_size=0)
+    await store.init_db(settings.SQLITE_SCHEMA_PATH)
+    try:
+        query_stats.reset()
+        monkeypatch.setattr(query_stats, "slow_ms", 0.0)
+        with caplog.at_level(logging.WARNING, logger="src.memory.query_stats"):
+            await store.hash_exists("abc")
+            await store.hash_exists("def")
+
+        statement = "SELECT ? FROM memories WHERE content_hash = ?"
+        stats = {s["statement"]: s for s in query_stats.top(50)}
+        assert stats[statement]["calls"] == 2
+        assert stats[statement]["slow_calls"] == 2
+        slow = [r.getMessage() for r in caplog.records if statement in r.getMessage()]
+        assert slow
+        assert "USING COVERING INDEX" in slow[0]
+    finally:
+        query_stats.reset()
+        await store.disconnect()
@@ -40,6 +40,7 @@ async def test_init_db(temp_db):
         tables = [row[0] for row in await cursor.fetchall()]
         assert "memories" in tables
         assert "vector_memory_map" in tables
+        assert "memory_embeddings" in tables
         assert "embedding_cache" in tables
         assert "profiles" in tables
         # memories_fts es una tabla virtual, puede no aparecer en sqlite_master normal o si
@@ -93,6 +94,25 @@ async def test_profile_operations(temp_db):
     assert (await temp_db.load_profile("chat_123"))["name"] == "Updated Name"
 
 
+@pytest.mark.asyncio
+async def test_profile_history_archive(temp_db):
+    """Las entradas archivadas se guardan una vez y se paginan de nuevas a viejas."""
+    entries = [{"date": f"d{i}", "event": f"e{i}"} for i in range(5)]
+    archived = {"timeline": entries, "learned_preference": ["pasta"]}
+    await temp_db.save_profile("chat_h", {"name": "H"}, archived)
+    # Un guardado repetido (copia desactualizada) no duplica el historial
+    await temp_db.save_profile("chat_h", {"name": "H"}, archived)
+
+    page = await temp_db.load_profile_history("chat_h", "timeline", limit=3)
+    assert [row["entry"]["event"] for row in page] == ["e4", "e3", "e2"]
+    rest = await temp_db.load_profile_history(
+        "chat_h", "timeline", before_id=page[-1]["id"]
+    )
+    assert [row["entry"]["event"] for row in rest] == ["e1", "e0"]
+    prefs = await temp_db.load_profile_history("chat_h", "learned_preference")
+    assert [row["entry"] for row in prefs] == ["pasta"]
+
+
 @pytest.mark.asyncio
 async def test_vector_cleanup_trigger(temp_db):
     """
@@ -108,27 +128,27 @@ async def test_vector_cleanup_trigger(temp_db):
 
     db = await temp_db.get_db()
 
-    # Verificar que existen
-    async with db.execute("SELECT COUNT(*) FROM memory_vectors") as c:
-        assert (await c.fetchone())[0] == 1
-    async with db.execute("SELECT COUNT(*) FROM vector_memory_map") as c:
-        assert (await c.fetchone())[0] == 1
+    # Verificar que existe, con los filtros de la memoria como metadatos
+    async with db.execute(
+        "SELECT namespace, chat_id, memory_type, is_active FROM memory_embeddings"
+    ) as c:
+        rows = [tuple(r) for r in await c.fetchall()]
+        assert rows == [("user", "chat1", "fact", 1)]
+
+    # 3. Desactivar: el metadato is_active sigue a la memoria
+    await temp_db.soft_delete_memories([memory_id])
+    async with db.execute("SELECT is_active FROM memory_embeddings") as c:
+        assert (await c.fetchone())[0] == 0
 
-    # 3. Borrar memoria
+    # 4. Borrar memoria
     await db.execute("DELETE FROM memories WHERE id = ?", (memory_id,))
     await db.commit()
 
-    # 4. Verificar limpieza en cascada
-    # Trigger 1: memories -> memories_fts (implícito en sqlite)
-    # Trigger 2: memories -> vector_memory_map (ON DELETE CASCADE)
-    async with db.execute("SELECT COUNT(*) FROM vector_memory_map") as c:
-        assert (await c.fetchone())[0] == 0
-
-    # Trigger 3 (NUESTRO): vector_memory_map -> memory_vectors
-    async with db.execute("SELECT COUNT(*) FROM memory_vectors") as c:
-        assert (await c.fetchone())[
-            0
-        ] == 0, "El vector físico no se borró automáticamente"
+    # 5. Verificar limpieza (trigger memory_embeddings_cleanup)
+    async with db.execute("SELECT COUNT(*) FROM memory_embeddings") as c:
+        assert (await c.fetchone())[0] == 0, (
+            "El vector físico no se borró automáticamente"
+        )
 
 
 @pytest.mark.asyncio
@@ -192,3 +212,94 @@ async def test_get_memory_stats(temp_db):
     assert stats["by_type"]["fact"] == 2
     assert stats["by_type"]["conversation"] == 1
     assert stats["by_sensitivity"]["high"] == 1
+
+
+@pytest.mark.asyncio
+async def test_writer_uses_wal_journal(temp_db):
+    """El escritor debe configurar WAL para permitir lectores concurrentes."""
+    db = await temp_db.get_writer()
+    async with db.execute("PRAGMA journal_mode") as cursor:
+        assert (await cursor.fetchone())[0] == "wal"
+
+
+@pytest.mark.asyncio
+async def test_reader_pool_is_read_only(temp_db):
+    """Las conexiones del pool de lectura no deben aceptar escrituras."""
+    import sqlite3
+
+    async with temp_db.reader() as reader:
+        assert reader is not await temp_db.get_writer()
+        with pytest.raises(sqlite3.OperationalError):
+            await reader.execute(
+                "INSERT INTO profiles (chat_id, data) VALUES ('x', '{}')"
+            )
+
+
+@pytest.mark.asyncio
+async def test_reader_sees_committed_writes(temp_db):
+    """Una lectura en el pool ve lo que el escritor ya confirmó."""
+    import asyncio
+
+    await temp_db.save_profile("chat_pool", {"name": "Pool"})
+
+    loaded = await asyncio.gather(*[
+        temp_db.load_profile("chat_pool") for _ in range(8)
+    ])
+    assert all(p == {"name": "Pool"} for p in loaded)
+
+
+@pytest.mark.asyncio
+async def test_reader_falls_back_to_writer_without_pool():
+    """Con pool de tamaño 0 las lecturas reutilizan la conexión escritora."""
+    store = SQLiteStore(":memory:")
+    try:
+        async with store.reader() as reader:
+            assert reader is await store.get_writer()
+    finally:
+        await store.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_insert_memories_batch_single_transaction(temp_db):
+    """El lote inserta memorias, vectores y mapeos; ignora hashes existentes."""
+    existing = await temp_db.insert_memory("chat1", "ya existe", "hash_b0", "fact")
+    records = [
+        {
+            "content": f"chunk {i}",
+            "content_hash": f"hash_b{i}",
+            "metadata": {"filename": "doc.md"},
+            "embedding": [0.1 * i] * 768,
+            "sensitivity": "medium",
+        }
+        for i in range(4)
+    ]
+
+    ids = await temp_db.insert_memories_batch("chat1", "document", "global", records)
+
+    assert len(ids) == 3
+    assert existing not in ids
+
+    db = await temp_db.get_db()
+    async with db.execute(
+        "SELECT COUNT(*) FROM memory_embeddings WHERE memory_id IN (?, ?, ?)", ids
+    ) as c:
+        assert (await c.fetchone())[0] == 3
+    async with db.execute("SELECT COUNT(*) FROM memory_embeddings") as c:
+        assert (await c.fetchone())[0] == 3
+    async with db.execute(
+        "SELECT namespace, sensitivity FROM memories WHERE id = ?", (ids[0],)
+    ) as c:
+        row = await c.fetchone()
+        assert row["namespace"] == "global"
+        assert row["sensitivity"] == "medium"
+
+
+@pytest.mark.asyncio
+async def test_existing_hashes(temp_db):
+    """existing_hashes resuelve varios hashes en una sola llamada."""
+    await temp_db.insert_memory("chat1", "a", "hash_e1", "fact")
+    await temp_db.insert_memory("chat1", "b", "hash_e2", "fact")
+
+    found = await temp_db.existing_hashes(["hash_e1", "hash_e2", "hash_e3"])
+    assert found == {"hash_e1", "hash_e2"}
+    assert await temp_db.existing_hashes([]) == set()
@@ -70,3 +70,16 @@ async def test_add_and_get_milestones(state_db):
     assert len(milestones) == 1
     assert milestones[0]["action"] == "Gimnasio"
     assert milestones[0]["emotion"] == "Cansado pero orgulloso"
+
+
+@pytest.mark.asyncio
+async def test_recently_active_chat_ids(state_db):
+    repo = state_db.state_repo
+    await repo.add_milestone(chat_id="reciente", action="Correr", status="Completado")
+    await repo.add_milestone(chat_id="antiguo", action="Leer", status="Completado")
+    await state_db.execute_write(
+        "UPDATE user_milestones SET created_at = datetime('now', '-40 days') "
+        "WHERE chat_id = 'antiguo'"
+    )
+
+    assert await repo.get_recently_active_chat_ids(days=30) == ["reciente"]
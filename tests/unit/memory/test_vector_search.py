@@ -0,0 +1,79 @@
+# tests/unit/memory/test_vector_search.py
+import os
+
+import pytest
+
+from src.core.config import settings
+from src.memory.sqlite_store import SQLiteStore
+from src.memory.vector_search import VectorSearch
+
+
+@pytest.fixture
+async def vec_db():
+    db_path = "storage/test_vector_search.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    store = SQLiteStore(db_path)
+    await store.init_db(settings.SQLITE_SCHEMA_PATH)
+    yield store
+    await store.disconnect()
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+
+def _vec(x: float) -> list[float]:
+    return [x] + [0.0] * 767
+
+
+async def _add(store, chat_id, namespace, h, x, active=True):
+    mid = await store.insert_memory(chat_id, h, h, "fact", namespace=namespace)
+    await store.insert_vector(mid, _vec(x))
+    if not active:
+        await store.soft_delete_memories([mid])
+    return mid
+
+
+@pytest.mark.asyncio
+async def test_filters_are_pushed_into_knn(vec_db):
+    """Un usuario con poco historial recibe sus resultados aunque el
+    corpus global y de otros usuarios esté más cerca de la consulta."""
+    for i in range(20):
+        await _add(vec_db, "system", "global", f"g{i}", 0.01 * i)
+        await _add(vec_db, "other", "user", f"o{i}", 0.01 * i)
+    mine = await _add(vec_db, "me", "user", "mine", 5.0)
+    await _add(vec_db, "me", "user", "gone", 0.0, active=False)
+
+    results = await VectorSearch(vec_db).search(_vec(0.0), 3, "me", "user")
+
+    assert [mid for mid, _ in results] == [mine]
+
+
+@pytest.mark.asyncio
+async def test_legacy_layout_is_searched_until_migrated(vec_db):
+    from src.memory.vector_migration import migrate_legacy_vectors
+
+    legacy = await vec_db.insert_memory("me", "old", "old", "fact")
+    db = await vec_db.get_db()
+    cursor = await db.execute(
+        "INSERT INTO memory_vectors (embedding) VALUES (vec_f32(?))",
+        (str(_vec(0.5)),),
+    )
+    await db.execute(
+        "INSERT INTO vector_memory_map (vector_id, memory_id) VALUES (?, ?)",
+        (cursor.lastrowid, legacy),
+    )
+    await db.commit()
+    fresh = await _add(vec_db, "me", "user", "new", 0.1)
+
+    search = VectorSearch(vec_db)
+    before = await search.search(_vec(0.0), 5, "me", "user")
+    assert [mid for mid, _ in before] == [fresh, legacy]
+
+    assert await migrate_legacy_vectors(vec_db, batch_size=1) == 1
+    assert await migrate_legacy_vectors(vec_db) == 0
+
+    async with db.execute("SELECT COUNT(*) FROM memory_vectors") as c:
+        assert (await c.fetchone())[0] == 0
+    after = await search.search(_vec(0.0), 5, "me", "user")
+    assert after == before
+    assert search._legacy_pending is False
@@ -0,0 +1,80 @@
+# tests/unit/memory/test_write_queue.py
+import asyncio
+import os
+import sqlite3
+
+import pytest
+
+from src.core.config import settings
+from src.memory.sqlite_store import SQLiteStore
+
+
+@pytest.fixture
+async def queue_db():
+    db_path = "storage/test_write_queue.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    store = SQLiteStore(db_path)
+    await store.init_db(settings.SQLITE_SCHEMA_PATH)
+    yield store
+    await store.disconnect()
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_share_commits(queue_db):
+    """Escrituras concurrentes se confirman en menos transacciones que llamadas."""
+    await asyncio.gather(*[
+        queue_db.save_profile(f"chat_{i}", {"n": i}) for i in range(30)
+    ])
+
+    writer = queue_db._writer
+    assert writer.intents_committed == 30
+    assert writer.groups_committed < 30
+
+    ids = await queue_db.list_all_chat_ids()
+    assert len(ids) == 30
+
+
+@pytest.mark.asyncio
+async def test_write_results_carry_rowids(queue_db):
+    """Cada llamador recibe su propio lastrowid."""
+    ids = await asyncio.gather(*[
+        queue_db.state_repo.add_milestone(f"chat_{i}", "Gimnasio", "Completado")
+        for i in range(5)
+    ])
+    assert len(set(ids)) == 5
+    assert all(i > 0 for i in ids)
+
+
+@pytest.mark.asyncio
+async def test_failed_intent_does_not_roll_back_group(queue_db):
+    """Un fallo aislado revierte solo su SAVEPOINT, no el resto del grupo."""
+
+    async def _broken(db):
+        await db.execute("INSERT INTO profiles (chat_id, data) VALUES ('broken', '{}')")
+        await db.execute("INSERT INTO tabla_inexistente VALUES (1)")
+
+    results = await asyncio.gather(
+        queue_db.save_profile("ok_1", {"a": 1}),
+        queue_db.run_in_writer(_broken),
+        queue_db.save_profile("ok_2", {"a": 2}),
+        return_exceptions=True,
+    )
+
+    assert isinstance(results[1], sqlite3.OperationalError)
+    assert await queue_db.load_profile("ok_1") == {"a": 1}
+    assert await queue_db.load_profile("ok_2") == {"a": 2}
+    assert await queue_db.load_profile("broken") is None
+
+
+@pytest.mark.asyncio
+async def test_disconnect_drains_pending_writes(queue_db):
+    """disconnect() espera a que las escrituras encoladas se confirmen."""
+    task = asyncio.create_task(queue_db.save_profile("late", {"x": 1}))
+    await asyncio.sleep(0)
+    await queue_db.disconnect()
+    await task
+
+    assert await queue_db.load_profile("late") == {"x": 1}
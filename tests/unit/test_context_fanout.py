@@ -0,0 +1,83 @@
+# tests/unit/test_context_fanout.py
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from prometheus_client import REGISTRY
+
+from src.agents.specialists.chat.chat_tool import _gather_chat_context
+from src.agents.utils.context_fanout import ContextSource, gather_context
+
+
+def _observations(specialist: str, source: str, outcome: str) -> float:
+    value = REGISTRY.get_sample_value(
+        "context_source_duration_seconds_count",
+        {"specialist": specialist, "source": source, "outcome": outcome},
+    )
+    return value or 0.0
+
+
+async def _after(seconds: float, value):
+    await asyncio.sleep(seconds)
+    return value
+
+
+async def _fail():
+    raise RuntimeError("redis caído")
+
+
+@pytest.mark.asyncio
+async def test_slow_and_failing_sources_degrade_to_fallback():
+    before = {
+        outcome: _observations("test", name, outcome)
+        for name, outcome in (("fast", "ok"), ("slow", "timeout"), ("broken", "error"))
+    }
+    start = time.perf_counter()
+    context = await gather_context(
+        "test",
+        [
+            ContextSource("fast", lambda: _after(0.01, "dato"), str),
+            ContextSource("slow", lambda: _after(5, "tarde"), list, timeout=0.05),
+            ContextSource("broken", _fail, lambda: "vacío"),
+        ],
+    )
+
+    assert time.perf_counter() - start < 1
+    assert context == {"fast": "dato", "slow": [], "broken": "vacío"}
+    for name, outcome in (("fast", "ok"), ("slow", "timeout"), ("broken", "error")):
+        assert _observations("test", name, outcome) == before[outcome] + 1
+
+
+@pytest.mark.asyncio
+async def test_chat_sources_are_fetched_concurrently():
+    delay = 0.1
+
+    def slow(value):
+        async def load(*args, **kwargs):
+            return await _after(delay, value)
+
+        return AsyncMock(side_effect=load)
+
+    profile_manager = MagicMock(load_profile=slow({"identity": {}}))
+    knowledge = MagicMock(load_knowledge=slow({"entities": []}))
+    memory = MagicMock(get_summary=slow(SimpleNamespace(summary="Resumen")))
+    vectors = MagicMock(retrieve_context_multi=slow([[], []]))
+    store = MagicMock()
+    store.state_repo.get_recent_milestones = slow([{"action": "Caminar"}])
+    with (
+        patch("src.core.profile_manager.user_profile_manager", profile_manager),
+        patch("src.memory.knowledge_base.knowledge_base_manager", knowledge),
+        patch("src.memory.long_term_memory.long_term_memory", memory),
+        patch("src.core.dependencies.get_vector_memory_manager", return_value=vectors),
+        patch("src.core.dependencies.get_sqlite_store", return_value=store),
+    ):
+        start = time.perf_counter()
+        context = await _gather_chat_context("c1", "hola")
+        elapsed = time.perf_counter() - start
+
+    # Cinco fuentes de 100 ms: en serie serían 500 ms
+    assert elapsed < 3 * delay
+    assert context["summary"] == "Resumen"
+    assert context["milestones"] == [{"action": "Caminar"}]
@@ -0,0 +1,34 @@
+# tests/unit/test_main_bootstrap.py
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.main import _bootstrap_knowledge
+
+
+@pytest.mark.asyncio
+async def test_failed_bootstrap_step_does_not_skip_the_rest(caplog):
+    manager = MagicMock(
+        migrate_embedding_dimension=AsyncMock(side_effect=RuntimeError("boom")),
+        enable_quantization=AsyncMock(),
+        start_ann_backends=AsyncMock(),
+    )
+    loader = MagicMock(check_and_bootstrap=AsyncMock())
+    with (
+        patch(
+            "src.memory.vector_migration.migrate_legacy_vectors",
+            AsyncMock(side_effect=RuntimeError("legacy")),
+        ),
+        patch("src.core.dependencies.get_sqlite_store"),
+        patch("src.core.dependencies.get_vector_memory_manager", return_value=manager),
+        patch("src.memory.global_knowledge_loader.global_knowledge_loader", loader),
+    ):
+        await _bootstrap_knowledge()
+
+    loader.check_and_bootstrap.assert_awaited_once()
+    manager.start_ann_backends.assert_awaited_once()
+    failed = [r for r in caplog.records if r.exc_info]
+    assert [r.args for r in failed] == [
+        ("legacy vector migration",),
+        ("embedding quantization",),
+    ]
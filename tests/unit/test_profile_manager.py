@@ -1,6 +1,9 @@
 # tests/unit/test_profile_manager.py
+import json
+
 import pytest
 
+from src.core.profile_history import bound_profile
 from src.core.profile_manager import UserProfileManager
 from src.core.profile_seeder import ensure_profile_complete, get_default_profile
 
@@ -57,3 +60,54 @@ class TestProfileMigration:
         assert complete["personality_adaptation"]["humor_tolerance"] == 0.9
         assert complete["psychological_state"]["key_metaphors"] == ["río"]
         assert complete["values_and_goals"]["core_values"] == ["honestidad"]
+
+
+class TestBoundedProfile:
+    def _profile(self, entries: int, prefs: int = 0):
+        profile = get_default_profile()
+        profile["timeline"] = [
+            {
+                "date": f"2026-01-01T00:{i:05d}",
+                "event": f"Hito {i}",
+                "type": "milestone",
+            }
+            for i in range(entries)
+        ]
+        profile["evolution"]["path_traveled"] = list(profile["timeline"])
+        profile["personality_adaptation"]["learned_preferences"] = [
+            f"pref {i}" for i in range(prefs)
+        ]
+        return profile
+
+    def test_keeps_recent_window_and_returns_overflow(self):
+        profile = self._profile(50, prefs=40)
+        archived = bound_profile(profile, timeline_window=20, prefs_window=30)
+
+        assert [e["event"] for e in profile["timeline"]][0] == "Hito 30"
+        assert len(profile["evolution"]["path_traveled"]) == 20
+        assert len(profile["personality_adaptation"]["learned_preferences"]) == 30
+        assert [e["event"] for e in archived["timeline"]] == [
+            f"Hito {i}" for i in range(30)
+        ]
+        assert archived["learned_preference"] == [f"pref {i}" for i in range(10)]
+
+    def test_shrinks_windows_to_fit_byte_budget(self):
+        profile = self._profile(200)
+        for entry in profile["timeline"]:
+            entry["event"] *= 50
+        archived = bound_profile(
+            profile, timeline_window=100, prefs_window=30, max_bytes=8_000
+        )
+
+        assert len(json.dumps(profile, ensure_ascii=False).encode()) <= 8_000
+        kept = len(profile["timeline"])
+        assert 0 < kept < 100
+        # Lo archivado y la ventana forman el timeline completo, en orden
+        events = [e["event"] for e in archived["timeline"] + profile["timeline"]]
+        assert events == [f"Hito {i}" * 50 for i in range(200)]
+
+    def test_small_profile_is_untouched(self):
+        profile = self._profile(3)
+        archived = bound_profile(profile)
+        assert len(profile["timeline"]) == 3
+        assert archived == {"timeline": [], "learned_preference": []}
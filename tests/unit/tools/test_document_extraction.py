@@ -0,0 +1,103 @@
+"""
+Tests del pool de extracción de documentos: orden de páginas y hojas,
+tiempo máximo por documento y límite de memoria de los workers.
+"""
+
+import asyncio
+from pathlib import Path
+
+import openpyxl
+import pymupdf
+import pytest
+
+from src.core.exceptions import DocumentExtractionError, TransientExtractionError
+from src.tools.document_extraction import DocumentExtractor
+
+
+@pytest.fixture
+def sample_pdf(tmp_path: Path) -> Path:
+    path = tmp_path / "guia.pdf"
+    doc = pymupdf.open()
+    for i in range(20):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Pagina {i}")
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+@pytest.fixture
+def extractor():
+    service = DocumentExtractor(max_workers=2, timeout_seconds=60, memory_mb=0)
+    yield service
+    service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_pdf_pages_stream_in_order(extractor, sample_pdf):
+    pages = [text async for text in extractor.iter_units(sample_pdf)]
+    assert [p.strip() for p in pages] == [f"Pagina {i}" for i in range(20)]
+
+    # Temporal sin extensión: el formato se indica explícitamente
+    upload = sample_pdf.rename(sample_pdf.with_name("upload"))
+    text = await extractor.extract_text(upload, "pdf")
+    assert text.index("Pagina 3") < text.index("Pagina 17")
+
+
+@pytest.mark.asyncio
+async def test_xlsx_sheets_in_order(extractor, tmp_path):
+    path = tmp_path / "datos.xlsx"
+    workbook = openpyxl.Workbook()
+    workbook.active.append(["a", 1])
+    for name in ("dos", "tres"):
+        workbook.create_sheet(name).append([name, None, 2])
+    workbook.save(path)
+
+    assert await extractor.extract_text(path) == "a, 1\ndos, 2\ntres, 2"
+
+
+@pytest.mark.asyncio
+async def test_timeout_raises_and_recovers(sample_pdf):
+    service = DocumentExtractor(max_workers=1, timeout_seconds=1e-6, memory_mb=0)
+    try:
+        with pytest.raises(TransientExtractionError, match="exceeded"):
+            await service.extract_text(sample_pdf)
+
+        service.timeout_seconds = 60
+        assert "Pagina 0" in await service.extract_text(sample_pdf)
+    finally:
+        service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_timeout_does_not_fail_other_documents(sample_pdf):
+    service = DocumentExtractor(max_workers=1, timeout_seconds=60, memory_mb=0)
+    try:
+        other = asyncio.create_task(service.extract_text(sample_pdf))
+        await asyncio.sleep(0)  # Fija el plazo de 60 s del primer documento
+
+        service.timeout_seconds = 1e-6
+        with pytest.raises(TransientExtractionError, match="exceeded"):
+            await service.extract_text(sample_pdf)
+        service.timeout_seconds = 60
+
+        text = await other
+        assert text.index("Pagina 0") < text.index("Pagina 19")
+    finally:
+        service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_memory_cap_fails_the_document(sample_pdf):
+    service = DocumentExtractor(max_workers=1, timeout_seconds=60, memory_mb=16)
+    try:
+        with pytest.raises(DocumentExtractionError):
+            await service.extract_text(sample_pdf)
+    finally:
+        service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_unsupported_type(extractor, tmp_path):
+    with pytest.raises(DocumentExtractionError, match="Unsupported"):
+        await extractor.extract_text(tmp_path / "notas.docx")